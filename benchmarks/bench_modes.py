@@ -0,0 +1,273 @@
+"""
+Бенчмарк режимов парсера на синтетических страницах.
+
+Каждый режим из MODES запускается на синтетических страницах
+docs.python.org и peps.python.org из tests/fixture_data/pages
+(они собраны по образцу разметки сайтов, а не скачаны с них),
+страницы отдаёт адаптер requests_mock, сеть не нужна.
+Время работы раскладывается по этапам: загрузка (fetch),
+разбор HTML (parse), извлечение данных (extract) и вывод (output).
+Для режима выводятся пропускная способность (страниц в секунду)
+и пиковый RSS процесса: каждый режим меряется в отдельном процессе.
+
+Результаты сравниваются с базовой линией benchmarks/baselines.json.
+Если время или память режима выросли больше порога, запуск
+завершается с кодом 1. Базовая линия своя для каждой машины,
+для каждого движка и источника статусов PEP (--engine, --pep-source)
+и сохраняется аргументом --save-baseline.
+
+Запуск из корня проекта:
+    python benchmarks/bench_modes.py [--repeat N] [--engine lxml]
+    python benchmarks/bench_modes.py --pep-source html
+    python benchmarks/bench_modes.py --save-baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import Namespace
+from collections import defaultdict
+from functools import wraps
+from pathlib import Path
+
+from source_paths import BASE_DIR
+
+from constants import ENGINE, ENGINES, PEP_SOURCE, PEP_SOURCES
+
+BASELINE_FILE = BASE_DIR / 'benchmarks' / 'baselines.json'
+STAGES = ('fetch', 'parse', 'extract', 'output')
+EXTRACTORS = (
+    'whats_new_index', 'whats_new_page', 'latest_versions_links',
+    'archive_links', 'pep_index', 'pep_status', 'pep_card',
+)
+PARSERS = (('extractors', 'make_soup'), ('lxml_extractors', 'parse_document'))
+METRICS = ('wall_ms', 'rss_kib')
+
+
+class StageTimer:
+    """Суммирует время вызовов обёрнутых функций по этапам."""
+
+    def __init__(self):
+        """Создаёт пустые счётчики."""
+        self.reset()
+
+    def reset(self):
+        """Обнуляет счётчики перед очередным запуском режима."""
+        self.totals = defaultdict(float)
+        self.pages = 0
+
+    def wrap(self, stage, func):
+        """Возвращает func, время вызовов которой копится в этапе stage."""
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.totals[stage] += time.perf_counter() - start
+        return timed
+
+    def wrap_send(self, send):
+        """Оборачивает session.send: загрузка и счётчик страниц."""
+        timed = self.wrap('fetch', send)
+
+        @wraps(send)
+        def counted(request, **kwargs):
+            if request.method == 'GET':
+                self.pages += 1
+            return timed(request, **kwargs)
+        return counted
+
+    def stages_ms(self, output):
+        """
+        Время этапов в миллисекундах.
+
+        Разбор вызывается изнутри функций извлечения, поэтому
+        из времени извлечения вычитается время разбора.
+        """
+        return {
+            'fetch': self.totals['fetch'] * 1000,
+            'parse': self.totals['parse'] * 1000,
+            'extract': (self.totals['extract'] - self.totals['parse']) * 1000,
+            'output': output * 1000,
+        }
+
+
+def instrument(timer):
+    """Оборачивает функции разбора и извлечения обоих движков."""
+    from importlib import import_module
+    for module_name, parser_name in PARSERS:
+        module = import_module(module_name)
+        setattr(
+            module, parser_name,
+            timer.wrap('parse', getattr(module, parser_name)),
+        )
+        for name in EXTRACTORS:
+            setattr(module, name, timer.wrap('extract', getattr(module, name)))
+
+
+def peak_rss_kib():
+    """Пиковый RSS текущего процесса в КиБ."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_mode(mode, engine, repeat, workers, pep_source=PEP_SOURCE):
+    """
+    Меряет режим mode в текущем процессе, лучший из repeat запусков.
+
+    Файлы режима (архивы, результаты, состояние) пишутся во временный
+    каталог, вывод на экран подавляется.
+    """
+    from requests_cache import CachedSession
+
+    import main
+    import outputs
+    from outputs import control_output
+    from tests.conftest import get_pages_adapter
+
+    timer = StageTimer()
+    instrument(timer)
+    adapter = get_pages_adapter()
+    cli_args = Namespace(
+        mode=mode, engine=engine, workers=workers, processes=0, output=None,
+        pep_source=pep_source,
+    )
+    best = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        main.BASE_DIR = outputs.BASE_DIR = Path(tmp_dir)
+        for _ in range(repeat):
+            timer.reset()
+            session = CachedSession(backend='memory')
+            for protocol in ('http://', 'https://'):
+                session.mount(protocol, adapter)
+            session.send = timer.wrap_send(session.send)
+            start = time.perf_counter()
+            results = main.MODES[mode](session, cli_args)
+            # Режимы отдают строки генератором: выбираем их до вывода,
+            # чтобы время вывода не смешивалось с загрузкой и разбором.
+            if results is not None:
+                results = list(results)
+            output_start = time.perf_counter()
+            if results is not None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    control_output(results, cli_args)
+            end = time.perf_counter()
+            wall = end - start
+            if best is None or wall < best['wall_ms'] / 1000:
+                best = {
+                    'wall_ms': wall * 1000,
+                    'stages_ms': timer.stages_ms(end - output_start),
+                    'pages': timer.pages,
+                    'pages_per_s': timer.pages / wall,
+                }
+    best['rss_kib'] = peak_rss_kib()
+    return best
+
+
+def measure_mode(mode, args):
+    """Запускает run_mode в отдельном процессе и возвращает замеры."""
+    completed = subprocess.run(
+        [
+            sys.executable, __file__, '--child', mode,
+            '--engine', args.engine, '--repeat', str(args.repeat),
+            '--workers', str(args.workers), '--pep-source', args.pep_source,
+        ],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def compare(measurements, baseline, threshold):
+    """Возвращает строки с описанием регрессий относительно baseline."""
+    regressions = []
+    for mode, measured in measurements.items():
+        if mode not in baseline:
+            continue
+        for metric in METRICS:
+            limit = baseline[mode][metric] * (1 + threshold / 100)
+            if measured[metric] > limit:
+                regressions.append(
+                    f'{mode}: {metric} {measured[metric]:.0f} > '
+                    f'{baseline[mode][metric]:.0f} + {threshold}%'
+                )
+    return regressions
+
+
+def print_table(measurements):
+    """Печатает замеры режимов таблицей."""
+    header = (
+        f'{"режим":16} {"всего, мс":>10} '
+        + ' '.join(f'{stage + ", мс":>11}' for stage in STAGES)
+        + f' {"страниц":>8} {"стр/с":>8} {"RSS, МиБ":>9}'
+    )
+    print(header)
+    print('-' * len(header))
+    for mode, measured in measurements.items():
+        print(
+            f'{mode:16} {measured["wall_ms"]:10.1f} '
+            + ' '.join(
+                f'{measured["stages_ms"][stage]:11.1f}' for stage in STAGES
+            )
+            + f' {measured["pages"]:8} {measured["pages_per_s"]:8.0f}'
+            f' {measured["rss_kib"] / 1024:9.1f}'
+        )
+
+
+def main():
+    """Меряет режимы в дочерних процессах и сверяет с базовой линией."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--engine', choices=ENGINES.keys(), default=ENGINE)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument(
+        '--pep-source', choices=PEP_SOURCES, default=PEP_SOURCE,
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=20,
+        help='Допустимый рост времени и памяти, проценты',
+    )
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measured = run_mode(
+            args.child, args.engine, args.repeat, args.workers,
+            args.pep_source,
+        )
+        print(json.dumps(measured))
+        return
+
+    from main import MODES
+    measurements = {mode: measure_mode(mode, args) for mode in MODES}
+    print_table(measurements)
+    baselines = (
+        json.loads(BASELINE_FILE.read_text(encoding='utf-8'))
+        if BASELINE_FILE.exists() else {}
+    )
+    key = f'{args.engine}:{args.pep_source}'
+    if args.save_baseline:
+        baselines[key] = measurements
+        BASELINE_FILE.write_text(
+            json.dumps(baselines, indent=2, ensure_ascii=False),
+            encoding='utf-8',
+        )
+        print(f'Базовая линия сохранена: {BASELINE_FILE}')
+        return
+    if key not in baselines:
+        print('Базовой линии нет, сохраните её: --save-baseline')
+        return
+    regressions = compare(measurements, baselines[key], args.threshold)
+    if regressions:
+        print('Регрессии:', *regressions, sep='\n')
+        sys.exit(1)
+    print(f'Регрессий нет (порог {args.threshold}%)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Бенчмарк форматов файла результатов.
+
+Синтетическая таблица в духе режима pep (ссылка, статус, количество)
+записывается функцией outputs.file_output в каждом формате
+--file-format со сжатием и без, затем читается обратно
+в типизированные строки: CSV — csv.reader с приведением чисел,
+JSON Lines — json.loads, Parquet и Arrow — pyarrow.
+Выводится лучшее время записи и чтения из нескольких повторов
+и размер файла. Форматы, для которых не установлены pyarrow
+или zstandard, пропускаются.
+
+Запуск из корня проекта:
+    python benchmarks/bench_outputs.py [--rows N] [--repeat N]
+"""
+import argparse
+import csv
+import gzip
+import json
+import tempfile
+import time
+from argparse import Namespace
+from pathlib import Path
+
+from source_paths import import_source
+
+outputs = import_source('outputs')
+constants = import_source('constants')
+import_zstandard = import_source('caches').import_zstandard
+
+HEADER = ('Ссылка', 'Cтатус', 'Количество')
+COMPRESSIONS = (None, 'gzip', 'zstd')
+
+
+def make_rows(count):
+    """Строки таблицы: заголовок и count строк со строковыми значениями."""
+    statuses = ('Active', 'Draft', 'Final', 'Rejected', 'Withdrawn')
+    return [HEADER] + [
+        (
+            f'https://peps.python.org/pep-{number:04d}/',
+            statuses[number % len(statuses)],
+            str(number),
+        )
+        for number in range(count)
+    ]
+
+
+def open_text(path, compression):
+    """Открывает текстовый файл результатов на чтение."""
+    if compression == 'gzip':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if compression == 'zstd':
+        return import_zstandard().open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def load(path, file_format, compression):
+    """Читает файл результатов и возвращает число строк с типами."""
+    if file_format == 'csv':
+        with open_text(path, compression) as file:
+            reader = csv.reader(file)
+            next(reader)
+            return len([
+                (link, status, int(count)) for link, status, count in reader
+            ])
+    if file_format == 'jsonl':
+        with open_text(path, compression) as file:
+            return len([json.loads(line) for line in file])
+    pyarrow = outputs.import_pyarrow()
+    if file_format == 'parquet':
+        from pyarrow import parquet
+        return parquet.read_table(path).num_rows
+    with pyarrow.memory_map(str(path)) as source:
+        return pyarrow.ipc.open_file(source).read_all().num_rows
+
+
+def measure(rows, file_format, compression, repeat):
+    """Лучшее время записи и чтения в мс и размер файла в КиБ."""
+    best_write = best_load = float('inf')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        outputs.BASE_DIR = Path(tmp_dir)
+        cli_args = Namespace(
+            mode='bench', output='file', file_format=file_format,
+            file_compression=compression,
+        )
+        for _ in range(repeat):
+            for path in Path(tmp_dir).glob('results/*'):
+                path.unlink()
+            start = time.perf_counter()
+            outputs.file_output(iter(rows), cli_args)
+            best_write = min(best_write, time.perf_counter() - start)
+            path, = Path(tmp_dir).glob('results/*')
+            start = time.perf_counter()
+            loaded = load(path, file_format, compression)
+            best_load = min(best_load, time.perf_counter() - start)
+            assert loaded == len(rows) - 1
+        size = path.stat().st_size
+    return best_write * 1000, best_load * 1000, size / 1024
+
+
+def main():
+    """Меряет все форматы и виды сжатия и печатает таблицу."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+    print(
+        f'{"формат":10} {"сжатие":8} {"запись, мс":>11} '
+        f'{"чтение, мс":>11} {"размер, КиБ":>12}'
+    )
+    for file_format in constants.FILE_FORMATS:
+        for compression in COMPRESSIONS:
+            if compression and compression not in (
+                constants.FORMAT_COMPRESSIONS.get(
+                    file_format, constants.FILE_COMPRESSIONS
+                )
+            ):
+                continue
+            try:
+                write_ms, load_ms, size = measure(
+                    rows, file_format, compression, args.repeat
+                )
+            except ImportError as error:
+                print(f'{file_format:10} {compression or "-":8} {error}')
+                continue
+            print(
+                f'{file_format:10} {compression or "-":8} {write_ms:11.1f} '
+                f'{load_ms:11.1f} {size:12.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Сравнение полного и частичного разбора страниц.
+
+Для каждой синтетической страницы из tests/fixture_data/pages
+(страницы собраны по образцу разметки сайтов, а не скачаны с них)
+строится полное дерево BeautifulSoup и дерево только нужного
+парсеру поддерева (utils.make_soup с целью из PARSE_TARGETS).
+Выводится лучшее время из нескольких повторов и пиковая память
+по данным tracemalloc.
+
+С аргументом --processes дополнительно меряется пропускная способность
+разбора страниц PEP пулом процессов (crawlers.extract_batch) для
+каждого заданного числа процессов.
+
+С аргументом --stream для статей «What's New» и страниц PEP
+сравнивается полный разбор движком lxml и потоковый разбор кусками
+(stream_extractors): время и сколько байт страницы пришлось прочитать.
+Дерево lxml живёт в памяти libxml2, которую tracemalloc не видит,
+поэтому память потокового разбора растёт с числом прочитанных байт,
+а не с размером страницы.
+
+Запуск из корня проекта:
+    python benchmarks/bench_parsing.py [--repeat N] [--processes 1 2 4]
+    python benchmarks/bench_parsing.py --stream
+"""
+import argparse
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from source_paths import BASE_DIR
+
+import lxml_extractors
+import stream_extractors
+from constants import STREAM_CHUNK
+from crawlers import batched, extract_batch
+from extractors import pep_status
+from utils import make_soup
+
+PAGES_DIR = BASE_DIR / 'tests' / 'fixture_data' / 'pages'
+PAGE_TARGETS = (
+    ('docs.python.org/3/index.html', 'latest-versions'),
+    ('docs.python.org/3/download.html', 'download'),
+    ('docs.python.org/3/whatsnew/index.html', 'whats-new-index'),
+    ('docs.python.org/3/whatsnew/3.12.html', 'whats-new-page'),
+    ('docs.python.org/3/whatsnew/2.7.html', 'whats-new-page'),
+    ('peps.python.org/index.html', 'pep-index'),
+    ('peps.python.org/pep-0008/index.html', 'pep-page'),
+)
+STREAM_PAGES = (
+    ('docs.python.org/3/whatsnew/3.12.html', 'whats_new_page'),
+    ('docs.python.org/3/whatsnew/2.7.html', 'whats_new_page'),
+    ('peps.python.org/pep-0008/index.html', 'pep_card'),
+)
+
+
+def measure(text, target, repeat):
+    """Лучшее время разбора в миллисекундах и пиковая память в КиБ."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make_soup(text, target)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    soup = make_soup(text, target)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del soup
+    return best * 1000, peak / 1024
+
+
+def measure_call(func, repeat):
+    """Лучшее время func() в миллисекундах."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure_stream(content, name, repeat):
+    """Время полного и потокового разбора и число прочитанных байт."""
+    read = 0
+
+    def chunks():
+        nonlocal read
+        read = 0
+        for start in range(0, len(content), STREAM_CHUNK):
+            read += len(content[start:start + STREAM_CHUNK])
+            yield content[start:start + STREAM_CHUNK]
+
+    full = measure_call(
+        lambda: getattr(lxml_extractors, name)(content), repeat
+    )
+    stream = measure_call(
+        lambda: getattr(stream_extractors, name)(chunks()), repeat
+    )
+    return full, stream, read
+
+
+def measure_processes(processes, copies, chunk_size=16):
+    """Страниц PEP в секунду при разборе пулом из processes процессов."""
+    pages = [
+        path.read_bytes()
+        for path in (PAGES_DIR / 'peps.python.org').glob('pep-*/index.html')
+    ] * copies
+    with ProcessPoolExecutor(max_workers=processes) as parsers:
+        parsers.submit(extract_batch, pep_status, pages[:1]).result()
+        start = time.perf_counter()
+        futures = [
+            parsers.submit(extract_batch, pep_status, batch)
+            for batch in batched(pages, chunk_size)
+        ]
+        for future in futures:
+            future.result()
+    return len(pages) / (time.perf_counter() - start)
+
+
+def main():
+    """Разбирает аргументы, выполняет замеры и печатает таблицы."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--processes', type=int, nargs='+')
+    parser.add_argument('--copies', type=int, default=10)
+    parser.add_argument('--stream', action='store_true')
+    args = parser.parse_args()
+    header = (
+        f'{"страница":40} {"цель":16} {"полный, мс":>11} {"цель, мс":>9} '
+        f'{"полный, КиБ":>12} {"цель, КиБ":>10}'
+    )
+    print(header)
+    print('-' * len(header))
+    for page, target in PAGE_TARGETS:
+        text = (PAGES_DIR / page).read_text(encoding='utf-8')
+        full_ms, full_kib = measure(text, None, args.repeat)
+        part_ms, part_kib = measure(text, target, args.repeat)
+        print(
+            f'{page:40} {target:16} {full_ms:11.2f} {part_ms:9.2f} '
+            f'{full_kib:12.0f} {part_kib:10.0f}'
+        )
+    if args.stream:
+        print()
+        header = (
+            f'{"страница":40} {"полный, мс":>11} {"поток, мс":>10} '
+            f'{"прочитано, байт":>16}'
+        )
+        print(header)
+        print('-' * len(header))
+        for page, name in STREAM_PAGES:
+            content = (PAGES_DIR / page).read_bytes()
+            full_ms, stream_ms, read = measure_stream(
+                content, name, args.repeat
+            )
+            print(
+                f'{page:40} {full_ms:11.2f} {stream_ms:10.2f} '
+                f'{f"{read}/{len(content)}":>16}'
+            )
+    if not args.processes:
+        return
+    print()
+    print(f'{"процессов":>10} {"страниц/с":>10} {"ускорение":>10}')
+    base = None
+    for processes in args.processes:
+        rate = measure_processes(processes, args.copies)
+        base = base or rate
+        print(f'{processes:10} {rate:10.0f} {rate / base:10.2f}')
+
+
+if __name__ == '__main__':
+    main()
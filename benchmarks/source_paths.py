@@ -0,0 +1,21 @@
+"""
+Пути для запуска бенчмарков из корня репозитория.
+
+Модули парсера импортируются без пакета (как в src/main.py),
+поэтому при импорте этот модуль добавляет в sys.path каталог src
+и корень репозитория (для tests.conftest). Бенчмарки импортируют
+его первым, до модулей парсера, или берут модули через
+import_source().
+"""
+import sys
+from importlib import import_module
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / 'src'))
+
+
+def import_source(name):
+    """Импортирует модуль парсера name из src."""
+    return import_module(name)
@@ -0,0 +1,299 @@
+"""
+Асинхронная загрузка страниц на asyncio и aiohttp (аргумент --async).
+
+Пул потоков вокруг синхронной requests_cache.CachedSession держит
+по потоку и стеку на каждый запрос в полёте. Здесь все запросы
+выполняет один поток с циклом событий: число одновременных запросов
+ограничивает семафор (--concurrency), нагрузку на каждый хост —
+ограничитель частоты (--rate запросов в секунду).
+
+Кеш общий с синхронным режимом: ключи, сроки жизни и условные
+запросы берутся из requests_cache той же сессии, ответы aiohttp
+превращаются в requests.Response и сохраняются в тот же бэкенд.
+Чтение и запись кеша уходят в поток через asyncio.to_thread, чтобы
+не останавливать цикл событий на SQLite.
+
+Разбор страниц выполняют те же функции извлечения, что и в синхронном
+режиме (extractors.py или lxml_extractors.py), прямо в цикле событий.
+Пакет aiohttp нужен только для --async.
+"""
+import asyncio
+import io
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.hooks import dispatch_hook
+from requests_cache.policy import CacheActions
+from tqdm import tqdm
+from urllib3 import HTTPHeaderDict, HTTPResponse
+
+from constants import (
+    ASYNC_CONCURRENCY, BACKOFF_FACTOR, HOST_RATE, RETRIES, RETRY_STATUSES
+)
+from memo import memo_extract
+from tracing import current_url, span
+
+
+# Необязательная зависимость aiohttp.
+def import_aiohttp():
+    """Импортирует aiohttp или сообщает, как его установить."""
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError(
+            'Для режима --async установите пакет aiohttp: pip install aiohttp'
+        )
+    return aiohttp
+
+
+# HTTP-клиент aiohttp.
+def make_client(cli_args=None):
+    """
+    Создаёт aiohttp.ClientSession с пулом соединений.
+
+    Тела ответов не распаковываются: их, как и в синхронном режиме,
+    распаковывает urllib3 при чтении response.content.
+    """
+    aiohttp = import_aiohttp()
+    concurrency = getattr(cli_args, 'concurrency', ASYNC_CONCURRENCY)
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=getattr(cli_args, 'pool_size', None) or 0,
+    )
+    return aiohttp.ClientSession(connector=connector, auto_decompress=False)
+
+
+# Пауза из заголовка Retry-After.
+def retry_after(headers):
+    """Возвращает паузу в секундах из Retry-After или None."""
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(moment.timestamp() - time.time(), 0)
+
+
+class HostRateLimiter:
+    """Ограничивает частоту запросов к каждому хосту."""
+
+    def __init__(self, rate):
+        """Задаёт частоту rate: запросов в секунду на хост, 0 — без лимита."""
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = defaultdict(float)
+
+    async def wait(self, host):
+        """Дожидается очередного разрешённого момента для хоста host."""
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot[host])
+        self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncFetcher:
+    """Загружает страницы через aiohttp с кешем requests_cache сессии."""
+
+    def __init__(self, session, cli_args=None):
+        """
+        Привязывает загрузчик к CachedSession из configure_session.
+
+        От сессии берутся кеш, его настройки, заголовки и хуки ответа.
+        """
+        self.session = session
+        self.cli_args = cli_args
+        self.semaphore = asyncio.Semaphore(
+            getattr(cli_args, 'concurrency', ASYNC_CONCURRENCY)
+        )
+        self.limiter = HostRateLimiter(getattr(cli_args, 'rate', HOST_RATE))
+        self.retries = getattr(cli_args, 'retries', RETRIES)
+        self.backoff = getattr(cli_args, 'backoff', BACKOFF_FACTOR)
+        self.adapter = HTTPAdapter()
+        self.client = None
+
+    async def __aenter__(self):
+        """Открывает HTTP-клиент."""
+        self.client = make_client(self.cli_args)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Закрывает HTTP-клиент."""
+        await self.client.close()
+
+    async def get_response(self, url, headers=None):
+        """
+        Асинхронный аналог функции get_response из utils.py.
+
+        Ошибка загрузки записывается в лог, вместо ответа
+        возвращается None.
+        """
+        aiohttp = import_aiohttp()
+        try:
+            with span('fetch', url=url) as fields:
+                response = await self.fetch(url, headers)
+                fields.update(
+                    status=response.status_code,
+                    from_cache=getattr(response, 'from_cache', False),
+                    bytes=len(response.content),
+                    latency=response.elapsed.total_seconds(),
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            logging.exception(
+                f'Возникла ошибка при загрузке страницы {url}',
+                stack_info=True
+            )
+            return None
+        response.encoding = 'utf-8'
+        return response
+
+    async def fetch(self, url, headers=None):
+        """
+        Возвращает ответ из кеша или загружает страницу.
+
+        Порядок действий повторяет CachedSession.send(): свежий ответ
+        отдаётся из кеша, к устаревшему добавляются условные заголовки,
+        ответ 304 продлевает сохранённую копию.
+        """
+        session = self.session
+        cache = session.cache
+        request = session.prepare_request(
+            requests.Request('GET', url, headers=headers)
+        )
+        actions = CacheActions.from_request(
+            cache.create_key(request), request, session.settings
+        )
+        cached = None
+        if not actions.skip_read:
+            cached = await asyncio.to_thread(
+                cache.get_response, actions.cache_key
+            )
+        actions.update_from_cached_response(cached, cache.create_key)
+        if cached is not None and not (
+            actions.send_request or actions.resend_request
+        ):
+            return self.dispatch(cached)
+        request = actions.update_request(request)
+        response = await self.send(request)
+        actions.update_from_response(response)
+        if not actions.skip_write:
+            await asyncio.to_thread(
+                cache.save_response, response, actions.cache_key,
+                actions.expires,
+            )
+        elif cached is not None and response.status_code == 304:
+            cached = actions.update_revalidated_response(response, cached)
+            return self.dispatch(cached)
+        return self.dispatch(response)
+
+    async def send(self, request):
+        """
+        Отправляет запрос с повторами при сбоях, 429 и 5xx.
+
+        Задержка между повторами такая же, как у configs.configure_adapter():
+        --backoff * 2 ** (номер повтора - 1), Retry-After имеет приоритет.
+        """
+        aiohttp = import_aiohttp()
+        host = urlsplit(request.url).hostname
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait(host)
+            try:
+                async with self.semaphore:
+                    start = loop.time()
+                    async with self.client.get(
+                        request.url, headers=dict(request.headers),
+                    ) as origin:
+                        body = await origin.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+                delay = None
+            else:
+                if (
+                    origin.status not in RETRY_STATUSES
+                    or attempt == self.retries
+                ):
+                    return self.build_response(
+                        request, origin, body, loop.time() - start
+                    )
+                delay = retry_after(origin.headers)
+            if delay is None:
+                delay = self.backoff * 2 ** attempt
+            await asyncio.sleep(delay)
+
+    def build_response(self, request, origin, body, elapsed):
+        """Собирает requests.Response из ответа aiohttp."""
+        headers = HTTPHeaderDict()
+        for name, value in origin.headers.items():
+            headers.add(name, value)
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=origin.status,
+            reason=origin.reason,
+            preload_content=False,
+            request_url=str(origin.url),
+        )
+        response = self.adapter.build_response(request, raw)
+        response.url = str(origin.url)
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+    def dispatch(self, response):
+        """Вызывает хуки ответа сессии, например учёт обращений к кешу."""
+        return dispatch_hook('response', self.session.hooks, response)
+
+
+# Асинхронная загрузка одной страницы.
+def async_get_response(session, url, cli_args=None, headers=None):
+    """Загружает одну страницу через цикл событий."""
+    async def run():
+        async with AsyncFetcher(session, cli_args) as fetcher:
+            return await fetcher.get_response(url, headers)
+
+    return asyncio.run(run())
+
+
+# Асинхронный обход страниц.
+def async_crawl(session, urls, extract, cli_args=None,
+                desc='Выполнение цикла парсинга'):
+    """
+    Загружает страницы в цикле событий и применяет к ним extract.
+
+    Возвращает список результатов в порядке ссылок, для страниц,
+    которые не удалось загрузить, — None, как и crawlers.crawl().
+    """
+    async def run():
+        async with AsyncFetcher(session, cli_args) as fetcher:
+            with tqdm(total=len(urls), desc=desc) as progress:
+                async def fetch_and_extract(url):
+                    current_url.set(url)
+                    response = await fetcher.get_response(url)
+                    progress.update()
+                    return None if response is None else memo_extract(
+                        url, response.content, extract
+                    )
+
+                return await asyncio.gather(
+                    *(fetch_and_extract(url) for url in urls)
+                )
+
+    return asyncio.run(run())
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
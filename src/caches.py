@@ -0,0 +1,234 @@
+"""
+Бэкенды кеша ответов со сжатием и ограничением размера.
+
+По умолчанию requests_cache хранит в SQLite несжатый HTML каждой
+страницы, и файл кеша растёт без ограничений. Здесь собирается
+бэкенд, выбранный аргументом --cache-backend (sqlite, filesystem,
+memory или redis), с прозрачным сжатием тел ответов (gzip или zstd).
+
+После работы парсера кеш ужимается до --cache-max-size мегабайт:
+удаляются записи, к которым дольше всего не обращались (LRU).
+Время последнего обращения для SQLite хранится в отдельной таблице
+того же файла, для файлового кеша — во времени изменения файла.
+Redis вытесняет записи сам, если задать ему maxmemory-policy allkeys-lru.
+
+SQLite открывается в режиме WAL с ожиданием блокировки, поэтому
+несколько одновременных запусков на одной машине могут делить один кеш.
+"""
+import gzip
+import logging
+import os
+import time
+from functools import partial
+from threading import Lock
+
+from requests_cache.backends import FileCache, SQLiteCache
+from requests_cache.serializers import (
+    SerializerPipeline, Stage, pickle_serializer
+)
+
+from constants import (
+    CACHE_BUSY_TIMEOUT, CACHE_NAME, GZIP_MAGIC, REDIS_URL, ZSTD_MAGIC
+)
+
+LRU_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS lru (key TEXT PRIMARY KEY, accessed REAL)'
+)
+
+
+# Сжатие тел записей кеша.
+def compressor(compression):
+    """Возвращает функцию сжатия gzip или zstd, для none — без сжатия."""
+    if compression == 'gzip':
+        return partial(gzip.compress, compresslevel=6)
+    if compression == 'zstd':
+        return partial(import_zstandard().compress, level=10)
+    return bytes
+
+
+# Распаковка записей с любым сжатием.
+def decompress(data):
+    """
+    Распаковывает data по сигнатуре gzip или zstd.
+
+    Записи без сигнатуры, сохранённые до включения сжатия,
+    отдаются как есть, поэтому старый кеш остаётся читаемым.
+    """
+    if data[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:len(ZSTD_MAGIC)] == ZSTD_MAGIC:
+        return import_zstandard().decompress(data)
+    return data
+
+
+# Необязательная зависимость zstandard.
+def import_zstandard():
+    """Импортирует zstandard или сообщает, как его установить."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            'Для сжатия zstd установите пакет zstandard: '
+            'pip install zstandard'
+        )
+    return zstandard
+
+
+# Сериализатор со сжатием.
+def make_serializer(compression):
+    """
+    Возвращает сериализатор pickle со сжатием compression.
+
+    Имя и число стадий совпадают со стандартным pickle_serializer:
+    requests_cache добавляет описание сериализатора в ключ записи,
+    и иначе смена сжатия обнуляла бы весь накопленный кеш.
+    """
+    base_stage, pickle_stage = pickle_serializer.stages
+    compress = compressor(compression)
+    return SerializerPipeline(
+        [
+            base_stage,
+            Stage(
+                dumps=lambda obj: compress(pickle_stage.dumps(obj)),
+                loads=lambda data: pickle_stage.loads(decompress(data)),
+            ),
+        ],
+        name=pickle_serializer.name,
+        is_binary=True,
+    )
+
+
+# Бэкенд кеша по имени.
+def make_backend(name, compression='gzip', redis_url=REDIS_URL):
+    """
+    Создаёт бэкенд requests_cache по имени из CACHE_BACKENDS.
+
+    Для redis нужен пакет redis и доступный сервер по адресу redis_url.
+    """
+    serializer = make_serializer(compression)
+    if name == 'sqlite':
+        return SQLiteCache(
+            CACHE_NAME, serializer=serializer, wal=True,
+            busy_timeout=CACHE_BUSY_TIMEOUT,
+        )
+    if name == 'filesystem':
+        return FileCache(f'{CACHE_NAME}_files', serializer=serializer)
+    if name == 'redis':
+        try:
+            from redis import Redis
+        except ImportError:
+            raise ImportError(
+                'Для кеша в Redis установите пакет redis: pip install redis'
+            )
+        from requests_cache.backends import RedisCache
+        return RedisCache(
+            CACHE_NAME, connection=Redis.from_url(redis_url),
+            serializer=serializer,
+        )
+    return 'memory'
+
+
+class CacheEviction:
+    """Запоминает обращения к кешу и ужимает его по принципу LRU."""
+
+    def __init__(self, session, max_size):
+        """Подключает хук учёта обращений к сессии session."""
+        self.session = session
+        self.max_size = max_size
+        self.accessed = {}
+        self.lock = Lock()
+        session.hooks['response'].append(self.track)
+
+    def track(self, response, *args, **kwargs):
+        """Хук ответа: запоминает время обращения к записи кеша."""
+        key = getattr(response, 'cache_key', None)
+        if key is None:
+            key = self.session.cache.create_key(response.request)
+        with self.lock:
+            self.accessed[key] = time.time()
+        return response
+
+    def run(self):
+        """Сохраняет время обращений и удаляет самые старые записи."""
+        cache = self.session.cache
+        entries = self.entries()
+        if entries is None:
+            return
+        victims = self.select_victims(entries)
+        if not victims:
+            return
+        cache.delete(*victims)
+        if isinstance(cache, SQLiteCache):
+            with cache.responses.connection(commit=True) as connection:
+                connection.executemany(
+                    'DELETE FROM lru WHERE key = ?',
+                    [(key,) for key in victims],
+                )
+            cache.responses.vacuum()
+        logging.info(
+            f'Из кеша удалено записей: {len(victims)}, '
+            f'лимит {self.max_size} байт'
+        )
+
+    def entries(self):
+        """
+        Возвращает пары (ключ, размер) от давно использованных к недавним.
+
+        Перед этим сохраняет время обращений в хранилище. Для бэкендов
+        без поддержки вытеснения возвращает None.
+        """
+        cache = self.session.cache
+        if isinstance(cache, SQLiteCache):
+            return self.sqlite_entries(cache)
+        if isinstance(cache, FileCache):
+            return self.file_entries(cache)
+        return None
+
+    def sqlite_entries(self, cache):
+        """Записи SQLite: время обращений хранится в таблице lru."""
+        responses = cache.responses
+        with responses.connection(commit=True) as connection:
+            connection.execute(LRU_SCHEMA)
+            connection.executemany(
+                'INSERT OR REPLACE INTO lru VALUES (?, ?)',
+                self.accessed.items(),
+            )
+            return connection.execute(
+                f'SELECT r.key, LENGTH(r.value) FROM {responses.table_name} r '
+                'LEFT JOIN lru l ON l.key = r.key '
+                'ORDER BY COALESCE(l.accessed, 0)'
+            ).fetchall()
+
+    def file_entries(self, cache):
+        """Записи файлового кеша: время обращения хранится в mtime."""
+        paths = {path.stem: path for path in cache.paths()}
+        for key, accessed in self.accessed.items():
+            if key in paths:
+                os.utime(paths[key], (accessed, accessed))
+        stats = {key: path.stat() for key, path in paths.items()}
+        return [
+            (key, stat.st_size) for key, stat in sorted(
+                stats.items(), key=lambda item: item[1].st_mtime
+            )
+        ]
+
+    def select_victims(self, entries):
+        """
+        Выбирает ключи для удаления.
+
+        entries — пары (ключ, размер) от давно использованных к недавним.
+        """
+        excess = sum(size or 0 for _, size in entries) - self.max_size
+        victims = []
+        for key, size in entries:
+            if excess <= 0:
+                break
+            victims.append(key)
+            excess -= size or 0
+        return victims
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
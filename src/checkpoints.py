@@ -0,0 +1,164 @@
+"""
+Журнал обработанных страниц для продолжения прерванного обхода.
+
+Если обход pep или whats-new обрывается на середине (сбой сети,
+Ctrl-C), всё, что режим успел собрать в памяти, теряется, и следующий
+запуск начинает обход заново. Поэтому crawl_pages() при запуске
+из командной строки ведёт журнал режима: файл JSON Lines
+в src/checkpoints/, куда дописывается строка с адресом и результатом
+извлечения для каждой обработанной страницы. Записи сбрасываются
+на диск (fsync) пачками по CHECKPOINT_BATCH и при закрытии журнала.
+
+С аргументом --resume журнал прошлого запуска читается заново:
+страницы из него не загружаются, а их результаты отдаются режиму
+в порядке ссылок вместе с результатами недостающих страниц.
+Страницы, которые не удалось загрузить, в журнал не попадают
+и загружаются при продолжении. Оборванная при сбое последняя строка
+журнала отбрасывается. Когда обход завершился целиком, журнал
+удаляется. Аргумент --no-checkpoint отключает журнал.
+"""
+import json
+import logging
+import os
+
+from constants import BASE_DIR, CHECKPOINT_BATCH, CHECKPOINTS_DIR
+
+
+# Списки JSON обратно в кортежи.
+def as_tuples(value):
+    """Рекурсивно заменяет списки кортежами, как в результатах извлечения."""
+    if isinstance(value, list):
+        return tuple(as_tuples(item) for item in value)
+    return value
+
+
+class CheckpointJournal:
+    """Журнал JSON Lines с результатами извлечения по адресам страниц."""
+
+    def __init__(self, path, extractor, resume=False,
+                 batch=CHECKPOINT_BATCH):
+        """
+        Открывает журнал path для функции извлечения extractor.
+
+        С resume записи прошлого запуска читаются в done и журнал
+        дописывается, иначе он начинается заново.
+        """
+        self.path = path
+        self.extractor = extractor
+        self.batch = batch
+        self.done = {}
+        self.pending = 0
+        path.parent.mkdir(exist_ok=True)
+        if resume and path.exists():
+            self.replay()
+            self.file = open(path, 'a', encoding='utf-8')
+        else:
+            self.file = open(path, 'w', encoding='utf-8')
+
+    def replay(self):
+        """
+        Читает записи журнала в done.
+
+        Всё, что идёт после последней целой строки, отрезается:
+        иначе новые записи склеились бы с оборванной.
+        """
+        valid = 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                valid += len(line)
+                if entry['extractor'] == self.extractor:
+                    self.done[entry['url']] = as_tuples(entry['result'])
+        os.truncate(self.path, valid)
+
+    def record(self, url, result):
+        """Дописывает результат страницы url, каждые batch — с fsync."""
+        entry = {'extractor': self.extractor, 'url': url, 'result': result}
+        self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.pending += 1
+        if self.pending >= self.batch:
+            self.sync()
+
+    def sync(self):
+        """Сбрасывает дописанные записи на диск."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self, completed):
+        """Закрывает журнал; после завершённого обхода удаляет его."""
+        self.sync()
+        self.file.close()
+        if completed:
+            self.path.unlink()
+        else:
+            logging.info(
+                f'Журнал обхода сохранён: {self.path}, '
+                'продолжить можно с --resume'
+            )
+
+
+# Журнал режима.
+def open_journal(cli_args, extract):
+    """
+    Возвращает журнал режима для функции extract или None.
+
+    Журнал ведётся, если в аргументах есть checkpoint (при запуске
+    из командной строки — если не указан --no-checkpoint).
+    Файл называется по режиму и функции извлечения.
+    """
+    if not getattr(cli_args, 'checkpoint', False):
+        return None
+    mode = getattr(cli_args, 'mode', None)
+    name = extract.__name__ if mode is None else f'{mode}.{extract.__name__}'
+    return CheckpointJournal(
+        BASE_DIR / CHECKPOINTS_DIR / f'{name}.jsonl',
+        f'{extract.__module__}.{extract.__qualname__}',
+        resume=getattr(cli_args, 'resume', False),
+    )
+
+
+# Обход с журналом.
+def journaled(journal, urls, crawl_missing):
+    """
+    Отдаёт результаты страниц urls по порядку, ведя журнал journal.
+
+    Результаты из журнала отдаются без загрузки, остальные адреса
+    передаются crawl_missing, а их результаты (кроме None)
+    дописываются в журнал. Если обход прервался, журнал остаётся.
+    Обход считается завершённым, когда отдан результат последней
+    страницы: режимы читают результаты через zip() и не возобновляют
+    генератор после последней ссылки.
+    """
+    missing = [url for url in urls if url not in journal.done]
+    if journal.done:
+        logging.info(
+            f'Из журнала взято страниц: {len(urls) - len(missing)}, '
+            f'осталось загрузить: {len(missing)}'
+        )
+    results = iter(crawl_missing(missing))
+    completed = False
+    try:
+        for number, url in enumerate(urls, 1):
+            if url in journal.done:
+                result = journal.done[url]
+            else:
+                result = next(results)
+                if result is not None:
+                    journal.record(url, result)
+            completed = number == len(urls)
+            yield result
+        completed = True
+    finally:
+        journal.close(completed)
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
@@ -1,9 +1,46 @@
-"""Парсер аргументов командной строки через argparse."""
+"""
+Парсер аргументов командной строки через argparse.
+
+Модуль импортируется при каждом запуске, даже с --help, поэтому
+requests_cache, requests и urllib3 импортируются только
+при создании сессии.
+"""
 import argparse
 import logging
+import os
 from logging.handlers import RotatingFileHandler
 
-from constants import BASE_DIR, CHOICES, DT_FORMAT, LOG_FORMAT
+from constants import (
+    ASYNC_CONCURRENCY, BACKOFF_FACTOR, BASE_DIR, CACHE_BACKEND, CACHE_BACKENDS,
+    CACHE_COMPRESSION, CACHE_COMPRESSIONS, CACHE_EXPIRE_AFTER, CACHE_MAX_SIZE,
+    CHOICES, DOWNLOAD_FORMATS, DT_FORMAT, ENGINE, ENGINES, FILE_COMPRESSIONS,
+    FILE_FORMAT, FILE_FORMATS, FORMAT_COMPRESSIONS, HOST_RATE, LEASE_TIMEOUT,
+    LOG_FORMAT, MEMO_MAX_SIZE, PARSE_CHUNK, PEP_SOURCE, PEP_SOURCES,
+    POOL_HOSTS, PROCESSES, REDIS_URL, RETRIES, RETRY_STATUSES,
+    URLS_EXPIRE_AFTER, WORKER_IDLE, WORKERS
+)
+
+
+class ArgumentParser(argparse.ArgumentParser):
+    """Парсер аргументов, проверяющий их несовместимые сочетания."""
+
+    def parse_known_args(self, args=None, namespace=None):
+        """
+        Разбирает аргументы и проверяет сочетание формата и сжатия.
+
+        Сжатие, которого не поддерживает --file-format (например,
+        gzip для arrow), отклоняется с сообщением об ошибке.
+        """
+        args, extras = super().parse_known_args(args, namespace)
+        file_format = getattr(args, 'file_format', None)
+        compression = getattr(args, 'file_compression', None)
+        if compression and compression not in FORMAT_COMPRESSIONS.get(
+            file_format, FILE_COMPRESSIONS
+        ):
+            self.error(
+                f'формат {file_format} не поддерживает сжатие {compression}'
+            )
+        return args, extras
 
 
 # Конфигурация аргументов командной строки.
@@ -17,9 +54,10 @@ def configure_argument_parser(available_modes):
     Сейчас данные для парсинга берутся с сервера только при первом
     запуске программы. Потом работа ведётся через кеш.
     """
-    parser = argparse.ArgumentParser(description='Парсер документации Python')
+    parser = ArgumentParser(description='Парсер документации Python')
     parser.add_argument(
         'mode',
+        nargs='+',
         choices=available_modes,
         help='Режимы работы парсера'
     )
@@ -35,9 +73,341 @@ def configure_argument_parser(available_modes):
         choices=CHOICES,
         help='Дополнительные способы вывода данных'
     )
+    parser.add_argument(
+        '--file-format',
+        choices=FILE_FORMATS,
+        default=FILE_FORMAT,
+        help='Формат файла результатов для -o file'
+    )
+    parser.add_argument(
+        '--file-compression',
+        choices=FILE_COMPRESSIONS,
+        help='Сжатие файла результатов для -o file'
+    )
+    parser.add_argument(
+        '-w',
+        '--workers',
+        type=int,
+        default=WORKERS,
+        help='Число одновременных загрузок страниц'
+    )
+    parser.add_argument(
+        '--processes',
+        type=process_count,
+        default=PROCESSES,
+        help='Число процессов для разбора страниц (auto — по числу ядер)'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=PARSE_CHUNK,
+        help='Число страниц в пачке для пула процессов'
+    )
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES.keys(),
+        default=ENGINE,
+        help='Движок извлечения данных из HTML'
+    )
+    parser.add_argument(
+        '--formats',
+        nargs='+',
+        choices=DOWNLOAD_FORMATS.keys(),
+        help='Форматы архивов для режима download'
+    )
+    parser.add_argument(
+        '--queue',
+        metavar='PATH|URL',
+        help='Обходить страницы через общую очередь заданий: файл SQLite '
+             'или адрес redis:// (режим worker выполняет задания)'
+    )
+    parser.add_argument(
+        '--lease-timeout',
+        type=float,
+        default=LEASE_TIMEOUT,
+        help='Срок аренды задания очереди, секунды'
+    )
+    parser.add_argument(
+        '--worker-idle',
+        type=float,
+        default=WORKER_IDLE,
+        help='Воркер завершается, если заданий нет столько секунд'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Продолжить прерванный обход по журналу прошлого запуска'
+    )
+    parser.add_argument(
+        '--no-checkpoint',
+        dest='checkpoint',
+        action='store_false',
+        help='Не вести журнал обработанных страниц'
+    )
+    parser.add_argument(
+        '--memo',
+        action='store_true',
+        help='Брать результаты разбора неизменившихся страниц из памятки'
+    )
+    parser.add_argument(
+        '--memo-max-size',
+        type=int,
+        default=MEMO_MAX_SIZE,
+        metavar='MB',
+        help='Предельный размер памятки в мегабайтах'
+    )
+    parser.add_argument(
+        '--pep-source',
+        choices=PEP_SOURCES,
+        default=PEP_SOURCE,
+        help='Источник статусов PEP: JSON-указатель или страницы PEP'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Загружать только изменившиеся страницы PEP (источник html)'
+    )
+    parser.add_argument(
+        '--expire-after',
+        type=int,
+        default=CACHE_EXPIRE_AFTER,
+        help='Срок жизни ответов в кеше, секунды (-1 — бессрочно)'
+    )
+    parser.add_argument(
+        '--expire-url',
+        action='append',
+        type=url_expiration,
+        metavar='PATTERN=SECONDS',
+        help='Срок жизни в кеше для адресов по шаблону'
+    )
+    parser.add_argument(
+        '--stale-while-revalidate',
+        action='store_true',
+        help='Отдавать устаревший ответ из кеша и обновлять его в фоне'
+    )
+    parser.add_argument(
+        '--cache-control',
+        action='store_true',
+        help='Учитывать заголовки Cache-Control и Expires сервера'
+    )
+    parser.add_argument(
+        '--cache-backend',
+        choices=CACHE_BACKENDS,
+        default=CACHE_BACKEND,
+        help='Хранилище кеша ответов'
+    )
+    parser.add_argument(
+        '--cache-compression',
+        choices=CACHE_COMPRESSIONS,
+        default=CACHE_COMPRESSION,
+        help='Сжатие ответов в кеше'
+    )
+    parser.add_argument(
+        '--cache-max-size',
+        type=int,
+        default=CACHE_MAX_SIZE,
+        metavar='MB',
+        help='Предельный размер кеша в мегабайтах (0 — без ограничения)'
+    )
+    parser.add_argument(
+        '--redis-url',
+        default=REDIS_URL,
+        help='Адрес Redis для --cache-backend redis'
+    )
+    parser.add_argument(
+        '--pool-size',
+        type=int,
+        help='Число соединений с одним хостом (по умолчанию — по --workers)'
+    )
+    parser.add_argument(
+        '--pool-hosts',
+        type=int,
+        default=POOL_HOSTS,
+        help='Число хостов, для которых хранятся пулы соединений'
+    )
+    parser.add_argument(
+        '--no-keep-alive',
+        dest='keep_alive',
+        action='store_false',
+        help='Закрывать соединение после каждого запроса'
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=RETRIES,
+        help='Число повторов запроса при сбоях, 429 и 5xx'
+    )
+    parser.add_argument(
+        '--backoff',
+        type=float,
+        default=BACKOFF_FACTOR,
+        help='Множитель экспоненциальной задержки между повторами, секунды'
+    )
+    parser.add_argument(
+        '--async',
+        dest='async_',
+        action='store_true',
+        help='Загружать страницы в цикле событий asyncio (нужен aiohttp)'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Разбирать страницы по мере загрузки и не дочитывать их'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=ASYNC_CONCURRENCY,
+        help='Число одновременных запросов в режиме --async'
+    )
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=HOST_RATE,
+        help='Запросов в секунду к одному хосту в режиме --async'
+    )
+    parser.add_argument(
+        '--snapshot',
+        metavar='ARCHIVE',
+        help='Записать все ответы, полученные режимом, в zip-архив'
+    )
+    parser.add_argument(
+        '--replay',
+        metavar='ARCHIVE',
+        help='Отвечать на запросы из архива --snapshot без сети и кеша'
+    )
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        help='Вывести в лог сводку замеров этапов'
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        help='Сохранить замеры этапов в JSON-файл'
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='FILE',
+        help='Запустить режим под cProfile и сохранить статистику в файл'
+    )
     return parser
 
 
+# Разбор аргумента --processes.
+def process_count(value):
+    """Преобразует число или auto (все ядра процессора) в число процессов."""
+    if value == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'Ожидается число процессов или auto, получено: {value}'
+        )
+
+
+# Разбор аргумента --expire-url.
+def url_expiration(value):
+    """Преобразует строку PATTERN=SECONDS в пару (шаблон, секунды)."""
+    pattern, separator, seconds = value.rpartition('=')
+    if not separator or not pattern:
+        raise argparse.ArgumentTypeError(
+            f'Ожидается PATTERN=SECONDS, получено: {value}'
+        )
+    try:
+        return pattern, int(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'Срок жизни должен быть целым числом секунд: {seconds}'
+        )
+
+
+# Конфигурация кеширующей сессии.
+def configure_session(cli_args=None):
+    """
+    Создаёт requests_cache.CachedSession с политикой кеширования.
+
+    Срок жизни ответов по умолчанию задаётся --expire-after,
+    для отдельных адресов действуют URLS_EXPIRE_AFTER и --expire-url:
+    указатель PEP устаревает быстро, страницы PEP живут долго,
+    архивы документации не кешируются вовсе.
+    Устаревший ответ с ETag или Last-Modified не загружается заново:
+    сессия отправляет условный запрос и при ответе 304 продлевает
+    срок жизни сохранённой копии. С --stale-while-revalidate
+    устаревшая копия отдаётся сразу, а проверка идёт в фоне.
+    Хранилище и сжатие кеша выбираются аргументами --cache-backend
+    и --cache-compression (см. caches.py), пул соединений и повторы
+    запросов настраивает configure_adapter().
+    С --replay ответы берутся из архива снимка (см. snapshots.py),
+    а кеш держится только в памяти, чтобы результат зависел
+    лишь от снимка.
+    """
+    import requests_cache
+
+    from caches import make_backend
+    from snapshots import ReplayAdapter, SnapshotArchive
+
+    replay = getattr(cli_args, 'replay', None)
+    urls_expire_after = dict(getattr(cli_args, 'expire_url', None) or ())
+    for pattern, expire_after in URLS_EXPIRE_AFTER.items():
+        urls_expire_after.setdefault(pattern, expire_after)
+    cache_backend = getattr(cli_args, 'cache_backend', CACHE_BACKEND)
+    backend = make_backend(
+        'memory' if replay else cache_backend,
+        compression=getattr(cli_args, 'cache_compression', CACHE_COMPRESSION),
+        redis_url=getattr(cli_args, 'redis_url', REDIS_URL),
+    )
+    session = requests_cache.CachedSession(
+        backend=backend,
+        expire_after=getattr(cli_args, 'expire_after', CACHE_EXPIRE_AFTER),
+        urls_expire_after=urls_expire_after,
+        stale_while_revalidate=getattr(
+            cli_args, 'stale_while_revalidate', False
+        ),
+        cache_control=getattr(cli_args, 'cache_control', False),
+    )
+    if replay:
+        adapter = ReplayAdapter(SnapshotArchive(replay))
+    else:
+        adapter = configure_adapter(cli_args)
+    for protocol in ('http://', 'https://'):
+        session.mount(protocol, adapter)
+    if not getattr(cli_args, 'keep_alive', True):
+        session.headers['Connection'] = 'close'
+    return session
+
+
+# Пул соединений и повторы запросов.
+def configure_adapter(cli_args=None):
+    """
+    Создаёт HTTPAdapter с пулом соединений и повторами запросов.
+
+    Стандартный пул requests хранит 10 соединений с хостом, и при
+    большем числе потоков лишние соединения закрываются, а TLS
+    рукопожатие повторяется. Поэтому пул по умолчанию не меньше
+    числа потоков --workers.
+    Сбои соединения и ответы 429 и 5xx повторяются до --retries раз
+    с экспоненциальной задержкой --backoff * 2 ** (номер повтора - 1),
+    а заголовок Retry-After сервера имеет приоритет.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    workers = getattr(cli_args, 'workers', WORKERS)
+    retries = Retry(
+        total=getattr(cli_args, 'retries', RETRIES),
+        backoff_factor=getattr(cli_args, 'backoff', BACKOFF_FACTOR),
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+    )
+    return HTTPAdapter(
+        pool_connections=getattr(cli_args, 'pool_hosts', POOL_HOSTS),
+        pool_maxsize=getattr(cli_args, 'pool_size', None) or workers,
+        max_retries=retries,
+    )
+
+
 #  Конфигурация логов.
 def configure_logging():
     """
@@ -18,11 +18,171 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent
 MAIN_DOC_URL = 'https://docs.python.org/3/'
 PEP_URL = 'https://peps.python.org/'
+PEP_JSON_URL = PEP_URL + 'api/peps.json'
 
 DATETIME_FORMAT = '%Y-%m-%d_%H-%M-%S'
 DT_FORMAT = '%d.%m.%Y %H:%M:%S'
 LOG_FORMAT = '"%(asctime)s - [%(levelname)s] - %(message)s"'
 CHOICES = ('pretty', 'file')
+# Режим, который запускает все режимы парсера.
+ALL_MODES = 'all'
+# Форматы файла результатов (-o file) и их сжатие.
+FILE_FORMATS = ('csv', 'jsonl', 'parquet', 'arrow')
+FILE_FORMAT = 'csv'
+FILE_COMPRESSIONS = ('gzip', 'zstd')
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+# Форматы, которые поддерживают не все виды сжатия.
+FORMAT_COMPRESSIONS = {'arrow': ('zstd',)}
+# Число строк в пачке (row group) для Parquet и Arrow.
+FILE_BATCH = 64 * 1024
+# Типы столбцов результатов, остальные столбцы — строки.
+COLUMN_TYPES = {'Количество': int, 'Номер': int}
+WORKERS = 20
+PROCESSES = 0
+# Число страниц в пачке для пула процессов-парсеров.
+PARSE_CHUNK = 16
+CHUNK_SIZE = 64 * 1024
+# Потоковый разбор (--stream): модуль потоковых функций извлечения
+# и размер куска страницы, байты. Нужные элементы обычно в первом куске.
+STREAM_EXTRACTORS = 'stream_extractors'
+STREAM_CHUNK = 8 * 1024
+# Пул соединений и повторы запросов: число пулов по хостам,
+# число повторов, множитель экспоненциальной задержки (секунды)
+# и коды ответов, после которых запрос повторяется.
+POOL_HOSTS = 10
+RETRIES = 5
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Режим --async: число запросов в полёте и запросов в секунду
+# к одному хосту (0 — без ограничения).
+ASYNC_CONCURRENCY = 100
+HOST_RATE = 0
+# Число самых медленных страниц в сводке замеров.
+TRACE_SLOWEST = 10
+# С этим заголовком CachedSession не читает и не пишет ответ в кеш.
+NO_STORE = {'Cache-Control': 'no-store'}
+PEP_STATE_FILE = 'pep_state.sqlite3'
+# Памятка результатов извлечения (--memo) и её лимит, мегабайты.
+MEMO_FILE = 'extract_memo.sqlite3'
+MEMO_MAX_SIZE = 16
+# Версия памятки: увеличьте, чтобы сбросить все записи.
+MEMO_VERSION = 1
+# Зависимости функций извлечения, входящие в их версию в памятке:
+# ключ PARSE_TARGETS и вызываемые вспомогательные функции.
+# Добавляя функцию извлечения или помощник, допишите их сюда.
+SOUP_HELPERS = ('utils.make_soup', 'utils.find_tag')
+LXML_HELPERS = (
+    'lxml_extractors.parse_document', 'utils.find_node', 'utils.node_path',
+)
+MEMO_DEPENDENCIES = {
+    'extractors.whats_new_index': ('whats-new-index', SOUP_HELPERS),
+    'extractors.whats_new_page': ('whats-new-page', SOUP_HELPERS),
+    'extractors.latest_versions_links': ('latest-versions', SOUP_HELPERS),
+    'extractors.archive_links': ('download', SOUP_HELPERS),
+    'extractors.pep_index': ('pep-index', SOUP_HELPERS),
+    'extractors.pep_status': ('pep-page', SOUP_HELPERS),
+    'extractors.pep_card': ('pep-page', SOUP_HELPERS),
+    'lxml_extractors.whats_new_index': (None, LXML_HELPERS),
+    'lxml_extractors.whats_new_page': (None, LXML_HELPERS),
+    'lxml_extractors.latest_versions_links': (None, LXML_HELPERS),
+    'lxml_extractors.archive_links': (None, LXML_HELPERS),
+    'lxml_extractors.pep_index': (None, LXML_HELPERS),
+    'lxml_extractors.pep_status': (
+        None, (*LXML_HELPERS, 'lxml_extractors._single_string'),
+    ),
+    'lxml_extractors.pep_card': (None, LXML_HELPERS),
+}
+# Журналы прерванных обходов (--resume) и число записей между fsync.
+CHECKPOINTS_DIR = 'checkpoints'
+CHECKPOINT_BATCH = 32
+# Общая очередь заданий (--queue): псевдорежим воркера, имя ключей
+# в Redis, аренда задания и простой воркера, секунды, пауза опроса
+# и число очередных результатов, запрашиваемых за один опрос.
+WORKER_MODE = 'worker'
+QUEUE_NAME = 'bs4_parser_queue'
+LEASE_TIMEOUT = 60
+WORKER_IDLE = 30
+QUEUE_POLL = 0.2
+QUEUE_WINDOW = 256
+# Снимки страниц (--snapshot, --replay): индекс архива и заголовки,
+# которые не сохраняются, — тело в снимке уже распаковано.
+SNAPSHOT_INDEX = 'index.json'
+SNAPSHOT_DROP_HEADERS = (
+    'content-encoding', 'content-length', 'transfer-encoding',
+)
+# Срок жизни ответов в кеше, секунды. -1 — хранить бессрочно.
+CACHE_EXPIRE_AFTER = 24 * 60 * 60
+# Бэкенды кеша ответов, сжатие и лимит размера кеша, мегабайты.
+CACHE_NAME = 'http_cache'
+CACHE_BACKENDS = ('sqlite', 'filesystem', 'memory', 'redis')
+CACHE_BACKEND = 'sqlite'
+CACHE_COMPRESSIONS = ('gzip', 'zstd', 'none')
+CACHE_COMPRESSION = 'gzip'
+CACHE_MAX_SIZE = 512
+CACHE_BUSY_TIMEOUT = 30 * 1000
+REDIS_URL = 'redis://localhost:6379/0'
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# Значение requests_cache.DO_NOT_CACHE: ответ не сохраняется в кеш.
+# Повторено здесь, чтобы запуск не импортировал requests_cache.
+DO_NOT_CACHE = 0x0D0E0200020704
+# Сроки для отдельных адресов: первый подходящий шаблон побеждает.
+URLS_EXPIRE_AFTER = {
+    'docs.python.org/3/archives/': DO_NOT_CACHE,
+    'peps.python.org/pep-': 7 * 24 * 60 * 60,
+    'peps.python.org/': 60 * 60,
+}
+# Движки извлечения данных: имя движка и модуль с функциями извлечения.
+ENGINES = {
+    'bs4': 'extractors',
+    'lxml': 'lxml_extractors',
+}
+ENGINE = 'bs4'
+# Источники статусов для режима pep: JSON-указатель api/peps.json
+# (один запрос) или таблица numerical-index и страницы всех PEP.
+PEP_SOURCES = ('json', 'html')
+PEP_SOURCE = 'json'
+# Форматы архивов документации: имя формата и шаблон ссылки.
+DOWNLOAD_FORMATS = {
+    'pdf-a4': r'.+pdf-a4\.zip$',
+    'pdf-a4-tar': r'.+pdf-a4\.tar\.bz2$',
+    'pdf-letter': r'.+pdf-letter\.zip$',
+    'pdf-letter-tar': r'.+pdf-letter\.tar\.bz2$',
+    'html': r'.+html\.zip$',
+    'html-tar': r'.+html\.tar\.bz2$',
+    'text': r'.+text\.zip$',
+    'text-tar': r'.+text\.tar\.bz2$',
+    'texinfo': r'.+texinfo\.zip$',
+    'texinfo-tar': r'.+texinfo\.tar\.bz2$',
+    'epub': r'.+\.epub$',
+}
+# Поддеревья страниц, которые нужны каждому парсеру: тег и атрибуты.
+PARSE_TARGETS = {
+    'whats-new-index': ('section', {'id': 'what-s-new-in-python'}),
+    'whats-new-page': (('h1', 'dl'), {}),
+    'latest-versions': ('div', {'class': 'sphinxsidebarwrapper'}),
+    'download': ('div', {'role': 'main'}),
+    'pep-index': ('section', {'id': 'numerical-index'}),
+    'pep-page': ('dl', {'class': 'rfc2822 field-list simple'}),
+}
+# Поля карточки rfc2822 страницы PEP и атрибуты PepRecord для них.
+PEP_FIELDS = {
+    'Author': 'author',
+    'Sponsor': 'sponsor',
+    'PEP-Delegate': 'pep_delegate',
+    'BDFL-Delegate': 'bdfl_delegate',
+    'Discussions-To': 'discussions_to',
+    'Status': 'status',
+    'Type': 'pep_type',
+    'Topic': 'topic',
+    'Requires': 'requires',
+    'Created': 'created',
+    'Python-Version': 'python_version',
+    'Post-History': 'post_history',
+    'Replaces': 'replaces',
+    'Superseded-By': 'superseded_by',
+    'Resolution': 'resolution',
+}
 EXPECTED_STATUS = {
     'A': ('Active', 'Accepted'),
     'D': ('Deferred',),
@@ -0,0 +1,371 @@
+"""
+Конкурентная загрузка и разбор страниц.
+
+Парсер pep открывает сотни страниц по одной, и цикл упирается
+в задержку сети, а не в пропускную способность канала.
+Поэтому страницы загружаются пулом потоков с ограниченным числом
+воркеров, а ответы отдаются строго в порядке исходных ссылок —
+так таблица результатов не зависит от того, какая страница пришла первой.
+
+Разбор страниц упирается в процессор и GIL, поэтому загрузку и разбор
+можно развести по конвейеру: скачанные страницы пачками уходят в пул
+процессов-парсеров и разбираются, пока остальные ещё загружаются.
+
+С аргументом --async страницы загружает цикл событий asyncio
+(см. async_crawlers.py), режимы выбирают способ загрузки через
+get_page() и crawl_pages().
+
+С аргументом --stream страницы, для извлечения из которых есть
+потоковая функция (см. stream_extractors.py), загружаются кусками
+и разбираются по мере загрузки, а соединение закрывается, как только
+нужные элементы найдены.
+
+Обход crawl_pages() ведёт журнал обработанных страниц, по которому
+прерванный обход можно продолжить (см. checkpoints.py).
+С аргументом --queue страницы обходят воркеры общей очереди
+(см. work_queues.py).
+"""
+import logging
+from collections import deque
+from concurrent.futures import (
+    Future, ProcessPoolExecutor, ThreadPoolExecutor
+)
+from functools import partial
+from importlib import import_module
+from itertools import islice
+from threading import Lock
+
+from checkpoints import journaled, open_journal
+from constants import (
+    NO_STORE, PARSE_CHUNK, PROCESSES, STREAM_CHUNK, STREAM_EXTRACTORS, WORKERS
+)
+from memo import MISS, memo_extract, memo_lookup, memo_save
+from tracing import current_url, span
+from utils import get_response
+
+
+# Загрузка страниц пулом потоков.
+def fetch_all(session, urls, workers, desc='Загрузка страниц',
+              fetch=get_response):
+    """
+    Загружает страницы конкурентно и отдаёт ответы в порядке ссылок.
+
+    Страницу загружает fetch(session, url), по умолчанию get_response().
+
+    Одновременно выполняется не больше workers запросов, а вперёд
+    загружается не больше 2 * workers страниц: пока потребитель
+    разбирает ответы, новые загрузки не ставятся в очередь, и память
+    не растёт с числом ссылок.
+    Общая сессия requests_cache.CachedSession может использоваться
+    из нескольких потоков: SQLite-бэкенд держит отдельное соединение
+    на каждый поток.
+    """
+    from tqdm import tqdm
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, tqdm(
+        total=len(urls), desc=desc
+    ) as progress:
+        pending = deque()
+        for url in urls:
+            pending.append(executor.submit(fetch, session, url))
+            if len(pending) >= 2 * workers:
+                progress.update()
+                yield pending.popleft().result()
+        while pending:
+            progress.update()
+            yield pending.popleft().result()
+
+
+# Разбиение на пачки.
+def batched(iterable, size):
+    """Отдаёт элементы iterable списками по size штук."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# Разбор пачки страниц в процессе-парсере.
+def extract_batch(extract, pages):
+    """
+    Применяет extract к телам страниц pages, None пропускает.
+
+    Выполняется в пуле процессов: туда уходят только байты страниц,
+    обратно — кортежи строк, деревья разбора остаются в процессе.
+    """
+    return [None if page is None else extract(page) for page in pages]
+
+
+# Конвейер: загрузка пулом потоков, разбор пулом процессов.
+def crawl(session, urls, extract, workers, processes=0,
+          desc='Выполнение цикла парсинга', chunk_size=PARSE_CHUNK):
+    """
+    Загружает страницы и применяет к ним функцию извлечения extract.
+
+    extract должна быть функцией уровня модуля (см. extractors.py):
+    она получает тело страницы в байтах и возвращает кортеж строк.
+    При processes=0 страницы разбираются в основном процессе по мере
+    загрузки. Иначе загруженные страницы пачками по chunk_size
+    уходят в пул из processes процессов, пока загрузка продолжается.
+    Пачка экономит на пересылке между процессами, а в очереди пула
+    держится не больше 2 * processes пачек.
+    Результаты отдаются в порядке исходных ссылок. Вместо страниц,
+    которые не удалось загрузить и после повторов, отдаётся None:
+    ошибка уже записана в лог, а обход продолжается.
+    С --memo результаты неизменившихся страниц берутся из памятки
+    (см. memo.py), в пул процессов уходят только остальные страницы.
+    """
+    responses = fetch_all(session, urls, workers, desc=desc)
+    if not processes:
+        for url, response in zip(urls, responses):
+            current_url.set(url)
+            yield None if response is None else memo_extract(
+                url, response.content, extract
+            )
+        return
+    with ProcessPoolExecutor(max_workers=processes) as parsers:
+        pending = deque()
+        for batch in batched(zip(urls, responses), chunk_size):
+            pending.append(submit_batch(parsers, extract, batch))
+            if len(pending) >= 2 * processes:
+                yield from merge_batch(*pending.popleft())
+        while pending:
+            yield from merge_batch(*pending.popleft())
+
+
+# Отправка пачки страниц в пул процессов.
+def submit_batch(parsers, extract, batch):
+    """
+    Отправляет в пул parsers страницы пачки batch, которых нет в памятке.
+
+    batch — пары (ссылка, ответ). Возвращает ключи памятки, найденные
+    в ней результаты (MISS для остальных) и Future с результатами пула.
+    """
+    keys, found = zip(*(
+        (None, MISS) if response is None
+        else memo_lookup(url, response.content, extract)
+        for url, response in batch
+    ))
+    pages = [
+        response.content
+        if response is not None and result is MISS else None
+        for (_, response), result in zip(batch, found)
+    ]
+    return keys, found, parsers.submit(extract_batch, extract, pages)
+
+
+# Результаты пачки из пула процессов и памятки.
+def merge_batch(keys, found, future):
+    """Отдаёт результаты пачки в порядке ссылок и пополняет памятку."""
+    for key, result, parsed in zip(keys, found, future.result()):
+        if result is not MISS:
+            yield result
+            continue
+        memo_save(key, parsed)
+        yield parsed
+
+
+# Потоковая загрузка и разбор одной страницы.
+def stream_extract(session, url, extract, chunk_size=STREAM_CHUNK):
+    """
+    Загружает страницу кусками по chunk_size байт и применяет к ним extract.
+
+    extract — потоковая функция из stream_extractors.py. Страница,
+    которая уже есть в кеше, нарезается на куски из сохранённого тела.
+    Иначе запрос идёт мимо кеша (NO_STORE) с stream=True: extract
+    читает куски, пока не найдёт нужные элементы, затем соединение
+    закрывается, и остаток страницы не загружается. Недочитанная
+    страница не может попасть в кеш, поэтому такие ответы не кешируются.
+    Загрузка и разбор перемежаются, так что в замерах этап fetch
+    включает и разбор. Ошибки загрузки пишутся в лог, как в get_response(),
+    а вместо результата отдаётся None.
+    """
+    from requests import RequestException
+
+    if session.cache.contains(url=url):
+        response = get_response(session, url)
+        if response is None:
+            return None
+        content = response.content
+        current_url.set(url)
+        return extract(
+            content[start:start + chunk_size]
+            for start in range(0, len(content), chunk_size)
+        )
+    current_url.set(url)
+    received = 0
+
+    def chunks(response):
+        nonlocal received
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            received += len(chunk)
+            yield chunk
+
+    try:
+        with span('fetch', url=url) as fields:
+            with session.get(url, headers=NO_STORE, stream=True) as response:
+                result = extract(chunks(response))
+            fields.update(
+                status=response.status_code,
+                from_cache=False,
+                bytes=received,
+                latency=response.elapsed.total_seconds(),
+            )
+    except RequestException:
+        logging.exception(
+            f'Возникла ошибка при загрузке страницы {url}',
+            stack_info=True
+        )
+        return None
+    return result
+
+
+# Потоковый обход страниц.
+def stream_crawl(session, urls, extract, workers,
+                 desc='Выполнение цикла парсинга'):
+    """
+    Применяет потоковую extract к страницам urls пулом потоков.
+
+    Каждый поток загружает и разбирает свою страницу (stream_extract),
+    результаты отдаются в порядке ссылок, вместо страниц, которые
+    не удалось загрузить, — None.
+    """
+    yield from fetch_all(
+        session, urls, workers, desc=desc,
+        fetch=partial(stream_extract, extract=extract),
+    )
+
+
+class SharedFetches:
+    """
+    Объединяет одинаковые запросы, выполняющиеся одновременно.
+
+    Когда несколько режимов работают параллельно на одной сессии,
+    они одновременно запрашивают одни и те же страницы (MAIN_DOC_URL,
+    указатель и страницы PEP) и промахиваются мимо кеша, пока первый
+    запрос ещё не сохранён. Обёртка над session.send отправляет
+    только первый запрос с данным ключом кеша, остальные ждут его
+    и получают тот же ответ. Потоковые запросы и запросы кроме GET
+    проходят как есть. Загрузки с --async идут мимо session.send
+    и не объединяются.
+    """
+
+    def __init__(self, session):
+        """Подменяет send сессии session."""
+        self.session = session
+        self.send = session.send
+        self.pending = {}
+        self.lock = Lock()
+        session.send = self.shared_send
+
+    def shared_send(self, request, **kwargs):
+        """Отправляет запрос или дожидается такого же запроса в полёте."""
+        if request.method != 'GET' or kwargs.get('stream'):
+            return self.send(request, **kwargs)
+        key = self.session.cache.create_key(request)
+        with self.lock:
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                future = self.pending[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            response = self.send(request, **kwargs)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self.lock:
+                del self.pending[key]
+
+
+# Выбор асинхронной загрузки.
+def use_async(cli_args=None):
+    """
+    Проверяет, нужно ли загружать страницы в цикле событий.
+
+    aiohttp ходит в сеть мимо транспортных адаптеров сессии,
+    поэтому при воспроизведении снимка (--replay) загрузка синхронная.
+    """
+    return bool(
+        getattr(cli_args, 'async_', False)
+        and not getattr(cli_args, 'replay', None)
+    )
+
+
+# Загрузка одной страницы выбранным способом.
+def get_page(session, url, cli_args=None, **kwargs):
+    """Загружает страницу синхронно или, с --async, в цикле событий."""
+    if use_async(cli_args):
+        from async_crawlers import async_get_response
+        return async_get_response(session, url, cli_args, **kwargs)
+    return get_response(session, url, **kwargs)
+
+
+# Обход страниц выбранным способом.
+def crawl_pages(session, urls, extract, cli_args=None,
+                desc='Выполнение цикла парсинга'):
+    """
+    Применяет extract к страницам urls, результаты — в порядке ссылок.
+
+    С --async страницы загружаются в цикле событий, иначе — crawl()
+    с пулом потоков --workers и пулом процессов --processes.
+    С --stream, если для extract есть потоковая функция с тем же
+    именем в stream_extractors.py, страницы загружаются и разбираются
+    кусками в потоках --workers (stream_crawl), пул процессов
+    при этом не нужен. --async важнее --stream.
+    Обработанные страницы записываются в журнал режима, а с --resume
+    загружаются только страницы, которых нет в журнале
+    (см. checkpoints.py).
+    """
+    journal = open_journal(cli_args, extract)
+    if journal is None:
+        return crawl_backend(session, urls, extract, cli_args, desc)
+    return journaled(
+        journal, urls,
+        partial(
+            crawl_backend, session,
+            extract=extract, cli_args=cli_args, desc=desc,
+        ),
+    )
+
+
+# Обход страниц без журнала.
+def crawl_backend(session, urls, extract, cli_args, desc):
+    """
+    Применяет extract к страницам urls способом из cli_args.
+
+    С --queue страницы обходятся через общую очередь заданий
+    (см. work_queues.py).
+    """
+    if getattr(cli_args, 'queue', None):
+        from work_queues import queue_crawl
+        return queue_crawl(session, urls, extract, cli_args, desc=desc)
+    if use_async(cli_args):
+        from async_crawlers import async_crawl
+        return async_crawl(session, urls, extract, cli_args, desc=desc)
+    if getattr(cli_args, 'stream', False):
+        stream_extract = getattr(
+            import_module(STREAM_EXTRACTORS), extract.__name__, None
+        )
+        if stream_extract is not None:
+            return stream_crawl(
+                session, urls, stream_extract,
+                workers=getattr(cli_args, 'workers', WORKERS), desc=desc,
+            )
+    return crawl(
+        session, urls, extract,
+        workers=getattr(cli_args, 'workers', WORKERS),
+        processes=getattr(cli_args, 'processes', PROCESSES),
+        desc=desc,
+        chunk_size=getattr(cli_args, 'chunk_size', PARSE_CHUNK),
+    )
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
@@ -0,0 +1,178 @@
+"""
+Потоковая загрузка архивов документации.
+
+Архив с документацией весит десятки мегабайт, поэтому он не читается
+в память целиком и не проходит через кеш requests_cache.
+Файл пишется частями во временный файл <имя>.part и по окончании
+атомарно переименовывается. Прерванная загрузка продолжается с места
+обрыва HTTP-запросом с заголовком Range, а уже скачанный файл с тем же
+размером и ETag повторно не загружается. ETag загруженного файла
+хранится рядом с ним в <имя>.etag и записывается только после
+переименования, а ETag недокачанного <имя>.part — отдельно,
+в <имя>.part.etag. Так неудачная загрузка новой версии архива
+не выдаёт старый файл за актуальный.
+
+Несколько архивов загружаются параллельно пулом потоков
+с ограниченным числом соединений.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import CHUNK_SIZE, NO_STORE
+
+
+# Чтение сохранённого ETag.
+def read_etag(etag_path):
+    """Возвращает ETag из файла рядом с архивом или None."""
+    if etag_path.exists():
+        return etag_path.read_text(encoding='utf-8').strip() or None
+    return None
+
+
+# Запись ETag рядом с файлом.
+def write_etag(etag_path, etag):
+    """Сохраняет etag в файл etag_path, для None удаляет файл."""
+    if etag is None:
+        etag_path.unlink(missing_ok=True)
+    else:
+        etag_path.write_text(etag, encoding='utf-8')
+
+
+# Переименование загруженного файла.
+def finish_download(part_path, path, etag):
+    """Переименовывает part_path в path и переносит ETag к файлу."""
+    os.replace(part_path, path)
+    write_etag(path.with_name(path.name + '.etag'), etag)
+    part_path.with_name(part_path.name + '.etag').unlink(missing_ok=True)
+
+
+# Потоковая загрузка файла с перехватом ошибок.
+def download_file(session, url, path, position=None):
+    """
+    Загружает url в файл path, см. stream_to_file().
+
+    Возвращает число байт, загруженных за этот вызов. Ошибки загрузки
+    (RequestException) пишутся в лог, как в get_response(), и вместо
+    числа байт возвращается None. Недокачанный <имя>.part остаётся,
+    и следующий запуск продолжит загрузку с места обрыва.
+    """
+    from requests import RequestException
+
+    try:
+        return stream_to_file(session, url, path, position)
+    except RequestException:
+        logging.exception(
+            f'Возникла ошибка при загрузке архива {url}',
+            stack_info=True
+        )
+        return None
+
+
+# Потоковая загрузка файла с докачкой.
+def stream_to_file(session, url, path, position=None):
+    """
+    Загружает url в файл path частями по CHUNK_SIZE байт.
+
+    Сначала HEAD-запросом узнаёт размер и ETag. Если файл path уже
+    есть и совпадает с ними, загрузка пропускается. Иначе докачивает
+    <имя>.part, если его ETag из <имя>.part.etag совпадает с текущим,
+    или начинает заново. position — номер строки полосы прогресса
+    при параллельной загрузке.
+    Возвращает число байт, загруженных за этот вызов.
+    """
+    from tqdm import tqdm
+
+    part_path = path.with_name(path.name + '.part')
+    etag_path = path.with_name(path.name + '.etag')
+    part_etag_path = part_path.with_name(part_path.name + '.etag')
+    head = session.head(url, allow_redirects=True, headers=NO_STORE)
+    head_headers = head.headers if head.ok else {}
+    total = int(head_headers.get('Content-Length', 0)) or None
+    etag = head_headers.get('ETag')
+
+    if (
+        path.exists() and total == path.stat().st_size
+        and (etag is None or etag == read_etag(etag_path))
+    ):
+        logging.info(f'Архив уже загружен, пропускаем: {path}')
+        return 0
+
+    offset = 0
+    if part_path.exists() and etag is not None and (
+        etag == read_etag(part_etag_path)
+    ):
+        offset = part_path.stat().st_size
+    headers = dict(NO_STORE)
+    if offset:
+        headers.update({'Range': f'bytes={offset}-', 'If-Range': etag})
+    write_etag(part_etag_path, etag)
+
+    with session.get(url, headers=headers, stream=True) as response:
+        if response.status_code == 416 and offset == total:
+            finish_download(part_path, path, etag)
+            return 0
+        response.raise_for_status()
+        if response.status_code != 206:
+            offset = 0
+        mode = 'ab' if offset else 'wb'
+        with open(part_path, mode) as file, tqdm(
+            total=total, initial=offset, unit='B', unit_scale=True,
+            unit_divisor=1024, desc=path.name, position=position,
+        ) as progress:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                file.write(chunk)
+                progress.update(len(chunk))
+            file.flush()
+            os.fsync(file.fileno())
+            downloaded = progress.n - offset
+    finish_download(part_path, path, etag)
+    return downloaded
+
+
+# Параллельная загрузка нескольких архивов.
+def download_all(session, urls, downloads_dir, workers):
+    """
+    Загружает архивы urls в downloads_dir не более чем в workers потоков.
+
+    Возвращает таблицу: имя архива, размер файла, загружено байт,
+    длительность, скорость загрузки и итог в порядке исходных ссылок.
+    Сбой одного архива не прерывает остальные загрузки: ошибка
+    пишется в лог, а в таблицу попадает строка с описанием ошибки.
+    """
+    def fetch(position, url):
+        path = downloads_dir / url.split('/')[-1]
+        start = time.perf_counter()
+        try:
+            downloaded = download_file(session, url, path, position=position)
+        except Exception as error:
+            logging.exception(
+                f'Не удалось сохранить архив {path}', stack_info=True
+            )
+            downloaded, status = None, f'Ошибка: {error}'
+        else:
+            status = 'Ошибка загрузки' if downloaded is None else 'Загружен'
+        duration = time.perf_counter() - start
+        if downloaded is None:
+            return (path.name, '', '', f'{duration:.2f}', '', status)
+        logging.info(f'Архив был загружен и сохранён: {path}')
+        throughput = downloaded / duration / 2 ** 20 if duration else 0
+        return (
+            path.name, path.stat().st_size, downloaded,
+            f'{duration:.2f}', f'{throughput:.2f}', status
+        )
+
+    results = [(
+        'Архив', 'Размер, байт', 'Загружено, байт', 'Время, с',
+        'Скорость, МиБ/с', 'Итог'
+    )]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results.extend(executor.map(fetch, range(len(urls)), urls))
+    return results
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
@@ -0,0 +1,135 @@
+"""
+Извлечение данных из HTML-страниц: эталонный движок на BeautifulSoup.
+
+Функции модуля принимают текст страницы и возвращают простые кортежи
+со строками. Они не зависят от сессии и объявлены на уровне модуля,
+поэтому их можно передавать в пул процессов: по границе процессов
+путешествуют только строки, а дерево BeautifulSoup живёт и умирает
+внутри процесса-парсера.
+
+Модуль lxml_extractors.py повторяет те же функции на чистом lxml.
+Набор имён и результаты у движков должны совпадать, это проверяют
+тесты tests/test_extractors.py.
+"""
+import logging
+
+from exceptions import ParserFindAllVersionException
+from utils import find_tag, make_soup
+
+
+# Ссылки на статьи о нововведениях из оглавления.
+def whats_new_index(text):
+    """Возвращает ссылки href на статьи «What's New» в порядке оглавления."""
+    soup = make_soup(text, 'whats-new-index')
+    main_div = find_tag(soup, 'section', attrs={'id': 'what-s-new-in-python'})
+    div_with_ul = find_tag(main_div, 'div', attrs={'class': 'toctree-wrapper'})
+    sections_by_python = div_with_ul.find_all(
+        'li', attrs={'class': 'toctree-l1'}
+    )
+    return tuple(
+        str(find_tag(section, 'a')['href']) for section in sections_by_python
+    )
+
+
+# Заголовок и авторы статьи о нововведениях.
+def whats_new_page(text):
+    """
+    Разбирает страницу статьи «What's New».
+
+    Возвращает текст первого заголовка h1 и текст первого списка dl
+    с редакторами и авторами, переводы строк в нём заменены пробелами.
+    """
+    soup = make_soup(text, 'whats-new-page')
+    h1 = find_tag(soup, 'h1')
+    dl = find_tag(soup, 'dl')
+    return h1.text, dl.text.replace('\n', ' ')
+
+
+# Ссылки на документацию всех версий Python.
+def latest_versions_links(text):
+    """
+    Возвращает пары (href, текст ссылки) из списка версий в боковой панели.
+
+    Нужен список, в котором есть фраза All versions. Если такого
+    списка нет, вызывается ParserFindAllVersionException.
+    """
+    soup = make_soup(text, 'latest-versions')
+    sidebar = find_tag(soup, 'div', attrs={'class': 'sphinxsidebarwrapper'})
+    for ul in sidebar.find_all('ul'):
+        if 'All versions' in ul.text:
+            return tuple(
+                (str(a_tag['href']), a_tag.text) for a_tag in ul.find_all('a')
+            )
+    error_msg = 'Список последних версий Python не найден'
+    logging.error(error_msg, exc_info=True, stack_info=True)
+    raise ParserFindAllVersionException(error_msg)
+
+
+# Ссылки на архивы документации.
+def archive_links(text):
+    """Возвращает все ссылки href из таблицы архивов на странице загрузки."""
+    soup = make_soup(text, 'download')
+    main_tag = find_tag(soup, 'div', {'role': 'main'})
+    table_tag = find_tag(main_tag, 'table', {'class': 'docutils'})
+    return tuple(str(a_tag['href']) for a_tag in table_tag.find_all('a'))
+
+
+# Строки числового указателя PEP.
+def pep_index(text):
+    """
+    Возвращает пары (href, сокращение типа и статуса) из numerical-index.
+
+    Сокращение берётся из первой ячейки строки, например 'SF' или 'S'.
+    """
+    soup = make_soup(text, 'pep-index')
+    section_tag = find_tag(soup, 'section', attrs={'id': 'numerical-index'})
+    tbody_tag = find_tag(section_tag, 'tbody')
+    return tuple(
+        (str(tr_tag.a['href']), tr_tag.td.text)
+        for tr_tag in tbody_tag.find_all('tr')
+    )
+
+
+# Статус из карточки PEP.
+def pep_status(text):
+    """
+    Возвращает значение поля Status: из карточки rfc2822 страницы PEP.
+
+    Если поля в карточке нет, возвращает None.
+    """
+    soup = make_soup(text, 'pep-page')
+    main_card_dl_tag = find_tag(
+        soup, 'dl', {'class': 'rfc2822 field-list simple'}
+    )
+    for tag in main_card_dl_tag:
+        if tag.name == 'dt' and tag.text == 'Status:':
+            card_status = tag.next_sibling.next_sibling.string
+            return None if card_status is None else str(card_status)
+    return None
+
+
+# Все поля карточки PEP.
+def pep_card(text):
+    """
+    Возвращает поля карточки rfc2822 страницы PEP.
+
+    Пары (название поля без двоеточия, значение) в порядке карточки,
+    пробельные символы в значениях схлопываются.
+    """
+    soup = make_soup(text, 'pep-page')
+    main_card_dl_tag = find_tag(
+        soup, 'dl', {'class': 'rfc2822 field-list simple'}
+    )
+    return tuple(
+        (
+            dt_tag.text.rstrip(':'),
+            ' '.join(dt_tag.find_next_sibling('dd').text.split()),
+        )
+        for dt_tag in main_card_dl_tag.find_all('dt')
+    )
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
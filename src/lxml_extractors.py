@@ -0,0 +1,148 @@
+"""
+Извлечение данных из HTML-страниц: быстрый движок на чистом lxml.
+
+Когда страницы уже лежат в кеше, основное время уходит на построение
+дерева BeautifulSoup. Здесь те же извлечения выполняются напрямую
+через lxml.html и XPath, без промежуточных объектов bs4.
+Имена функций и их результаты совпадают с extractors.py, движок
+выбирается аргументом --engine.
+"""
+import logging
+
+from lxml import etree, html
+
+from exceptions import ParserFindAllVersionException
+from tracing import span
+from utils import find_node, node_path
+
+UTF8_PARSER = html.HTMLParser(encoding='utf-8')
+
+
+# Разбор документа в дерево lxml.
+def parse_document(text):
+    """
+    Возвращает корневой элемент html; пустая страница даёт пустой html.
+
+    text может быть строкой или байтами тела ответа в UTF-8.
+    """
+    parser = UTF8_PARSER if isinstance(text, bytes) else None
+    with span('parse'):
+        try:
+            return html.document_fromstring(text, parser=parser)
+        except etree.ParserError:
+            return html.Element('html')
+
+
+# Аналог свойства .string из BeautifulSoup.
+def _single_string(element):
+    """
+    Возвращает строку элемента, если она у него единственная.
+
+    Как и .string в BeautifulSoup, спускается по цепочке элементов
+    с единственным потомком и возвращает None, если потомков несколько.
+    """
+    children = list(element)
+    if not children:
+        return element.text
+    if len(children) == 1 and not element.text and not children[0].tail:
+        return _single_string(children[0])
+    return None
+
+
+# Ссылки на статьи о нововведениях из оглавления.
+def whats_new_index(text):
+    """Возвращает ссылки href на статьи «What's New» в порядке оглавления."""
+    root = parse_document(text)
+    main_div = find_node(root, 'section', {'id': 'what-s-new-in-python'})
+    div_with_ul = find_node(main_div, 'div', {'class': 'toctree-wrapper'})
+    return tuple(
+        str(find_node(section, 'a').get('href'))
+        for section in div_with_ul.xpath(
+            node_path('li', {'class': 'toctree-l1'})
+        )
+    )
+
+
+# Заголовок и авторы статьи о нововведениях.
+def whats_new_page(text):
+    """Возвращает текст первого h1 и первого dl без переводов строк."""
+    root = parse_document(text)
+    h1 = find_node(root, 'h1')
+    dl = find_node(root, 'dl')
+    return str(h1.text_content()), dl.text_content().replace('\n', ' ')
+
+
+# Ссылки на документацию всех версий Python.
+def latest_versions_links(text):
+    """Возвращает пары (href, текст ссылки) из списка All versions."""
+    root = parse_document(text)
+    sidebar = find_node(root, 'div', {'class': 'sphinxsidebarwrapper'})
+    for ul in sidebar.xpath('.//ul'):
+        if 'All versions' in ul.text_content():
+            return tuple(
+                (str(a_tag.get('href')), str(a_tag.text_content()))
+                for a_tag in ul.xpath('.//a')
+            )
+    error_msg = 'Список последних версий Python не найден'
+    logging.error(error_msg, exc_info=True, stack_info=True)
+    raise ParserFindAllVersionException(error_msg)
+
+
+# Ссылки на архивы документации.
+def archive_links(text):
+    """Возвращает все ссылки href из таблицы архивов на странице загрузки."""
+    root = parse_document(text)
+    main_tag = find_node(root, 'div', {'role': 'main'})
+    table_tag = find_node(main_tag, 'table', {'class': 'docutils'})
+    return tuple(str(href) for href in table_tag.xpath('.//a/@href'))
+
+
+# Строки числового указателя PEP.
+def pep_index(text):
+    """Возвращает пары (href, сокращение типа и статуса) из numerical-index."""
+    root = parse_document(text)
+    section_tag = find_node(root, 'section', {'id': 'numerical-index'})
+    tbody_tag = find_node(section_tag, 'tbody')
+    return tuple(
+        (
+            str(tr_tag.xpath('(.//a)[1]/@href')[0]),
+            str(tr_tag.xpath('(.//td)[1]')[0].text_content()),
+        )
+        for tr_tag in tbody_tag.xpath('.//tr')
+    )
+
+
+# Статус из карточки PEP.
+def pep_status(text):
+    """Возвращает значение поля Status: или None, если поля нет."""
+    root = parse_document(text)
+    main_card_dl_tag = find_node(
+        root, 'dl', {'class': 'rfc2822 field-list simple'}
+    )
+    for tag in main_card_dl_tag.iterchildren('dt'):
+        if tag.text_content() == 'Status:':
+            card_status = _single_string(tag.getnext())
+            return None if card_status is None else str(card_status)
+    return None
+
+
+# Все поля карточки PEP.
+def pep_card(text):
+    """Возвращает пары (поле карточки rfc2822, значение) страницы PEP."""
+    root = parse_document(text)
+    main_card_dl_tag = find_node(
+        root, 'dl', {'class': 'rfc2822 field-list simple'}
+    )
+    return tuple(
+        (
+            str(dt_tag.text_content()).rstrip(':'),
+            ' '.join(dt_tag.getnext().text_content().split()),
+        )
+        for dt_tag in main_card_dl_tag.iterchildren('dt')
+    )
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
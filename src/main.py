@@ -23,155 +23,269 @@
 """
 import logging
 import re
+from argparse import Namespace
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
-import requests_cache
-from bs4 import BeautifulSoup
-from tqdm import tqdm
-
-from configs import configure_argument_parser, configure_logging
-from constants import BASE_DIR, EXPECTED_STATUS, MAIN_DOC_URL, PEP_URL
-from exceptions import ParserFindAllVersionException
+from configs import (
+    configure_argument_parser, configure_logging, configure_session
+)
+from constants import (
+    ALL_MODES, BASE_DIR, DOWNLOAD_FORMATS, EXPECTED_STATUS, MAIN_DOC_URL,
+    MEMO_FILE, NO_STORE, PEP_JSON_URL, PEP_SOURCE, PEP_STATE_FILE, PEP_URL,
+    WORKER_MODE, WORKERS
+)
+from crawlers import SharedFetches, crawl_pages, get_page
+from downloads import download_all, download_file
+from memo import disable_memo, enable_memo, memo_extract
 from outputs import control_output
-from utils import find_tag, get_response
+from pep_records import PEP_DETAILS_HEADER, PepRecord
+from pep_state import PepStateIndex, incremental_statuses
+from tracing import enable_tracing, run_profiled
+from utils import find_link, get_extractors, get_response, load_json
 
 
 # Собираем ссылки, забираем информацию об авторах и редакторах статей.
-def whats_new(session):
-    """Первый парсер: будет переходить по ссылкам."""
+def whats_new(session, cli_args=None):
+    """
+    Первый парсер: будет переходить по ссылкам.
+
+    Страницы статей загружаются пулом потоков, а при заданном
+    аргументе --processes разбираются параллельно пулом процессов.
+    С аргументом --async страницы загружает цикл событий asyncio.
+    Порядок строк совпадает с порядком статей в оглавлении,
+    статьи, которые не удалось загрузить, пропускаются.
+    Строки отдаются генератором по мере разбора статей.
+    """
+    yield ('Ссылка на статью', 'Заголовок', 'Редактор, Автор')
+    extractors = get_extractors(cli_args)
     whats_new_url = urljoin(MAIN_DOC_URL, 'whatsnew/')
-    response = get_response(session, whats_new_url)
-    soup = BeautifulSoup(response.text, features='lxml')
-    main_div = find_tag(soup, 'section', attrs={'id': 'what-s-new-in-python'})
-    div_with_ul = find_tag(main_div, 'div', attrs={'class': 'toctree-wrapper'})
-    sections_by_python = div_with_ul.find_all(
-        'li', attrs={'class': 'toctree-l1'}
-    )
-    results = [('Ссылка на статью', 'Заголовок', 'Редактор, Автор')]
-    for section in tqdm(sections_by_python, desc='Выполнение цикла парсинга'):
-        version_a_tag = find_tag(section, 'a')
-        version_link = urljoin(whats_new_url, version_a_tag['href'])
-        response = get_response(session, version_link)
-        soup = BeautifulSoup(response.text, features='lxml')
-        h1 = find_tag(soup, 'h1')
-        dl = find_tag(soup, 'dl')
-        dl_text = dl.text.replace('\n', ' ')
-        results.append(
-            (version_link, h1.text, dl_text)
+    response = get_page(session, whats_new_url, cli_args)
+    version_links = [
+        urljoin(whats_new_url, href)
+        for href in memo_extract(
+            whats_new_url, response.content, extractors.whats_new_index
         )
-        return results
+    ]
+    pages = crawl_pages(
+        session, version_links, extractors.whats_new_page, cli_args
+    )
+    for version_link, page in zip(version_links, pages):
+        if page is None:
+            continue
+        h1_text, dl_text = page
+        yield (version_link, h1_text, dl_text)
 
 
 # Информация о версиях Python — номера, статусы и ссылки на документацию.
-def latest_versions(session):
+def latest_versions(session, cli_args=None):
     """
     Второй парсер будет собирать информацию о версиях Python.
 
     Номера, статусы (in development, pre-release, stable и так далее)
-    и ссылки на документацию.
-    """
-    response = get_response(session, MAIN_DOC_URL)
-    soup = BeautifulSoup(response.text, features='lxml')
-    sidebar = find_tag(soup, 'div', attrs={'class': 'sphinxsidebarwrapper'})
-    ul_tags = sidebar.find_all('ul')
-    for ul in ul_tags:
-        if 'All versions' in ul.text:
-            a_tags = ul.find_all('a')
-            break
-        error_msg = 'Список последних версий Python не найден'
-        logging.error(error_msg, exc_info=True, stack_info=True)
-        raise ParserFindAllVersionException(error_msg)
-    results = [('Ссылка на документацию', 'Версия', 'Статус')]
+    и ссылки на документацию. Строки отдаются генератором.
+    """
+    yield ('Ссылка на документацию', 'Версия', 'Статус')
+    extractors = get_extractors(cli_args)
+    response = get_page(session, MAIN_DOC_URL, cli_args)
     pattern = r'Python (?P<version>\d\.\d+) \((?P<status>.*)\)'
-    for a_tag in a_tags:
-        link = a_tag['href']
-        text_match = re.search(pattern, a_tag.text)
-        version, status = text_match.groups() if text_match else a_tag.text, ''
-        results.append((link, version, status))
-    return results
+    links = memo_extract(
+        MAIN_DOC_URL, response.content, extractors.latest_versions_links
+    )
+    for link, a_text in links:
+        text_match = re.search(pattern, a_text)
+        version, status = (
+            text_match.groups() if text_match else (a_text, '')
+        )
+        yield (link, version, status)
 
 
 # Скачиваем архив документации Python.
-def download(session):
-    """Парсер будет скачивать архив с документацией Python на диск."""
+def download(session, cli_args=None):
+    """
+    Парсер будет скачивать архив с документацией Python на диск.
+
+    Архив загружается потоково, в обход кеша, с докачкой
+    прерванной загрузки (см. downloads.py).
+    По умолчанию скачивается PDF (A4). С аргументом --formats
+    выбранные архивы загружаются параллельно, а функция возвращает
+    таблицу с размером, временем и скоростью загрузки каждого файла.
+    """
+    extractors = get_extractors(cli_args)
     downloads_url = urljoin(MAIN_DOC_URL, 'download.html')
     response = get_response(session, downloads_url)
-    soup = BeautifulSoup(response.text, features='lxml')
-    main_tag = find_tag(soup, 'div', {'role': 'main'})
-    table_tag = find_tag(main_tag, 'table', {'class': 'docutils'})
-    pdf_a4_tag = find_tag(
-        table_tag, 'a', {'href': re.compile(r'.+pdf-a4\.zip$')}
+    links = memo_extract(
+        downloads_url, response.content, extractors.archive_links
     )
-    pdf_a4_link = pdf_a4_tag['href']
-    archive_url = urljoin(downloads_url, pdf_a4_link)
-    filename = archive_url.split('/')[-1]
     downloads_dir = BASE_DIR / 'downloads'
     downloads_dir.mkdir(exist_ok=True)
+    formats = getattr(cli_args, 'formats', None)
+    if formats:
+        archive_urls = [
+            urljoin(downloads_url, find_link(links, DOWNLOAD_FORMATS[name]))
+            for name in formats
+        ]
+        return download_all(
+            session, archive_urls, downloads_dir,
+            workers=getattr(cli_args, 'workers', WORKERS),
+        )
+    pdf_a4_link = find_link(links, DOWNLOAD_FORMATS['pdf-a4'])
+    archive_url = urljoin(downloads_url, pdf_a4_link)
+    filename = archive_url.split('/')[-1]
     archive_path = downloads_dir / filename
-    response = session.get(archive_url)
-    with open(archive_path, 'wb') as file:
-        file.write(response.content)
-    logging.info(f'Архив был загружен и сохранён: {archive_path}')
+    if download_file(session, archive_url, archive_path) is not None:
+        logging.info(f'Архив был загружен и сохранён: {archive_path}')
 
 
 # Со страницы pep получаем данные о статусе и выводим в таблицу.
-def pep(session):
+def pep(session, cli_args=None):
     """
-    На главной странице находим ссылки на pep.
+    Считаем PEP по статусам.
 
-    На странице pep считываем статус и заносим в словарь
+    Статусы берутся из источника --pep-source (PEP_SOURCE_TO_FUNCTION):
+    по умолчанию из JSON-указателя api/peps.json одним запросом,
+    с --pep-source html — из таблицы numerical-index и страниц всех PEP,
+    с --incremental — всегда из страниц (см. pep_html_statuses).
+    Статус заносим в словарь
     Словарь из модуля collection, используем для значения по умолчанию
     для новых значений, defaultdict(int) через get
-    Делаем проверку на несовпадающий статус и вывод лога в консоль.
-    Через цикл заполняем таблицу.
-    """
-    # Шаг 1 - Закрепимся на главной странице, найдем точку входа в pep_index
-    response = get_response(session, PEP_URL)
-    soup = BeautifulSoup(response.text, features='lxml')
-    section_tag = find_tag(soup, 'section', attrs={'id': 'numerical-index'})
-    tbody_tag = find_tag(section_tag, 'tbody')
-    tr_tags = tbody_tag.find_all('tr')
-
-    # Шаг 2 - Получаем ссылки, варим новый суп и пробегаемся по всем pep_pages.
-    result = [('Cтатус', 'Количество')]
+    Если источник отдаёт сокращение из таблицы, делаем проверку
+    на несовпадающий статус и вывод лога в консоль.
+    Через цикл заполняем таблицу, строки отдаются генератором.
+    """
+    yield ('Cтатус', 'Количество')
+    # Шаг 1 - Выбираем источник статусов.
+    # Шаг 2 - Получаем число PEP и строки (ссылка, сокращение, статус).
     count_pep_status = defaultdict(int)
-    for index in tqdm(range(1, len(tr_tags)), desc='Выполнение цикла'):
-        pep_href_tag = tr_tags[index].a['href']
-        pep_link = urljoin(PEP_URL, pep_href_tag)
-        response = get_response(session, pep_link)
-        soup = BeautifulSoup(response.text, features='lxml')
-        main_card_tag = find_tag(soup, 'section', {'id': 'pep-content'})
-        main_card_dl_tag = find_tag(
-            main_card_tag, 'dl',
-            {'class': 'rfc2822 field-list simple'}
-            )
+    if getattr(cli_args, 'incremental', False):
+        pep_source = 'html'
+    else:
+        pep_source = getattr(cli_args, 'pep_source', PEP_SOURCE)
+    total, pep_statuses = PEP_SOURCE_TO_FUNCTION[pep_source](
+        session, cli_args
+    )
+    for pep_link, abbr, card_status in pep_statuses:
+        # Шаг 3 - На странице pep нашли статус, добавляем в dict
+        if card_status is None:
+            continue
+        count_pep_status[card_status] = count_pep_status.get(
+            card_status, 0) + 1
 
-        # Шаг 3 - На странице pep находим статус, добавляем в dict
-        for tag in main_card_dl_tag:
-            if tag.name == 'dt' and tag.text == 'Status:':
-                card_status = tag.next_sibling.next_sibling.string
-                count_pep_status[card_status] = count_pep_status.get(
-                    card_status, 0) + 1
-
-                # Шаг 4 - Проверка на наличие статуса в main_page и совпадение
-                if len(tr_tags[index].td.text) != 1:
-                    table_status = tr_tags[index].td.text[1:]
-                    if card_status[0] != table_status:
-                        logging.info(
-                            '\n'
-                            'Несовпадающие статусы:\n'
-                            f'{pep_link}\n'
-                            f'Статус в карточке: {card_status}\n'
-                            f'Ожидаемые статусы: '
-                            f'{EXPECTED_STATUS[table_status]}\n'
-                        )
+        # Шаг 4 - Проверка на наличие статуса в main_page и совпадение
+        if abbr is not None and len(abbr) != 1:
+            table_status = abbr[1:]
+            if card_status[0] != table_status:
+                logging.info(
+                    '\n'
+                    'Несовпадающие статусы:\n'
+                    f'{pep_link}\n'
+                    f'Статус в карточке: {card_status}\n'
+                    f'Ожидаемые статусы: '
+                    f'{EXPECTED_STATUS[table_status]}\n'
+                )
 
     # Шаг 5 - Загоняем данные из словаря в таблицу и добавим Total.
     for key in count_pep_status:
-        result.append((key, str(count_pep_status[key])))
-    result.append(('Total', len(tr_tags) - 1))
-    return result
+        yield (key, str(count_pep_status[key]))
+    yield ('Total', total)
+
+
+# Статусы PEP со страниц PEP.
+def pep_html_statuses(session, cli_args=None):
+    """
+    На главной странице находим ссылки на pep, статусы — в карточках.
+
+    Возвращает число PEP в таблице numerical-index и строки
+    (ссылка, сокращение из таблицы, статус из карточки).
+    Страницы pep загружаются конкурентно, число потоков задаётся
+    аргументом --workers, порядок строк сохраняется.
+    С аргументом --async страницы загружает цикл событий asyncio.
+    С аргументом --incremental статусы берутся из индекса состояния
+    (см. pep_state.py), а загружаются только изменившиеся страницы.
+    Без него карточки загружает pep_cards(), общая с режимом pep-details.
+    """
+    if getattr(cli_args, 'incremental', False):
+        extractors = get_extractors(cli_args)
+        response = get_page(session, PEP_URL, cli_args, headers=NO_STORE)
+        pep_rows = memo_extract(
+            PEP_URL, response.content, extractors.pep_index
+        )[1:]
+        pep_links = [urljoin(PEP_URL, href) for href, _ in pep_rows]
+        index = PepStateIndex(BASE_DIR / PEP_STATE_FILE)
+        try:
+            card_statuses = incremental_statuses(
+                session, index, pep_rows, pep_links, extractors.pep_status,
+                getattr(cli_args, 'workers', WORKERS),
+            )
+        finally:
+            index.close()
+    else:
+        pep_rows, pep_links, cards = pep_cards(session, cli_args)
+        card_statuses = (
+            None if card is None else dict(card).get('Status')
+            for card in cards
+        )
+    abbrs = (abbr for _, abbr in pep_rows)
+    return len(pep_rows), zip(pep_links, abbrs, card_statuses)
+
+
+# Статусы PEP из JSON-указателя.
+def pep_json_statuses(session, cli_args=None):
+    """
+    Загружает указатель api/peps.json и берёт статусы из него.
+
+    Все статусы приходят одним запросом, документ разбирает
+    load_json() (orjson, если установлен). Возвращает число PEP
+    и строки (ссылка, None, статус) в порядке указателя: сокращений
+    таблицы numerical-index в JSON нет, поэтому проверка
+    несовпадения статусов выполняется только с --pep-source html.
+    """
+    response = get_page(session, PEP_JSON_URL, cli_args)
+    peps = load_json(response.content).values()
+    return len(peps), [(pep['url'], None, pep['status']) for pep in peps]
+
+
+# Подробная таблица PEP со всеми полями карточек.
+def pep_details(session, cli_args=None):
+    """
+    Для каждого PEP выводим номер, ссылку и все поля карточки rfc2822.
+
+    Страницы и функция извлечения те же, что у режима pep
+    с --pep-source html (pep_cards), поэтому после него этот режим
+    не делает ни одного запроса к сети.
+    Карточки превращаются в компактные записи PepRecord
+    (см. pep_records.py), строки отдаются генератором.
+    PEP, которые не удалось загрузить, пропускаются.
+    """
+    yield PEP_DETAILS_HEADER
+    _, pep_links, cards = pep_cards(session, cli_args)
+    for pep_link, card in zip(pep_links, cards):
+        if card is not None:
+            yield PepRecord.from_card(pep_link, card).row()
+
+
+# Карточки PEP из числового указателя.
+def pep_cards(session, cli_args=None):
+    """
+    Загружает числовой указатель PEP и карточки всех PEP из него.
+
+    Возвращает строки указателя (href, сокращение), ссылки на PEP
+    и карточки в том же порядке: пары (поле, значение) от pep_card,
+    для страниц, которые не удалось загрузить, — None.
+    Карточки отдаются по мере разбора страниц.
+    """
+    extractors = get_extractors(cli_args)
+    response = get_page(session, PEP_URL, cli_args)
+    pep_rows = memo_extract(
+        PEP_URL, response.content, extractors.pep_index
+    )[1:]
+    pep_links = [urljoin(PEP_URL, href) for href, _ in pep_rows]
+    cards = crawl_pages(
+        session, pep_links, extractors.pep_card, cli_args,
+        desc='Выполнение цикла',
+    )
+    return pep_rows, pep_links, cards
 
 
 MODE_TO_FUNCTION = {
@@ -180,6 +294,87 @@ MODE_TO_FUNCTION = {
     'download': download,
     'pep': pep
 }
+# Режимы сверх четырёх основных.
+EXTRA_MODE_TO_FUNCTION = {
+    'pep-details': pep_details,
+}
+MODES = {**MODE_TO_FUNCTION, **EXTRA_MODE_TO_FUNCTION}
+# Источники статусов для режима pep.
+PEP_SOURCE_TO_FUNCTION = {
+    'json': pep_json_statuses,
+    'html': pep_html_statuses,
+}
+
+
+# Список режимов из командной строки.
+def expand_modes(modes):
+    """Заменяет all на все режимы и убирает повторы, сохраняя порядок."""
+    expanded = []
+    for mode in modes:
+        expanded.extend(MODES if mode == ALL_MODES else (mode,))
+    return list(dict.fromkeys(expanded))
+
+
+# Аргументы для одного режима.
+def mode_arguments(cli_args, mode):
+    """Копия аргументов командной строки с единственным режимом mode."""
+    return Namespace(**{**vars(cli_args), 'mode': mode})
+
+
+# Выполнение режима в отдельном потоке.
+def collect_mode(session, mode, cli_args):
+    """
+    Выполняет режим mode и возвращает его строки списком.
+
+    Файл результатов у каждого режима свой, поэтому с -o file строки
+    пишутся прямо из потока режима, а функция возвращает None.
+    """
+    mode_args = mode_arguments(cli_args, mode)
+    results = MODES[mode](session, mode_args)
+    if results is None:
+        return None
+    if mode_args.output == 'file':
+        control_output(results, mode_args)
+        return None
+    return list(results)
+
+
+# Запуск нескольких режимов на одной сессии.
+def run_modes(session, modes, cli_args, concurrent=True):
+    """
+    Выполняет режимы modes на общей сессии и выводит их результаты.
+
+    Один режим (или concurrent=False) выполняется в текущем потоке,
+    строки выводятся по мере поступления. Несколько режимов работают
+    параллельно, каждый в своём потоке: одинаковые запросы разных
+    режимов объединяет SharedFetches, а страницы, полученные одним
+    режимом, остальные берут из кеша сессии. Каждый режим выводит
+    результаты в свою цель: в терминал — в порядке режимов
+    из командной строки, с -o file — в собственный файл.
+    Псевдорежим worker выполняет задания общей очереди --queue
+    (см. work_queues.py).
+    """
+    if WORKER_MODE in modes:
+        from work_queues import run_worker
+        return run_worker(session, modes, cli_args)
+    if len(modes) == 1 or not concurrent:
+        for mode in modes:
+            mode_args = mode_arguments(cli_args, mode)
+            results = MODES[mode](session, mode_args)
+            if results is not None:
+                control_output(results, mode_args)
+        return
+    SharedFetches(session)
+    with ThreadPoolExecutor(max_workers=len(modes)) as executor:
+        futures = [
+            executor.submit(collect_mode, session, mode, cli_args)
+            for mode in modes
+        ]
+        for mode, future in zip(modes, futures):
+            results = future.result()
+            if results is not None:
+                logging.info(f'Результаты режима {mode}:')
+                control_output(results, mode_arguments(cli_args, mode))
 
 
 # Запуск логирования, выбор режима работы
@@ -187,21 +382,54 @@ def main():
     """
     Запускаем программу, логирование.
 
-    Выбираем из arg режим работы
+    Выбираем из arg режим работы: один, несколько или all —
+    тогда режимы выполняются параллельно на общей сессии (run_modes).
     При необходимости чистим кеш
+    С --timings и --trace выводим замеры этапов, с --profile
+    запускаем режимы по очереди под профилировщиком (см. tracing.py).
+    С --snapshot все полученные ответы записываются в архив
+    (см. snapshots.py). С --memo результаты разбора неизменившихся
+    страниц берутся из памятки прошлых запусков (см. memo.py).
     """
     configure_logging()
     logging.info('Парсер запущен!')
-    arg_parser = configure_argument_parser(MODE_TO_FUNCTION.keys())
+    arg_parser = configure_argument_parser([*MODES, ALL_MODES, WORKER_MODE])
     args = arg_parser.parse_args()
     logging.info(f'Аргументы командной строки: {args}')
-    session = requests_cache.CachedSession()
+    session = configure_session(args)
     if args.clear_cache:
         session.cache.clear()
-    parser_mode = args.mode
-    results = MODE_TO_FUNCTION[parser_mode](session)
-    if results is not None:
-        control_output(results, args)
+    snapshot = None
+    if args.snapshot:
+        from snapshots import SnapshotWriter
+        snapshot = SnapshotWriter(args.snapshot)
+        session.hooks['response'].append(snapshot.record)
+    eviction = None
+    if args.cache_max_size:
+        from caches import CacheEviction
+        eviction = CacheEviction(session, args.cache_max_size * 2 ** 20)
+    tracer = enable_tracing() if args.timings or args.trace else None
+    if args.memo:
+        enable_memo(BASE_DIR / MEMO_FILE, args.memo_max_size * 2 ** 20)
+    modes = expand_modes(args.mode)
+    try:
+        if args.profile:
+            run_profiled(
+                args.profile, run_modes, session, modes, args, False
+            )
+        else:
+            run_modes(session, modes, args)
+    finally:
+        disable_memo()
+        if snapshot is not None:
+            snapshot.close()
+            logging.info(f'Снимок страниц сохранён: {args.snapshot}')
+    if eviction is not None:
+        eviction.run()
+    if tracer is not None:
+        tracer.log_summary()
+        if args.trace:
+            tracer.dump(args.trace)
     logging.info('Парсер завершил работу.')
 
 
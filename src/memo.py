@@ -0,0 +1,239 @@
+"""
+Памятка результатов извлечения между запусками.
+
+Даже когда все страницы лежат в кеше ответов, каждый запуск заново
+разбирает каждую страницу, и тёплый запуск pep упирается в процессор.
+С аргументом --memo результаты функций извлечения (небольшие кортежи
+строк) сохраняются в SQLite-файл. Запись хранит адрес страницы,
+имя функции извлечения, версию функции (хеш её исходного кода),
+хеш тела страницы и результат в формате marshal. Если страница
+и функция не изменились, результат берётся из памятки без разбора.
+
+Изменение функции извлечения меняет её версию, поэтому устаревают
+записи этой функции; они перезаписываются при следующем разборе.
+В версию входят и зависимости функции из MEMO_DEPENDENCIES
+(constants.py): её запись в PARSE_TARGETS и код вызываемых помощников
+вроде make_soup(), поэтому их правка сбрасывает записи только тех
+функций, которые от них зависят. Изменения, которых не видно в этом
+коде (например, новая версия lxml), сбрасываются увеличением
+MEMO_VERSION.
+
+Файл памятки ограничен --memo-max-size мегабайт: в конце работы
+удаляются записи, к которым дольше всего не обращались (LRU).
+Как и замеры в tracing.py, памятка включается на весь процесс,
+а обходчики обращаются к ней через memo_extract() или,
+при разборе в пуле процессов, через memo_lookup() и memo_save().
+"""
+import hashlib
+import logging
+import marshal
+import sqlite3
+import time
+from functools import lru_cache
+from importlib import import_module
+from threading import Lock
+
+from constants import MEMO_DEPENDENCIES, MEMO_VERSION, PARSE_TARGETS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    version TEXT NOT NULL,
+    body_hash BLOB NOT NULL,
+    result BLOB NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (url, extractor)
+)
+"""
+# Признак промаха: None — законный результат извлечения.
+MISS = object()
+
+memo = None
+
+
+# Код функции для версии.
+def code_of(function):
+    """Возвращает исходный код функции, а без него — её байт-код."""
+    import inspect
+
+    try:
+        return inspect.getsource(function).encode()
+    except (OSError, TypeError):
+        return marshal.dumps(function.__code__)
+
+
+# Версия функции извлечения.
+@lru_cache(maxsize=None)
+def extractor_version(extract):
+    """
+    Возвращает хеш кода функции extract и того, от чего она зависит.
+
+    Хешируются MEMO_VERSION, код функции, а также её запись
+    в PARSE_TARGETS и код помощников из MEMO_DEPENDENCIES.
+    Правка остального кода модулей версию не меняет.
+    """
+    digest = hashlib.sha256(str(MEMO_VERSION).encode())
+    digest.update(code_of(extract))
+    target, helpers = MEMO_DEPENDENCIES.get(
+        f'{extract.__module__}.{extract.__qualname__}', (None, ())
+    )
+    if target is not None:
+        digest.update(repr(PARSE_TARGETS[target]).encode())
+    for helper in helpers:
+        module, name = helper.rsplit('.', 1)
+        digest.update(code_of(getattr(import_module(module), name)))
+    return digest.hexdigest()[:16]
+
+
+class ExtractionMemo:
+    """Результаты извлечения в SQLite, ключ — адрес и функция."""
+
+    def __init__(self, path, max_size):
+        """Открывает или создаёт файл памятки path размером до max_size."""
+        self.max_size = max_size
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(SCHEMA)
+        self.accessed = {}
+        self.hits = self.misses = 0
+        self.lock = Lock()
+
+    def key(self, url, content, extract):
+        """Ключ записи: адрес, имя и версия функции, хеш тела страницы."""
+        return (
+            url,
+            f'{extract.__module__}.{extract.__qualname__}',
+            extractor_version(extract),
+            hashlib.blake2b(content, digest_size=16).digest(),
+        )
+
+    def get(self, key):
+        """Возвращает сохранённый результат или MISS."""
+        url, extractor, version, body_hash = key
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT version, body_hash, result FROM results '
+                'WHERE url = ? AND extractor = ?',
+                (url, extractor),
+            ).fetchone()
+            if row is None or row[:2] != (version, body_hash):
+                self.misses += 1
+                return MISS
+            self.hits += 1
+            self.accessed[url, extractor] = time.time()
+        return marshal.loads(row[2])
+
+    def put(self, key, result):
+        """
+        Сохраняет результат, заменяя прежний для адреса и функции.
+
+        Результаты, которые marshal не умеет сохранить, пропускаются.
+        """
+        try:
+            data = marshal.dumps(result)
+        except ValueError:
+            return
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                (*key, data, time.time()),
+            )
+
+    def close(self):
+        """Сохраняет время обращений, ужимает памятку и закрывает файл."""
+        with self.lock:
+            self.connection.executemany(
+                'UPDATE results SET accessed = ? '
+                'WHERE url = ? AND extractor = ?',
+                [
+                    (accessed, url, extractor)
+                    for (url, extractor), accessed in self.accessed.items()
+                ],
+            )
+            self.evict()
+            self.connection.commit()
+            self.connection.close()
+        logging.info(
+            f'Памятка извлечения: попаданий {self.hits}, '
+            f'промахов {self.misses}'
+        )
+
+    def evict(self):
+        """Удаляет давно использованные записи сверх max_size байт."""
+        entries = self.connection.execute(
+            'SELECT rowid, LENGTH(url) + LENGTH(extractor) + LENGTH(version)'
+            ' + LENGTH(body_hash) + LENGTH(result) FROM results '
+            'ORDER BY accessed'
+        ).fetchall()
+        excess = sum(size for _, size in entries) - self.max_size
+        victims = []
+        for rowid, size in entries:
+            if excess <= 0:
+                break
+            victims.append((rowid,))
+            excess -= size
+        if victims:
+            self.connection.executemany(
+                'DELETE FROM results WHERE rowid = ?', victims
+            )
+            logging.info(
+                f'Из памятки удалено записей: {len(victims)}, '
+                f'лимит {self.max_size} байт'
+            )
+
+
+# Включение памятки.
+def enable_memo(path, max_size):
+    """Открывает памятку path и включает её для всего процесса."""
+    global memo
+    memo = ExtractionMemo(path, max_size)
+    return memo
+
+
+# Выключение памятки.
+def disable_memo():
+    """Закрывает памятку и выключает её."""
+    global memo
+    if memo is not None:
+        memo.close()
+    memo = None
+
+
+# Поиск результата в памятке.
+def memo_lookup(url, content, extract):
+    """
+    Возвращает ключ памятки и сохранённый результат или MISS.
+
+    Без включённой памятки возвращает (None, MISS).
+    """
+    if memo is None:
+        return None, MISS
+    key = memo.key(url, content, extract)
+    return key, memo.get(key)
+
+
+# Сохранение результата в памятку.
+def memo_save(key, result):
+    """Сохраняет результат под ключом от memo_lookup(), если он есть."""
+    if memo is not None and key is not None:
+        memo.put(key, result)
+
+
+# Извлечение через памятку.
+def memo_extract(url, content, extract):
+    """
+    Возвращает extract(content), по возможности из памятки.
+
+    Без включённой памятки просто вызывает extract.
+    """
+    key, result = memo_lookup(url, content, extract)
+    if result is MISS:
+        result = extract(content)
+        memo_save(key, result)
+    return result
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
@@ -7,20 +7,28 @@
 
 Контролировать вывод результатов в программе будет
 функция control_output(). У функции будет два параметра:
-results — список с результатами results из функции main() файла main.py;
+results — строки с результатами из функции режима файла main.py,
+список или генератор: построчный вывод и запись в файл выводят
+строки по мере их поступления, не дожидаясь конца парсинга;
 cli_args — объект с аргументами командной строки.
 За печать данных в формате таблицы будет отвечать функция pretty_output(),
 а за вывод данных по умолчанию (построчно) — функция default_output().
+Файл результатов (file_output()) пишется в CSV, JSON Lines, Parquet
+или Arrow IPC, с типизированными столбцами и сжатием по выбору.
 """
 
 
 import csv
 import datetime as dt
+import gzip
+import json
 import logging
 
-from prettytable import PrettyTable
-
-from constants import BASE_DIR, DATETIME_FORMAT
+from constants import (
+    BASE_DIR, COLUMN_TYPES, COMPRESSION_SUFFIXES, DATETIME_FORMAT, FILE_BATCH,
+    FILE_FORMAT
+)
+from crawlers import batched
 
 
 # Контроль вывода результатов парсинга.
@@ -41,18 +49,26 @@ def control_output(results, cli_args):
 
 # Вывод данных в терминал построчно.
 def default_output(results):
-    """Вывод данных по умолчанию (построчно)."""
+    """Вывод данных по умолчанию (построчно), по мере поступления строк."""
     for row in results:
-        print(*row)
+        print(*row, flush=True)
 
 
 # Вывод данных в формате PrettyTable.
 def pretty_output(results):
-    """Печать данных в формате таблицы."""
+    """
+    Печать данных в формате таблицы.
+
+    Ширина столбцов зависит от всех строк, поэтому таблица
+    печатается после того, как получены все результаты.
+    """
+    from prettytable import PrettyTable
+
+    rows = iter(results)
     table = PrettyTable()
-    table.field_names = results[0]
+    table.field_names = next(rows)
     table.align = 'l'
-    table.add_rows(results[1:])
+    table.add_rows(list(rows))
     print(table)
 
 
@@ -67,20 +83,143 @@ def file_output(results, cli_args):
     названии отражалось, в каком режиме работала программа — whats-new
     или latest-versions. Значит, для названия файла подойдёт такой
     формат: «режим работы программы» + «дата и время записи» + формат (csv).
+    Формат задаёт аргумент --file-format: csv (по умолчанию), jsonl
+    или колоночные parquet и arrow (нужен пакет pyarrow), сжатие —
+    аргумент --file-compression.
     """
+    file_format = getattr(cli_args, 'file_format', FILE_FORMAT)
+    compression = getattr(cli_args, 'file_compression', None)
     results_dir = BASE_DIR / 'results'
     results_dir.mkdir(exist_ok=True)
     parser_mode = cli_args.mode
     now = dt.datetime.now()
     now_formatted = now.strftime(DATETIME_FORMAT)
-    file_name = f'{parser_mode}_{now_formatted}.csv'
+    file_name = f'{parser_mode}_{now_formatted}.{file_format}'
+    if compression and file_format in TEXT_WRITERS:
+        file_name += COMPRESSION_SUFFIXES[compression]
     file_path = results_dir / file_name
-    with open(file_path, 'w', encoding='utf-8') as f:
-        writer = csv.writer(f, dialect='unix')
-        writer.writerows(results)
+    if file_format in TEXT_WRITERS:
+        TEXT_WRITERS[file_format](results, file_path, compression)
+    else:
+        columnar_output(results, file_path, file_format, compression)
     logging.info(f'Файл с результатами был сохранён: {file_path}')
 
 
+# Открытие текстового файла на запись.
+def open_text(path, compression=None):
+    """Открывает файл path на запись как текст со сжатием gzip или zstd."""
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8')
+    if compression == 'zstd':
+        from caches import import_zstandard
+        return import_zstandard().open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+# Запись результатов в CSV.
+def csv_output(results, file_path, compression=None):
+    """
+    Записывает строки результатов в CSV.
+
+    Файл без сжатия сбрасывается на диск после каждой строки, поэтому
+    при сбое парсинга в нём остаются полученные строки. Сжатый поток
+    так не сбрасывается: сброс после каждой строки портит сжатие.
+    """
+    with open_text(file_path, compression) as f:
+        writer = csv.writer(f, dialect='unix')
+        for row in results:
+            writer.writerow(row)
+            if compression is None:
+                f.flush()
+
+
+# Запись результатов в JSON Lines.
+def jsonl_output(results, file_path, compression=None):
+    """
+    Записывает строки результатов в JSON Lines: объект на строку.
+
+    Ключи объектов — заголовки столбцов, числовые столбцы
+    из COLUMN_TYPES записываются числами. Строки записываются
+    по мере поступления, как и в CSV.
+    """
+    rows = iter(results)
+    header = next(rows)
+    types = column_types(header)
+    with open_text(file_path, compression) as f:
+        for row in rows:
+            record = dict(zip(header, typed_row(types, row)))
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            if compression is None:
+                f.flush()
+
+
+TEXT_WRITERS = {'csv': csv_output, 'jsonl': jsonl_output}
+
+
+# Запись результатов в Parquet или Arrow IPC.
+def columnar_output(results, file_path, file_format, compression=None):
+    """
+    Записывает строки результатов в колоночный файл с типами столбцов.
+
+    Строки собираются в пачки по FILE_BATCH и пишутся группами строк
+    (Parquet) или пачками записей (Arrow IPC), поэтому в памяти
+    не держится больше одной пачки. Arrow IPC сжимается только zstd,
+    gzip для него отклоняет парсер аргументов.
+    """
+    pa = import_pyarrow()
+    rows = iter(results)
+    header = next(rows)
+    types = column_types(header)
+    schema = pa.schema([
+        (name, pa.int64() if kind is int else pa.string())
+        for name, kind in zip(header, types)
+    ])
+    if file_format == 'parquet':
+        from pyarrow import parquet
+        writer = parquet.ParquetWriter(
+            file_path, schema, compression=compression or 'none'
+        )
+    else:
+        writer = pa.ipc.new_file(
+            file_path, schema,
+            options=pa.ipc.IpcWriteOptions(compression=compression),
+        )
+    with writer:
+        for batch in batched(rows, FILE_BATCH):
+            columns = zip(*(typed_row(types, row) for row in batch))
+            writer.write_batch(
+                pa.record_batch(list(columns), schema=schema)
+            )
+
+
+# Типы столбцов результатов.
+def column_types(header):
+    """Возвращает тип каждого столбца: int из COLUMN_TYPES или str."""
+    return [COLUMN_TYPES.get(name, str) for name in header]
+
+
+# Приведение строки результатов к типам столбцов.
+def typed_row(types, row):
+    """Приводит значения строки row к типам столбцов types, None оставляет."""
+    return tuple(
+        None if value is None else kind(value)
+        for kind, value in zip(types, row)
+    )
+
+
+# Необязательная зависимость pyarrow.
+def import_pyarrow():
+    """Импортирует pyarrow или сообщает, как его установить."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            'Для форматов parquet и arrow установите пакет pyarrow: '
+            'pip install pyarrow'
+        )
+    return pyarrow
+
+
 # ヽ(´▽`)/
 
 # kaonashi
@@ -0,0 +1,73 @@
+"""
+Подробные записи PEP для режима pep-details.
+
+Режим pep сводит карточки PEP к счётчику статусов, а pep-details
+сохраняет для каждого PEP все поля карточки rfc2822. Записей тысячи,
+поэтому запись — dataclass со __slots__: без словаря атрибутов
+у каждого экземпляра, а повторяющиеся значения (статус, тип, тема,
+версия Python) интернируются и хранятся в одном экземпляре строки.
+
+Карточки извлекает функция pep_card движка (extractors.py или
+lxml_extractors.py) из тех же страниц и того же кеша, что и в режиме pep.
+"""
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+from constants import PEP_FIELDS
+from pep_state import pep_number
+
+INTERNED_FIELDS = ('status', 'pep_type', 'topic', 'python_version')
+PEP_DETAILS_HEADER = ('Номер', 'Ссылка', *PEP_FIELDS)
+
+
+@dataclass(frozen=True, slots=True)
+class PepRecord:
+    """Поля карточки одного PEP, отсутствующие в карточке поля — None."""
+
+    number: int
+    url: str
+    author: Optional[str] = None
+    sponsor: Optional[str] = None
+    pep_delegate: Optional[str] = None
+    bdfl_delegate: Optional[str] = None
+    discussions_to: Optional[str] = None
+    status: Optional[str] = None
+    pep_type: Optional[str] = None
+    topic: Optional[str] = None
+    requires: Optional[str] = None
+    created: Optional[str] = None
+    python_version: Optional[str] = None
+    post_history: Optional[str] = None
+    replaces: Optional[str] = None
+    superseded_by: Optional[str] = None
+    resolution: Optional[str] = None
+
+    @classmethod
+    def from_card(cls, url, card):
+        """
+        Создаёт запись из пар (поле, значение) карточки PEP по ссылке url.
+
+        Поля, которых нет в PEP_FIELDS, пропускаются.
+        """
+        values = {
+            PEP_FIELDS[name]: value
+            for name, value in card if name in PEP_FIELDS
+        }
+        for name in INTERNED_FIELDS:
+            if name in values:
+                values[name] = sys.intern(values[name])
+        return cls(pep_number(url), url, **values)
+
+    def row(self):
+        """Возвращает строку таблицы в порядке PEP_DETAILS_HEADER."""
+        return (
+            self.number, self.url,
+            *(getattr(self, name) for name in PEP_FIELDS.values()),
+        )
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
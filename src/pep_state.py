@@ -0,0 +1,152 @@
+"""
+Инкрементальный обход PEP с постоянным индексом состояния.
+
+Между запусками меняются считанные PEP, а полный обход читает
+все страницы заново. Поэтому для каждого PEP в SQLite-файле хранится
+последнее известное состояние: сокращение из таблицы numerical-index,
+статус из карточки, ETag, Last-Modified и хеш содержимого страницы.
+
+При следующем запуске страница PEP загружается целиком, только если
+строка в numerical-index изменилась или PEP ещё нет в индексе.
+Для остальных отправляется условный GET: ответ 304 означает, что
+страница не менялась, и статус берётся из индекса. Страница с 200
+и прежним хешем тоже повторно не разбирается.
+"""
+import hashlib
+import re
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import NO_STORE
+from utils import get_response
+
+PepState = namedtuple(
+    'PepState',
+    (
+        'number', 'url', 'table_status', 'card_status',
+        'etag', 'last_modified', 'content_hash',
+    ),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS peps (
+    number INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    table_status TEXT NOT NULL,
+    card_status TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT
+)
+"""
+
+
+# Номер PEP из ссылки.
+def pep_number(url):
+    """Возвращает номер PEP из ссылки вида .../pep-0008/."""
+    return int(re.search(r'pep-(\d+)', url).group(1))
+
+
+class PepStateIndex:
+    """Индекс состояния PEP в SQLite, ключ — номер PEP."""
+
+    def __init__(self, path):
+        """Открывает или создаёт файл индекса path."""
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(SCHEMA)
+
+    def get(self, number):
+        """Возвращает PepState для номера PEP или None."""
+        row = self.connection.execute(
+            'SELECT * FROM peps WHERE number = ?', (number,)
+        ).fetchone()
+        return None if row is None else PepState(*row)
+
+    def save(self, state):
+        """Сохраняет состояние PEP, заменяя прежнее."""
+        self.connection.execute(
+            'INSERT OR REPLACE INTO peps VALUES (?, ?, ?, ?, ?, ?, ?)', state
+        )
+
+    def close(self):
+        """Фиксирует изменения и закрывает файл индекса."""
+        self.connection.commit()
+        self.connection.close()
+
+
+# Условный запрос страницы PEP.
+def revalidate(session, url, state):
+    """
+    Загружает страницу url в обход кеша requests_cache.
+
+    Если строка PEP в таблице не менялась, к запросу добавляются
+    If-None-Match и If-Modified-Since из сохранённого состояния,
+    и неизменившаяся страница вернётся с кодом 304 без тела.
+    """
+    headers = dict(NO_STORE)
+    if state is not None:
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+    return get_response(session, url, headers=headers)
+
+
+# Статусы PEP с учётом сохранённого индекса.
+def incremental_statuses(session, index, pep_rows, pep_links, extract,
+                         workers):
+    """
+    Возвращает статусы из карточек PEP в порядке строк таблицы.
+
+    pep_rows — пары (href, сокращение) из numerical-index,
+    extract — функция извлечения статуса из текста страницы.
+    Страницы загружаются пулом потоков, разбираются только новые
+    и изменившиеся, индекс обновляется по ходу обхода. Для страницы,
+    которую не удалось загрузить, берётся сохранённый статус.
+    """
+    from tqdm import tqdm
+
+    states = []
+    for (_, abbr), pep_link in zip(pep_rows, pep_links):
+        state = index.get(pep_number(pep_link))
+        if state is not None and state.table_status != abbr:
+            state = None
+        states.append(state)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        responses = executor.map(
+            lambda args: revalidate(session, *args), zip(pep_links, states)
+        )
+        card_statuses = []
+        for (_, abbr), pep_link, state, response in tqdm(
+            zip(pep_rows, pep_links, states, responses),
+            total=len(pep_links), desc='Проверка изменений'
+        ):
+            if response is None:
+                card_statuses.append(
+                    None if state is None else state.card_status
+                )
+                continue
+            if response.status_code == 304:
+                card_statuses.append(state.card_status)
+                continue
+            content_hash = hashlib.sha256(response.content).hexdigest()
+            if state is not None and state.content_hash == content_hash:
+                card_status = state.card_status
+            else:
+                card_status = extract(response.text)
+            index.save(PepState(
+                pep_number(pep_link), pep_link, abbr, card_status,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                content_hash,
+            ))
+            card_statuses.append(card_status)
+    return card_statuses
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
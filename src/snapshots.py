@@ -0,0 +1,190 @@
+"""
+Снимки страниц: один обход в архив, сколько угодно разборов из него.
+
+При разработке парсеров и в CI режимы ходят на живые сайты или читают
+кеш requests_cache, содержимое которого зависит от сроков жизни
+и истории запусков. С аргументом --snapshot ARCHIVE каждый ответ,
+который получил режим (из сети или из кеша), записывается в zip-архив:
+тела страниц — отдельными сжатыми файлами, имя файла — хеш тела,
+поэтому одинаковые страницы хранятся один раз, а индекс index.json
+связывает метод и адрес запроса со статусом, заголовками и телом.
+
+С аргументом --replay ARCHIVE сессия отвечает на запросы из архива
+через транспортный адаптер ReplayAdapter, сеть и дисковый кеш
+не используются. Архив открывается через mmap: тела страниц
+читаются срезами отображённой в память области по смещениям
+из оглавления zip.
+Адреса, которых нет в снимке, дают ошибку соединения, как недоступный
+сервер: режимы записывают её в лог и продолжают работу.
+"""
+import hashlib
+import io
+import json
+import mmap
+import struct
+import zipfile
+import zlib
+from threading import Lock
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPHeaderDict, HTTPResponse
+
+from constants import SNAPSHOT_DROP_HEADERS, SNAPSHOT_INDEX
+
+# Постоянная дата файлов архива: одинаковые обходы дают одинаковые архивы.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+# Ключ ответа в индексе снимка.
+def snapshot_key(method, url):
+    """Возвращает ключ индекса для метода и адреса запроса."""
+    return f'{method} {url}'
+
+
+class SnapshotWriter:
+    """Записывает ответы сессии в архив снимка."""
+
+    def __init__(self, path):
+        """Создаёт архив path, существующий файл перезаписывается."""
+        self.path = path
+        self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self.index = {}
+        self.bodies = set()
+        self.lock = Lock()
+
+    def record(self, response, *args, **kwargs):
+        """
+        Хук ответа requests: сохраняет ответ в снимок.
+
+        Повторный ответ на тот же запрос не записывается.
+        Потоковый ответ (stream=True) при этом читается в память.
+        """
+        request = response.request
+        key = snapshot_key(request.method, request.url)
+        body = response.content or b''
+        name = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            if key in self.index:
+                return response
+            self.index[key] = {
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': {
+                    header: value
+                    for header, value in response.headers.items()
+                    if header.lower() not in SNAPSHOT_DROP_HEADERS
+                },
+                'body': name,
+            }
+            if name not in self.bodies:
+                self.bodies.add(name)
+                self.write(name, body)
+        return response
+
+    def write(self, name, data):
+        """Добавляет файл name в архив с постоянной датой."""
+        info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self.archive.writestr(info, data)
+
+    def close(self):
+        """Записывает индекс и закрывает архив."""
+        with self.lock:
+            self.write(
+                SNAPSHOT_INDEX,
+                json.dumps(
+                    self.index, ensure_ascii=False, indent=1, sort_keys=True
+                ),
+            )
+            self.archive.close()
+
+
+class SnapshotArchive:
+    """Архив снимка, открытый через mmap только для чтения."""
+
+    def __init__(self, path):
+        """
+        Читает оглавление архива path и отображает файл в память.
+
+        Тела страниц потом читаются срезами отображения по смещениям
+        из оглавления: без общей позиции файла и блокировок, поэтому
+        потоки пула читают снимок одновременно.
+        """
+        with open(path, 'rb') as file:
+            with zipfile.ZipFile(file) as archive:
+                self.members = {
+                    info.filename: info for info in archive.infolist()
+                }
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = json.loads(self.read(SNAPSHOT_INDEX))
+
+    def read(self, name):
+        """Возвращает распакованное содержимое файла name из архива."""
+        info = self.members[name]
+        *_, name_length, extra_length = struct.unpack_from(
+            zipfile.structFileHeader, self.buffer, info.header_offset
+        )
+        start = (
+            info.header_offset + zipfile.sizeFileHeader
+            + name_length + extra_length
+        )
+        data = self.buffer[start:start + info.compress_size]
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            return zlib.decompress(data, -zlib.MAX_WBITS)
+        return data
+
+    def get(self, method, url):
+        """Возвращает запись индекса и тело ответа или None."""
+        entry = self.index.get(snapshot_key(method, url))
+        if entry is None:
+            return None
+        return entry, self.read(entry['body'])
+
+    def close(self):
+        """Освобождает отображение архива."""
+        self.buffer.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Транспортный адаптер requests, отвечающий из архива снимка."""
+
+    def __init__(self, archive):
+        """Привязывает адаптер к открытому SnapshotArchive."""
+        super().__init__()
+        self.archive = archive
+        self.builder = HTTPAdapter()
+
+    def send(self, request, stream=False, timeout=None, verify=True,
+             cert=None, proxies=None):
+        """Возвращает сохранённый ответ или вызывает ConnectionError."""
+        found = self.archive.get(request.method, request.url)
+        if found is None:
+            raise requests.ConnectionError(
+                f'Ответа на {request.method} {request.url} нет в снимке',
+                request=request,
+            )
+        entry, body = found
+        headers = HTTPHeaderDict()
+        for name, value in entry['headers'].items():
+            headers.add(name, value)
+        headers['Content-Length'] = str(len(body))
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=entry['status'],
+            reason=entry['reason'],
+            preload_content=False,
+            request_url=request.url,
+        )
+        return self.builder.build_response(request, raw)
+
+    def close(self):
+        """Закрывает архив снимка."""
+        self.archive.close()
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
@@ -0,0 +1,121 @@
+"""
+Потоковое извлечение данных: разбор страницы по кускам с ранним выходом.
+
+Статье «What's New» нужны только первый h1 и первый dl, а карточке
+PEP — только список rfc2822 в начале страницы, но обычные движки
+загружают и разбирают страницу целиком. Здесь куски тела ответа
+подаются инкрементальному парсеру lxml (HTMLPullParser), и как только
+нужные элементы закрылись, разбор прекращается: остальные куски
+не читаются, а загрузчик (crawlers.stream_extract) закрывает
+соединение, не дочитав страницу.
+
+Имена функций и их результаты совпадают с extractors.py
+и lxml_extractors.py, но на вход они получают итератор кусков байтов.
+Потоковый разбор включается аргументом --stream.
+"""
+import logging
+
+from lxml import etree
+
+from exceptions import ParserFindTagException
+from tracing import span
+
+
+# Совпадение элемента с тегом и атрибутами.
+def _matches(element, tag, attrs):
+    """
+    Проверяет элемент так же, как find() в BeautifulSoup.
+
+    Атрибут class совпадает по одному из классов или всей строкой.
+    """
+    if element.tag != tag:
+        return False
+    for name, value in attrs.items():
+        actual = element.get(name)
+        if actual is None:
+            return False
+        if name == 'class' and value in actual.split():
+            continue
+        if actual != value:
+            return False
+    return True
+
+
+# Учёт событий инкрементального парсера.
+def _track_events(events, targets, opened, closed):
+    """
+    Запоминает в opened первые открытые элементы для каждой цели targets.
+
+    Когда такой элемент закрывается, он попадает в closed.
+    """
+    for event, element in events:
+        for number, (tag, attrs) in enumerate(targets):
+            if event == 'end':
+                if element is opened[number]:
+                    closed[number] = element
+            elif opened[number] is None and _matches(element, tag, attrs):
+                opened[number] = element
+
+
+# Поиск первых элементов в потоке кусков.
+def stream_find(chunks, targets):
+    """
+    Возвращает первые элементы для каждой пары (тег, атрибуты) из targets.
+
+    Куски байтов chunks подаются парсеру, пока каждый из первых
+    подходящих элементов не закроется: тогда его поддерево уже
+    разобрано целиком, и следующие куски не запрашиваются.
+    Если страница кончилась раньше, в логи пишется то же сообщение,
+    что и в find_node(), и вызывается ParserFindTagException.
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'), encoding='utf-8')
+    opened = [None] * len(targets)
+    closed = [None] * len(targets)
+    with span('parse'):
+        for chunk in chunks:
+            parser.feed(chunk)
+            _track_events(parser.read_events(), targets, opened, closed)
+            if None not in closed:
+                return closed
+        parser.close()
+        _track_events(parser.read_events(), targets, opened, closed)
+    for element, (tag, attrs) in zip(closed, targets):
+        if element is None:
+            error_msg = f'Не найден тег {tag} {attrs or None}'
+            logging.error(error_msg, exc_info=True, stack_info=True)
+            raise ParserFindTagException(error_msg)
+    return closed
+
+
+# Текстовое содержимое элемента.
+def _text_content(element):
+    """Аналог text_content() из lxml.html для элемента etree."""
+    return str(element.xpath('string()'))
+
+
+# Заголовок и авторы статьи о нововведениях.
+def whats_new_page(chunks):
+    """Возвращает текст первого h1 и первого dl без переводов строк."""
+    h1, dl = stream_find(chunks, (('h1', {}), ('dl', {})))
+    return _text_content(h1), _text_content(dl).replace('\n', ' ')
+
+
+# Все поля карточки PEP.
+def pep_card(chunks):
+    """Возвращает пары (поле карточки rfc2822, значение) страницы PEP."""
+    main_card_dl_tag, = stream_find(
+        chunks, (('dl', {'class': 'rfc2822 field-list simple'}),)
+    )
+    return tuple(
+        (
+            _text_content(dt_tag).rstrip(':'),
+            ' '.join(_text_content(dt_tag.getnext()).split()),
+        )
+        for dt_tag in main_card_dl_tag.iterchildren('dt')
+    )
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
@@ -0,0 +1,223 @@
+"""
+Замеры этапов парсинга и профилирование.
+
+По прогрессу tqdm и строкам лога не понять, на что ушло время
+медленного запуска: на сеть, на поиск в кеше, на разбор HTML
+или на поиск тегов. С аргументами --timings и --trace загрузка
+страниц (utils.get_response), разбор (utils.make_soup,
+lxml_extractors.parse_document) и поиск тегов (utils.find_tag,
+utils.find_node) записывают события: этап, адрес страницы,
+длительность, а для загрузки ещё попадание в кеш, размер ответа
+и задержку сервера (response.elapsed, она включает соединение и TLS).
+
+В конце работы в лог выводится сводка: p50, p95 и максимум
+по этапам и самые медленные страницы. --trace дополнительно
+сохраняет все события в JSON. Пока замеры выключены, обёртки этапов
+ничего не делают.
+
+При разборе в пуле процессов (--processes) этапы разбора и поиска
+выполняются в других процессах и в сводку не попадают.
+
+--profile запускает режим под cProfile и сохраняет статистику
+в файл для pstats или snakeviz.
+"""
+import cProfile
+import json
+import logging
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from threading import Lock
+
+from constants import TRACE_SLOWEST
+
+tracer = None
+current_url = ContextVar('current_url', default=None)
+
+
+class Tracer:
+    """Копит события этапов и считает по ним сводку."""
+
+    def __init__(self):
+        """Создаёт пустой журнал событий."""
+        self.events = []
+        self.lock = Lock()
+
+    def record(self, stage, duration, url=None, **fields):
+        """Записывает событие этапа stage длительностью duration секунд."""
+        event = {
+            'stage': stage,
+            'url': url or current_url.get(),
+            'duration': duration,
+            **fields,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def summary(self):
+        """
+        Возвращает сводку по событиям.
+
+        stages — число вызовов, сумма, p50, p95 и максимум по этапам;
+        fetch — попадания в кеш, промахи, байты и задержка сервера;
+        slowest — адреса с наибольшим суммарным временем всех этапов.
+        """
+        durations = defaultdict(list)
+        by_url = defaultdict(float)
+        fetches = [event for event in self.events if event['stage'] == 'fetch']
+        for event in self.events:
+            durations[event['stage']].append(event['duration'])
+            if event['url'] is not None:
+                by_url[event['url']] += event['duration']
+        latencies = [
+            event['latency'] for event in fetches
+            if not event.get('from_cache') and 'latency' in event
+        ]
+        return {
+            'stages': {
+                stage: distribution(values)
+                for stage, values in durations.items()
+            },
+            'fetch': {
+                'hits': sum(
+                    bool(event.get('from_cache')) for event in fetches
+                ),
+                'misses': sum(
+                    not event.get('from_cache') for event in fetches
+                ),
+                'bytes': sum(event.get('bytes', 0) for event in fetches),
+                'latency': distribution(latencies),
+            },
+            'slowest': sorted(
+                by_url.items(), key=lambda item: item[1], reverse=True
+            )[:TRACE_SLOWEST],
+        }
+
+    def log_summary(self):
+        """Выводит сводку в лог."""
+        summary = self.summary()
+        lines = ['Замеры этапов, мс (вызовов, сумма, p50, p95, максимум):']
+        for stage, values in summary['stages'].items():
+            lines.append(f'  {stage}: {format_distribution(values)}')
+        fetch = summary['fetch']
+        lines.append(
+            f'Кеш: попаданий {fetch["hits"]}, промахов {fetch["misses"]}, '
+            f'загружено байт {fetch["bytes"]}'
+        )
+        if fetch['latency']['count']:
+            lines.append(
+                'Задержка сервера, мс: '
+                f'{format_distribution(fetch["latency"])}'
+            )
+        lines.append('Самые медленные страницы, мс:')
+        for url, duration in summary['slowest']:
+            lines.append(f'  {duration * 1000:.1f} {url}')
+        logging.info('\n'.join(lines))
+
+    def dump(self, path):
+        """Сохраняет события и сводку в JSON-файл path."""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(
+                {'events': self.events, 'summary': self.summary()},
+                file, ensure_ascii=False, indent=1,
+            )
+        logging.info(f'Трасса сохранена: {path}')
+
+
+# Перцентиль по методу ближайшего ранга.
+def percentile(ordered, percent):
+    """Возвращает перцентиль percent отсортированного списка ordered."""
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+# Распределение длительностей.
+def distribution(values):
+    """Возвращает число, сумму, p50, p95 и максимум списка values."""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'total': sum(ordered),
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'max': ordered[-1],
+    }
+
+
+# Строка сводки по этапу.
+def format_distribution(values):
+    """Форматирует распределение в миллисекундах для лога."""
+    return (
+        f'{values["count"]}, {values["total"] * 1000:.1f}, '
+        f'{values["p50"] * 1000:.1f}, {values["p95"] * 1000:.1f}, '
+        f'{values["max"] * 1000:.1f}'
+    )
+
+
+# Включение замеров.
+def enable_tracing():
+    """Включает запись событий и возвращает новый Tracer."""
+    global tracer
+    tracer = Tracer()
+    return tracer
+
+
+# Выключение замеров.
+def disable_tracing():
+    """Выключает запись событий."""
+    global tracer
+    tracer = None
+
+
+# Замер длительности этапа.
+@contextmanager
+def _timed(stage, fields):
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        tracer.record(stage, time.perf_counter() - start, **fields)
+
+
+# Замер этапа.
+def span(stage, **fields):
+    """
+    Контекстный менеджер замера этапа stage.
+
+    Отдаёт словарь fields, в который код этапа может дописать
+    подробности, например размер ответа. Без включённых замеров
+    возвращает пустую обёртку.
+    """
+    if tracer is None:
+        return nullcontext(fields)
+    return _timed(stage, fields)
+
+
+# Запуск режима под профилировщиком.
+def run_profiled(path, func, *args):
+    """
+    Вызывает func(*args) под cProfile и сохраняет статистику в path.
+
+    Режимы отдают строки генератором, поэтому под профилировщиком
+    результат выбирается целиком и возвращается списком.
+    """
+    def collect():
+        results = func(*args)
+        return None if results is None else list(results)
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(collect)
+    finally:
+        profiler.dump_stats(path)
+        logging.info(f'Профиль сохранён: {path}')
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
@@ -20,22 +20,38 @@ logging.exception(); он специально предназначен для 
 Стек вызова функций выглядит как полный трейсбек с сообщением об ошибке,
 но он указывает не на саму ошибку, а на операцию логирования.
 """
+import json
 import logging
+import re
+from importlib import import_module
 
-from requests import RequestException
-
+from constants import ENGINE, ENGINES, PARSE_TARGETS
 from exceptions import ParserFindTagException
+from tracing import current_url, span
 
 
 # Перехват ошибки RequestException.
-def get_response(session, url):
+def get_response(session, url, **kwargs):
     """
     Реализуем перехват ошибки RequestException.
 
     Информация о ней должна записываться в логи.
+    Дополнительные аргументы, например headers, передаются в session.get().
+    При включённых замерах (см. tracing.py) записывается время загрузки,
+    попадание в кеш, размер ответа и задержка сервера.
     """
+    from requests import RequestException
+
+    current_url.set(url)
     try:
-        response = session.get(url)
+        with span('fetch', url=url) as fields:
+            response = session.get(url, **kwargs)
+            fields.update(
+                status=response.status_code,
+                from_cache=getattr(response, 'from_cache', False),
+                bytes=len(response.content),
+                latency=response.elapsed.total_seconds(),
+            )
         response.encoding = 'utf-8'
         if response is not None:
             return response
@@ -64,7 +80,8 @@ def find_tag(soup, tag, attrs=None):
     словарь — attrs=(attrs or {}). Если тег не найдётся, программа
     завершит работу, а в логи и терминал выведется сообщение об ошибке.
     """
-    searched_tag = soup.find(tag, attrs=(attrs or {}))
+    with span('find'):
+        searched_tag = soup.find(tag, attrs=(attrs or {}))
     if searched_tag is None:
         error_msg = f'Не найден тег {tag} {attrs}'
         logging.error(error_msg, exc_info=True, stack_info=True)
@@ -72,6 +89,117 @@ def find_tag(soup, tag, attrs=None):
     return searched_tag
 
 
+# Поиск ссылки по шаблону.
+def find_link(links, pattern):
+    """
+    Возвращает первую ссылку из links, подходящую под регулярку pattern.
+
+    Если подходящей ссылки нет, программа завершает работу так же,
+    как find_tag() при поиске тега <a> с этим href.
+    """
+    for link in links:
+        if re.search(pattern, link):
+            return link
+    error_msg = f"Не найден тег a {{'href': re.compile({pattern!r})}}"
+    logging.error(error_msg, exc_info=True, stack_info=True)
+    raise ParserFindTagException(error_msg)
+
+
+# Путь XPath, равнозначный поиску find() в BeautifulSoup.
+def node_path(tag, attrs=None):
+    """
+    Строит относительный путь XPath к потомкам tag с атрибутами attrs.
+
+    Атрибут class сравнивается так же, как в BeautifulSoup:
+    достаточно совпадения одного из классов или всей строки целиком.
+    """
+    conditions = []
+    for name, value in (attrs or {}).items():
+        if name == 'class':
+            conditions.append(
+                'contains(concat(" ", normalize-space(@class), " "), '
+                f'" {value} ")'
+            )
+        else:
+            conditions.append(f'@{name}="{value}"')
+    return f'.//{tag}' + ''.join(f'[{condition}]' for condition in conditions)
+
+
+# Перехват ошибки поиска узлов lxml.
+def find_node(element, tag, attrs=None):
+    """
+    Аналог find_tag() для дерева lxml.
+
+    Ищет первого потомка element с тегом tag и атрибутами attrs.
+    Если узел не найдётся, в логи пишется то же сообщение, что
+    и в find_tag(), и вызывается ParserFindTagException.
+    """
+    with span('find'):
+        found = element.xpath(f'({node_path(tag, attrs)})[1]')
+    if not found:
+        error_msg = f'Не найден тег {tag} {attrs}'
+        logging.error(error_msg, exc_info=True, stack_info=True)
+        raise ParserFindTagException(error_msg)
+    return found[0]
+
+
+# Частичный разбор страницы.
+def make_soup(text, target=None):
+    """
+    Строит дерево BeautifulSoup только для нужного парсеру поддерева.
+
+    target — ключ словаря PARSE_TARGETS из constants.py: там для каждого
+    парсера объявлены тег и атрибуты элемента, который ему нужен.
+    Всё остальное lxml пропускает, не создавая объектов Tag, поэтому
+    память и время на страницу заметно меньше. Без target страница
+    разбирается целиком. text может быть строкой или байтами
+    тела ответа, байты декодируются как UTF-8 без угадывания кодировки.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    encoding = 'utf-8' if isinstance(text, bytes) else None
+    with span('parse'):
+        if target is None:
+            return BeautifulSoup(
+                text, features='lxml', from_encoding=encoding
+            )
+        name, attrs = PARSE_TARGETS[target]
+        return BeautifulSoup(
+            text, features='lxml', parse_only=SoupStrainer(name, attrs),
+            from_encoding=encoding,
+        )
+
+
+# Разбор документа JSON.
+def load_json(content):
+    """
+    Разбирает документ JSON из байтов или текста.
+
+    Если установлен пакет orjson, разбирает он — в несколько раз
+    быстрее модуля json стандартной библиотеки, который иначе
+    используется как запасной вариант. Время разбора записывается
+    в замеры как этап parse.
+    """
+    try:
+        from orjson import loads
+    except ImportError:
+        loads = json.loads
+    with span('parse'):
+        return loads(content)
+
+
+# Выбор движка извлечения данных.
+def get_extractors(cli_args=None):
+    """
+    Возвращает модуль с функциями извлечения для выбранного движка.
+
+    Движок задаётся аргументом --engine, по умолчанию используется
+    эталонный движок на BeautifulSoup.
+    """
+    engine = getattr(cli_args, 'engine', ENGINE)
+    return import_module(ENGINES[engine])
+
+
 # ヽ(´▽`)/
 
 # kaonashi
@@ -0,0 +1,441 @@
+"""
+Общая очередь заданий для обхода несколькими процессами.
+
+Один процесс main.py упирается в собственные потоки и процессор.
+С аргументом --queue обход страниц режима (crawl_pages) становится
+координатором: ссылки страниц (статьи оглавления whats-new, страницы
+PEP из numerical-index) уходят заданиями в общую очередь, а воркеры —
+процессы `python main.py worker --queue ...` на этой или других
+машинах — берут задания пачками, загружают и разбирают страницы
+и возвращают результаты в очередь. Координатор отдаёт результаты
+в порядке ссылок, и режим выводит их обычным путём (control_output).
+Пока результатов нет, координатор сам берёт задания, поэтому обход
+завершается и без отдельных воркеров, а каждый воркер добавляет
+пропускную способность.
+
+Задание выдаётся в аренду на --lease-timeout секунд. Если воркер
+упал и не вернул результат, аренда истекает, и задание получает
+другой воркер, так что задания не теряются. Повторно выполненное
+задание просто перезаписывает результат.
+
+Очередь хранится в SQLite-файле (для воркеров на одной машине
+или на общем диске) или, если --queue — адрес redis://, в Redis
+(нужен пакет redis). Результаты хранятся в JSON, как в журнале
+обхода (см. checkpoints.py).
+"""
+import inspect
+import json
+import logging
+import sqlite3
+import time
+from argparse import Namespace
+from importlib import import_module
+from itertools import groupby
+from operator import itemgetter
+from threading import Lock
+from uuid import uuid4
+
+from checkpoints import as_tuples
+from constants import (
+    CACHE_BUSY_TIMEOUT, ENGINES, LEASE_TIMEOUT, QUEUE_NAME, QUEUE_POLL,
+    QUEUE_WINDOW, STREAM_EXTRACTORS, WORKER_IDLE, WORKER_MODE, WORKERS
+)
+from crawlers import crawl_backend
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    run TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    leased_until REAL NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    PRIMARY KEY (run, position)
+)
+"""
+# Аренда в Redis: вернуть в очередь задания с истёкшей арендой,
+# затем взять до ARGV[3] заданий и записать срок их аренды.
+REDIS_LEASE = """
+local now = tonumber(ARGV[1])
+for _, job in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    redis.call('ZREM', KEYS[2], job)
+    redis.call('LPUSH', KEYS[1], job)
+end
+local jobs = {}
+for _ = 1, tonumber(ARGV[3]) do
+    local job = redis.call('LPOP', KEYS[1])
+    if not job then
+        break
+    end
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), job)
+    table.insert(jobs, job)
+end
+return jobs
+"""
+# Удаление запуска в Redis: задания, чей JSON начинается с ARGV[1]
+# (["<run>",), убираются из очереди и аренды, затем удаляются результаты.
+REDIS_DROP = """
+local prefix = ARGV[1]
+for _, job in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+    if string.sub(job, 1, #prefix) == prefix then
+        redis.call('LREM', KEYS[1], 0, job)
+    end
+end
+for _, job in ipairs(redis.call('ZRANGE', KEYS[2], 0, -1)) do
+    if string.sub(job, 1, #prefix) == prefix then
+        redis.call('ZREM', KEYS[2], job)
+    end
+end
+redis.call('DEL', KEYS[3])
+"""
+
+
+class SqliteQueue:
+    """Очередь заданий в SQLite-файле в режиме WAL."""
+
+    def __init__(self, path):
+        """Открывает или создаёт файл очереди path."""
+        self.connection = sqlite3.connect(
+            path, timeout=CACHE_BUSY_TIMEOUT / 1000,
+            isolation_level=None, check_same_thread=False,
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(SQLITE_SCHEMA)
+        self.lock = Lock()
+
+    def put(self, jobs):
+        """Ставит в очередь задания (запуск, номер, ссылка, функция)."""
+        with self.lock:
+            self.connection.executemany(
+                'INSERT INTO jobs (run, position, url, extractor) '
+                'VALUES (?, ?, ?, ?)',
+                jobs,
+            )
+
+    def lease(self, count, timeout):
+        """
+        Выдаёт до count заданий в аренду на timeout секунд.
+
+        Выдаются невыполненные задания без аренды или с истёкшей
+        арендой. BEGIN IMMEDIATE не даёт двум процессам взять
+        одно задание.
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self.connection.execute(
+                    'SELECT run, position, url, extractor FROM jobs '
+                    'WHERE done = 0 AND leased_until < ? '
+                    'ORDER BY rowid LIMIT ?',
+                    (now, count),
+                ).fetchall()
+                self.connection.executemany(
+                    'UPDATE jobs SET leased_until = ? '
+                    'WHERE run = ? AND position = ?',
+                    [(now + timeout, run, position)
+                     for run, position, _, _ in rows],
+                )
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+            self.connection.execute('COMMIT')
+        return rows
+
+    def complete(self, job, result):
+        """Сохраняет результат задания job."""
+        run, position, _, _ = job
+        with self.lock:
+            self.connection.execute(
+                'UPDATE jobs SET done = 1, result = ? '
+                'WHERE run = ? AND position = ?',
+                (json.dumps(result, ensure_ascii=False), run, position),
+            )
+
+    def finished(self, run, start, count=QUEUE_WINDOW):
+        """
+        Возвращает словарь номер → результат для выполненных заданий.
+
+        Читаются только номера от start до start + count, поэтому
+        опрос не перечитывает уже отданные результаты.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT position, result FROM jobs '
+                'WHERE run = ? AND position >= ? AND position < ? '
+                'AND done = 1',
+                (run, start, start + count),
+            ).fetchall()
+        return {
+            position: as_tuples(json.loads(result))
+            for position, result in rows
+        }
+
+    def drop(self, run):
+        """Удаляет задания запуска run."""
+        with self.lock:
+            self.connection.execute('DELETE FROM jobs WHERE run = ?', (run,))
+
+    def close(self):
+        """Закрывает файл очереди."""
+        self.connection.close()
+
+
+class RedisQueue:
+    """
+    Очередь заданий в Redis.
+
+    Задания ждут в списке {name}:pending, арендованные лежат
+    в сортированном множестве {name}:leased со сроком аренды,
+    результаты запуска — в хеше {name}:results:{run}.
+    """
+
+    def __init__(self, url, name=QUEUE_NAME):
+        """Подключается к Redis по адресу url."""
+        try:
+            from redis import Redis
+        except ImportError:
+            raise ImportError(
+                'Для очереди в Redis установите пакет redis: '
+                'pip install redis'
+            )
+        self.redis = Redis.from_url(url)
+        self.name = name
+        self.lease_script = self.redis.register_script(REDIS_LEASE)
+        self.drop_script = self.redis.register_script(REDIS_DROP)
+
+    def put(self, jobs):
+        """Ставит в очередь задания (запуск, номер, ссылка, функция)."""
+        self.redis.rpush(
+            f'{self.name}:pending', *(json.dumps(job) for job in jobs)
+        )
+
+    def lease(self, count, timeout):
+        """Выдаёт до count заданий в аренду на timeout секунд."""
+        payloads = self.lease_script(
+            keys=[f'{self.name}:pending', f'{self.name}:leased'],
+            args=[time.time(), timeout, count],
+        )
+        return [tuple(json.loads(payload)) for payload in payloads]
+
+    def complete(self, job, result):
+        """Сохраняет результат задания job и снимает аренду."""
+        run, position, _, _ = job
+        pipeline = self.redis.pipeline()
+        pipeline.hset(
+            f'{self.name}:results:{run}', position,
+            json.dumps(result, ensure_ascii=False),
+        )
+        pipeline.zrem(f'{self.name}:leased', json.dumps(list(job)))
+        pipeline.execute()
+
+    def finished(self, run, start, count=QUEUE_WINDOW):
+        """
+        Возвращает словарь номер → результат для выполненных заданий.
+
+        HMGET запрашивает только номера от start до start + count,
+        поэтому трафик опроса не растёт с числом отданных результатов.
+        """
+        positions = range(start, start + count)
+        results = self.redis.hmget(f'{self.name}:results:{run}', positions)
+        return {
+            position: as_tuples(json.loads(result))
+            for position, result in zip(positions, results)
+            if result is not None
+        }
+
+    def drop(self, run):
+        """
+        Удаляет задания и результаты запуска run.
+
+        Задания прерванного запуска, которые ещё ждут в очереди
+        или в аренде, убираются вместе с результатами, иначе воркеры
+        выполняли бы их без конца.
+        """
+        self.drop_script(
+            keys=[
+                f'{self.name}:pending', f'{self.name}:leased',
+                f'{self.name}:results:{run}',
+            ],
+            args=[json.dumps([run])[:-1] + ','],
+        )
+
+    def close(self):
+        """Закрывает соединение с Redis."""
+        self.redis.close()
+
+
+# Очередь по адресу из --queue.
+def open_queue(address):
+    """Открывает очередь Redis для redis:// и rediss://, иначе SQLite."""
+    if address.startswith(('redis://', 'rediss://')):
+        return RedisQueue(address)
+    return SqliteQueue(address)
+
+
+# Имя функции извлечения для задания.
+def extractor_name(extract):
+    """Возвращает модуль и имя функции extract через двоеточие."""
+    return f'{extract.__module__}:{extract.__qualname__}'
+
+
+# Функция извлечения по имени из задания.
+def resolve_extractor(name):
+    """
+    Импортирует функцию извлечения по имени от extractor_name().
+
+    Задания приходят из общей очереди, поэтому принимаются только
+    открытые функции, объявленные в модулях движков (ENGINES)
+    и в модуле STREAM_EXTRACTORS. Любое другое имя вызывает
+    ValueError: запись в очередь не должна давать выполнить
+    произвольный код.
+    """
+    module, _, qualname = name.partition(':')
+    if (
+        module in {*ENGINES.values(), STREAM_EXTRACTORS}
+        and qualname.isidentifier() and not qualname.startswith('_')
+    ):
+        extract = getattr(import_module(module), qualname, None)
+        if inspect.isfunction(extract) and extract.__module__ == module:
+            return extract
+    raise ValueError(f'Недопустимая функция извлечения в задании: {name}')
+
+
+# Выполнение заданий одним обходом.
+def complete_jobs(queue, session, jobs, extract, cli_args):
+    """
+    Загружает и разбирает страницы заданий jobs, сдавая результаты.
+
+    Если функция извлечения упала, ошибка пишется в лог, а обход
+    прерывается. Возвращает число сданных заданий.
+    """
+    done = 0
+    try:
+        results = crawl_backend(
+            session, [url for _, _, url, _ in jobs], extract, cli_args,
+            desc='Задания из очереди',
+        )
+        for job, result in zip(jobs, results):
+            queue.complete(job, result)
+            done += 1
+    except Exception:
+        logging.exception(
+            f'Ошибка при выполнении заданий {extractor_name(extract)}',
+            stack_info=True
+        )
+    return done
+
+
+# Выполнение пачки заданий.
+def work_batch(queue, session, cli_args):
+    """
+    Берёт в аренду до --workers заданий, выполняет их и сдаёт результаты.
+
+    Страницы загружаются и разбираются так же, как без очереди
+    (crawl_backend с --workers, --processes, --stream, --async).
+    Если функция извлечения упала, оставшиеся задания пачки
+    выполняются по одному: вместо результата сдаётся None только
+    для страниц, на которых она падает, как для страниц, которые
+    не удалось загрузить. Задания с функцией, которую не принимает
+    resolve_extractor(), не выполняются и тоже получают None.
+    Возвращает число заданий.
+    """
+    jobs = queue.lease(
+        getattr(cli_args, 'workers', WORKERS),
+        getattr(cli_args, 'lease_timeout', LEASE_TIMEOUT),
+    )
+    local_args = Namespace(**{**vars(cli_args), 'queue': None})
+    jobs.sort(key=itemgetter(3))
+    for extractor, group in groupby(jobs, key=itemgetter(3)):
+        group = list(group)
+        try:
+            extract = resolve_extractor(extractor)
+        except ValueError:
+            logging.error(
+                f'Задания с недопустимой функцией {extractor} пропущены'
+            )
+            for job in group:
+                queue.complete(job, None)
+            continue
+        done = complete_jobs(queue, session, group, extract, local_args)
+        for job in group[done:]:
+            if not complete_jobs(queue, session, [job], extract, local_args):
+                queue.complete(job, None)
+    return len(jobs)
+
+
+# Обход страниц через очередь.
+def queue_crawl(session, urls, extract, cli_args,
+                desc='Выполнение цикла парсинга'):
+    """
+    Ставит страницы urls в очередь --queue и отдаёт результаты по порядку.
+
+    За опрос из очереди читаются результаты только следующих
+    QUEUE_WINDOW заданий. Пока очередных результатов нет, координатор
+    выполняет задания сам (work_batch) или ждёт QUEUE_POLL секунд.
+    После обхода задания запуска удаляются из очереди.
+    """
+    from tqdm import tqdm
+
+    queue = open_queue(cli_args.queue)
+    run = uuid4().hex
+    name = extractor_name(extract)
+    queue.put([
+        (run, position, url, name) for position, url in enumerate(urls)
+    ])
+    position = 0
+    results = {}
+    try:
+        with tqdm(total=len(urls), desc=desc) as progress:
+            while position < len(urls):
+                results.update(queue.finished(
+                    run, position, min(QUEUE_WINDOW, len(urls) - position)
+                ))
+                while position in results:
+                    progress.update()
+                    yield results.pop(position)
+                    position += 1
+                if position < len(urls) and not work_batch(
+                    queue, session, cli_args
+                ):
+                    time.sleep(QUEUE_POLL)
+    finally:
+        queue.drop(run)
+        queue.close()
+
+
+# Воркер очереди.
+def run_worker(session, modes, cli_args):
+    """
+    Выполняет задания из очереди --queue, пока они не кончатся.
+
+    Воркер завершается, если заданий нет дольше --worker-idle секунд.
+    Режим worker запускается отдельно от других режимов.
+    """
+    if modes != [WORKER_MODE] or not getattr(cli_args, 'queue', None):
+        raise ValueError(
+            'Режим worker запускается отдельно от других режимов '
+            'и только с --queue'
+        )
+    queue = open_queue(cli_args.queue)
+    idle = getattr(cli_args, 'worker_idle', WORKER_IDLE)
+    processed = 0
+    last_job = time.monotonic()
+    try:
+        while time.monotonic() - last_job <= idle:
+            count = work_batch(queue, session, cli_args)
+            if count:
+                processed += count
+                last_job = time.monotonic()
+            else:
+                time.sleep(QUEUE_POLL)
+    finally:
+        queue.close()
+    logging.info(f'Воркер выполнил заданий: {processed}')
+
+
+# ヽ(´▽`)/
+
+# kaonashi
+# =^..^=______/
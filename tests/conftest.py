@@ -1,3 +1,4 @@
+import hashlib
 import pytest
 import sys
 from pathlib import Path
@@ -16,6 +17,11 @@ sys.path.append(str(SRC_DIR))
 
 MAIN_DOC_URL = 'https://docs.python.org/3/'
 PEP_URL = 'https://www.python.org/dev/peps/'
+PAGES_DIR = BASE_DIR / 'tests' / 'fixture_data' / 'pages'
+PAGE_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.json': 'application/json',
+}
 
 
 precode_files = ['constants.py', 'main.py', 'utils.py']
@@ -72,6 +78,63 @@ def mock_session(tempfile_session) -> CachedSession:
     yield mount_mock_adapter(tempfile_session)
 
 
+def page_urls(page_path: Path) -> List[str]:
+    relative = page_path.relative_to(PAGES_DIR).as_posix()
+    urls = ['https://' + relative]
+    if relative.endswith('index.html'):
+        urls.append('https://' + relative[:-len('index.html')])
+    return urls
+
+
+def page_response(content: bytes, content_type: str = PAGE_TYPES['.html']):
+    etag = '"{}"'.format(hashlib.md5(content).hexdigest())
+
+    def _page_response(request, context):
+        context.headers['Content-Type'] = content_type
+        context.headers['ETag'] = etag
+        if request.headers.get('If-None-Match') == etag:
+            context.status_code = 304
+            return b''
+        return content
+    return _page_response
+
+
+def get_pages_adapter() -> Adapter:
+    adapter = Adapter()
+    adapter.register_uri(
+        requests_mock.ANY,
+        requests_mock.ANY,
+        content=b'PK\x05\x06' + bytes(18),
+        status_code=200,
+    )
+    for page_path in PAGES_DIR.rglob('*'):
+        if page_path.suffix not in PAGE_TYPES:
+            continue
+        content = page_response(
+            page_path.read_bytes(), PAGE_TYPES[page_path.suffix]
+        )
+        for url in page_urls(page_path):
+            adapter.register_uri('GET', url, content=content)
+    return adapter
+
+
+@pytest.fixture(scope='function')
+def pages_session(tempfile_session) -> CachedSession:
+    """CachedSession serving synthetic pages from fixture_data/pages"""
+    adapter = get_pages_adapter()
+    for protocol in ('http://', 'https://'):
+        tempfile_session.mount(protocol, adapter)
+    tempfile_session.mock_adapter = adapter
+    yield tempfile_session
+
+
+@pytest.fixture
+def fixture_page():
+    def _fixture_page(path: str) -> str:
+        return (PAGES_DIR / path).read_text(encoding='utf-8')
+    return _fixture_page
+
+
 @pytest.fixture
 def response_page(mock_session):
     def _response_page(page):
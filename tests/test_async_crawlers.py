@@ -0,0 +1,143 @@
+import asyncio
+import time
+from argparse import Namespace
+
+import pytest
+import requests
+from requests_cache import CachedSession
+
+aiohttp = pytest.importorskip('aiohttp')
+
+try:
+    from src import main
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `main.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `main.py`'
+
+import async_crawlers
+from tests.conftest import MAIN_DOC_URL, get_pages_adapter
+
+
+class FakeOrigin:
+    """Ответ в духе aiohttp, который отдаёт адаптер requests_mock."""
+
+    def __init__(self, adapter, url, headers):
+        self.request = requests.Request('GET', url, headers=headers).prepare()
+        self.adapter = adapter
+
+    async def __aenter__(self):
+        try:
+            response = self.adapter.send(self.request)
+        except requests.ConnectionError as error:
+            raise aiohttp.ClientConnectionError() from error
+        self.status = response.status_code
+        self.reason = response.reason
+        self.headers = response.headers
+        self.url = response.url
+        self.body = response.content
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def read(self):
+        return self.body
+
+
+class FakeClient:
+    def __init__(self, adapter):
+        self.adapter = adapter
+
+    def get(self, url, headers=None):
+        return FakeOrigin(self.adapter, url, headers)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def async_adapter(monkeypatch):
+    adapter = get_pages_adapter()
+    monkeypatch.setattr(
+        async_crawlers, 'make_client',
+        lambda cli_args=None: FakeClient(adapter),
+    )
+    return adapter
+
+
+def async_args(**kwargs):
+    return Namespace(async_=True, backoff=0, **kwargs)
+
+
+@pytest.mark.parametrize('mode', ['whats-new', 'latest-versions', 'pep'])
+def test_async_modes(async_adapter, pages_session, mode):
+    expected = list(main.MODE_TO_FUNCTION[mode](
+        pages_session, Namespace(mode=mode, pep_source='html')
+    ))
+    session = CachedSession(backend='memory')
+    got = list(main.MODE_TO_FUNCTION[mode](
+        session, async_args(mode=mode, pep_source='html')
+    ))
+    assert got == expected, (
+        'Режим --async должен давать те же результаты, что и синхронный'
+    )
+
+
+def test_async_shares_cache(async_adapter):
+    session = CachedSession(backend='memory')
+    list(main.whats_new(session, async_args()))
+    requested = async_adapter.call_count
+    assert requested == 6
+    assert list(main.whats_new(session, async_args())) == list(
+        main.whats_new(session)
+    )
+    assert async_adapter.call_count == requested, (
+        'Повторный обход должен брать страницы из общего кеша сессии'
+    )
+
+
+def test_async_revalidates(async_adapter):
+    session = CachedSession(backend='memory', expire_after=0)
+    first = async_crawlers.async_get_response(session, MAIN_DOC_URL)
+    second = async_crawlers.async_get_response(session, MAIN_DOC_URL)
+    assert async_adapter.last_request.headers.get('If-None-Match'), (
+        'Устаревший ответ с ETag должен проверяться условным запросом'
+    )
+    assert second.from_cache and second.text == first.text
+
+
+def test_async_retries_and_skips(async_adapter):
+    session = CachedSession(backend='memory')
+    busy_url = MAIN_DOC_URL + 'whatsnew/3.12.html'
+    failed_url = MAIN_DOC_URL + 'whatsnew/3.11.html'
+    async_adapter.register_uri('GET', busy_url, [
+        {'status_code': 503, 'headers': {'Retry-After': '0'}},
+        {'content': get_pages_adapter().send(
+            requests.Request('GET', busy_url).prepare()
+        ).content},
+    ])
+    async_adapter.register_uri(
+        'GET', failed_url, exc=requests.exceptions.ConnectionError,
+    )
+    rows = list(main.whats_new(session, async_args(retries=2)))
+    links = [row[0] for row in rows[1:]]
+    assert busy_url in links, 'Ответ 503 должен повторяться'
+    assert failed_url not in links, (
+        'Статья, которую не удалось загрузить, должна пропускаться'
+    )
+
+
+def test_host_rate_limiter():
+    async def run():
+        limiter = async_crawlers.HostRateLimiter(rate=50)
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(limiter.wait('peps.python.org') for _ in range(5))
+        )
+        await limiter.wait('docs.python.org')
+        return time.perf_counter() - start
+
+    assert 0.08 <= asyncio.run(run()) < 0.5, (
+        'Запросы к одному хосту должны идти не чаще --rate в секунду'
+    )
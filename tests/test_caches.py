@@ -0,0 +1,77 @@
+import pytest
+from requests_cache import CachedSession
+
+try:
+    from src import caches
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `caches.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `caches.py`'
+
+from tests.conftest import MAIN_DOC_URL, get_pages_adapter
+
+PAGES = [
+    MAIN_DOC_URL,
+    MAIN_DOC_URL + 'download.html',
+    MAIN_DOC_URL + 'whatsnew/',
+]
+
+
+@pytest.fixture
+def cache_session(monkeypatch, tmp_path):
+    monkeypatch.setattr(caches, 'CACHE_NAME', str(tmp_path / 'http_cache'))
+
+    def _cache_session(backend, compression='gzip'):
+        session = CachedSession(
+            backend=caches.make_backend(backend, compression=compression)
+        )
+        adapter = get_pages_adapter()
+        for protocol in ('http://', 'https://'):
+            session.mount(protocol, adapter)
+        return session
+    return _cache_session
+
+
+def raw_values(session):
+    responses = session.cache.responses
+    with responses.connection() as connection:
+        return [
+            bytes(value) for value, in connection.execute(
+                f'SELECT value FROM {responses.table_name}'
+            )
+        ]
+
+
+def test_cache_compression(cache_session):
+    session = cache_session('sqlite')
+    content = session.get(MAIN_DOC_URL).content
+    values = raw_values(session)
+    assert values and all(
+        value.startswith(caches.GZIP_MAGIC) for value in values
+    ), 'Записи кеша должны храниться сжатыми'
+    response = session.get(MAIN_DOC_URL)
+    assert response.from_cache and response.content == content
+
+
+def test_cache_reads_uncompressed(cache_session):
+    content = cache_session('sqlite', 'none').get(MAIN_DOC_URL).content
+    response = cache_session('sqlite').get(MAIN_DOC_URL)
+    assert response.from_cache, (
+        'Записи, сохранённые без сжатия, должны читаться после его включения'
+    )
+    assert response.content == content
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'filesystem'])
+def test_cache_eviction(cache_session, backend):
+    session = cache_session(backend)
+    eviction = caches.CacheEviction(session, 0)
+    keys = {url: session.get(url).cache_key for url in PAGES}
+    session.get(PAGES[0])
+    eviction.max_size = sum(size for _, size in eviction.entries()) - 1
+    eviction.run()
+    assert not session.cache.contains(keys[PAGES[1]]), (
+        'Первой должна удаляться запись, к которой дольше не обращались'
+    )
+    assert session.cache.contains(keys[PAGES[0]])
+    assert session.cache.contains(keys[PAGES[2]])
@@ -0,0 +1,137 @@
+import json
+from argparse import Namespace
+
+import pytest
+import requests
+
+try:
+    import checkpoints
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `checkpoints.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `checkpoints.py`'
+
+from src import crawlers, extractors, main
+from tests.test_crawlers import PEP_LINKS
+
+
+@pytest.fixture
+def journal_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(checkpoints, 'BASE_DIR', tmp_path)
+    return tmp_path / 'checkpoints'
+
+
+def fetched_urls(pages_session):
+    return [
+        request.url for request in pages_session.mock_adapter.request_history
+    ]
+
+
+def test_resume_fetches_missing(journal_dir, pages_session):
+    cli_args = Namespace(mode='pep', checkpoint=True, workers=4)
+    expected = list(crawlers.crawl(
+        pages_session, PEP_LINKS, extractors.pep_card, workers=4,
+    ))
+    pages_session.cache.clear()
+    pages_session.mock_adapter.reset()
+    cards = crawlers.crawl_pages(
+        pages_session, PEP_LINKS, extractors.pep_card, cli_args,
+    )
+    for number, _ in enumerate(cards, 1):
+        if number == 20:
+            break
+    cards.close()
+    journal_path, = journal_dir.iterdir()
+    assert len(journal_path.read_text().splitlines()) == 20, (
+        'Прерванный обход должен оставлять журнал обработанных страниц'
+    )
+
+    pages_session.cache.clear()
+    pages_session.mock_adapter.reset()
+    cli_args.resume = True
+    got = list(crawlers.crawl_pages(
+        pages_session, PEP_LINKS, extractors.pep_card, cli_args,
+    ))
+    assert got == expected
+    assert sorted(fetched_urls(pages_session)) == PEP_LINKS[20:], (
+        'С --resume должны загружаться только страницы не из журнала'
+    )
+    assert not journal_path.exists(), (
+        'После завершённого обхода журнал должен удаляться'
+    )
+
+
+def test_resume_skips_failed_pages(journal_dir, pages_session):
+    cli_args = Namespace(mode='whats-new', checkpoint=True, workers=4)
+    expected = list(main.whats_new(pages_session, cli_args))
+    failed_url = 'https://docs.python.org/3/whatsnew/3.11.html'
+    pages_session.cache.clear()
+    pages_session.mock_adapter.register_uri(
+        'GET', failed_url, exc=requests.exceptions.ConnectTimeout,
+    )
+    rows = main.whats_new(pages_session, cli_args)
+    for row in rows:
+        if row[0] == failed_url:
+            break
+    rows.close()
+    pages_session.mock_adapter.reset()
+    pages_session.mock_adapter.register_uri(
+        'GET', failed_url, content=b'<h1>3.11</h1><dl>Pablo</dl>',
+    )
+    cli_args.resume = True
+    got = list(main.whats_new(pages_session, cli_args))
+    assert failed_url in fetched_urls(pages_session), (
+        'Страница, которую не удалось загрузить, не должна попадать в журнал'
+    )
+    assert (failed_url, '3.11', 'Pablo') in got
+    assert len(got) == len(expected)
+
+
+def test_journal_torn_line(journal_dir):
+    path = journal_dir / 'pep.pep_card.jsonl'
+    extractor = 'extractors.pep_card'
+    card = (('Status', 'Active'), ('Type', 'Process'))
+    journal = checkpoints.CheckpointJournal(path, extractor)
+    journal.record('https://peps.python.org/pep-0008/', card)
+    journal.record('https://peps.python.org/pep-0020/', card)
+    journal.close(completed=False)
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('{"extractor": "extractors.pep_card", "url": "ht')
+
+    journal = checkpoints.CheckpointJournal(path, extractor, resume=True)
+    assert journal.done == {
+        'https://peps.python.org/pep-0008/': card,
+        'https://peps.python.org/pep-0020/': card,
+    }, 'Записи журнала должны читаться до оборванной строки'
+    journal.record('https://peps.python.org/pep-0257/', card)
+    journal.close(completed=False)
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['url'] for line in lines] == [
+        'https://peps.python.org/pep-0008/',
+        'https://peps.python.org/pep-0020/',
+        'https://peps.python.org/pep-0257/',
+    ], 'Оборванная строка должна отрезаться перед дозаписью'
+
+
+def test_no_checkpoint(journal_dir, pages_session):
+    list(crawlers.crawl_pages(
+        pages_session, PEP_LINKS, extractors.pep_status,
+        Namespace(mode='pep', checkpoint=False, workers=4),
+    ))
+    assert not journal_dir.exists(), (
+        'С --no-checkpoint журнал вестись не должен'
+    )
+
+
+@pytest.mark.parametrize('mode', ['whats-new', 'pep'])
+def test_finished_mode_removes_journal(journal_dir, pages_session, mode,
+                                       caplog):
+    cli_args = Namespace(
+        mode=mode, pep_source='html', checkpoint=True, workers=4,
+    )
+    rows = list(main.MODES[mode](pages_session, cli_args))
+    assert len(rows) > 1
+    assert not list(journal_dir.iterdir()), (
+        'После успешно завершённого режима журнал должен удаляться'
+    )
+    assert 'продолжить можно с --resume' not in caplog.text
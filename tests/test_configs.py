@@ -64,3 +64,114 @@ def test_configure_argument_parser(
     assert got_action.help == help_str, (
         f'Укажите help-строку cli аргумента {got_action.dest}'
     )
+
+
+@pytest.mark.parametrize('file_format, compression, accepted', [
+    ('arrow', 'gzip', False),
+    ('arrow', 'zstd', True),
+    ('parquet', 'gzip', True),
+    ('csv', 'gzip', True),
+])
+def test_file_compression_checked(file_format, compression, accepted):
+    parser = configs.configure_argument_parser(['pep'])
+    argv = [
+        'pep', '-o', 'file', '--file-format', file_format,
+        '--file-compression', compression,
+    ]
+    if accepted:
+        assert parser.parse_args(argv).file_compression == compression
+    else:
+        with pytest.raises(SystemExit):
+            parser.parse_args(argv)
+
+
+def test_configure_session_expiration(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    parser = configs.configure_argument_parser(['pep'])
+    args = parser.parse_args([
+        'pep', '--expire-after', '600',
+        '--expire-url', 'peps.python.org/pep-0008/=5',
+    ])
+    session = configs.configure_session(args)
+    assert session.settings.expire_after == 600
+    patterns = list(session.settings.urls_expire_after)
+    assert patterns[0] == 'peps.python.org/pep-0008/', (
+        'Шаблоны из `--expire-url` должны проверяться раньше '
+        'шаблонов по умолчанию'
+    )
+    assert 'docs.python.org/3/archives/' in patterns
+
+
+def test_configure_session_revalidates(tmp_path, monkeypatch):
+    import conftest
+    monkeypatch.chdir(tmp_path)
+    parser = configs.configure_argument_parser(['pep'])
+    args = parser.parse_args([
+        'pep', '--expire-url', 'peps.python.org/pep-=0',
+    ])
+    url = 'https://peps.python.org/pep-0008/'
+    session = configs.configure_session(args)
+    adapter = conftest.get_pages_adapter()
+    session.mount('https://', adapter)
+    first = session.get(url)
+    second = session.get(url)
+    assert not first.from_cache
+    assert second.from_cache and second.text == first.text
+    assert adapter.request_history[-1].headers.get('If-None-Match'), (
+        'Устаревший ответ с ETag должен проверяться условным запросом'
+    )
+
+
+@pytest.fixture
+def flaky_server():
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            requests_seen.append(self.client_address)
+            failed = len(requests_seen) <= 2
+            body = b'busy' if failed else b'ok'
+            self.send_response(503 if failed else 200)
+            if failed:
+                self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.requests_seen = requests_seen
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_configure_session_retries(flaky_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    parser = configs.configure_argument_parser(['pep'])
+    args = parser.parse_args([
+        'pep', '--backoff', '0', '--cache-backend', 'memory', '-w', '4',
+    ])
+    session = configs.configure_session(args)
+    host, port = flaky_server.server_address
+    response = session.get(f'http://{host}:{port}/')
+    assert response.status_code == 200 and response.text == 'ok', (
+        'Ответы 503 должны повторяться'
+    )
+    assert len(flaky_server.requests_seen) == 3
+    assert len(set(flaky_server.requests_seen)) == 1, (
+        'Повторы должны идти через одно открытое соединение'
+    )
+    adapter = session.get_adapter('https://peps.python.org/')
+    assert adapter._pool_maxsize == 4, (
+        'Пул соединений должен быть не меньше числа потоков'
+    )
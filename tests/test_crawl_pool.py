@@ -0,0 +1,47 @@
+import pytest
+from bs4 import BeautifulSoup
+from requests_cache import CachedSession
+from requests_mock import Adapter
+
+try:
+    from src import crawlers
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `crawlers.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `crawlers.py`'
+
+URLS = [
+    f'https://docs.python.org/3/whatsnew/3.{minor}.html'
+    for minor in range(13)
+]
+
+
+def page_title(page):
+    soup = BeautifulSoup(page, features='lxml')
+    return soup.h1.text, soup.dl.text
+
+
+@pytest.fixture
+def articles():
+    adapter = Adapter()
+    for minor, url in enumerate(URLS):
+        adapter.register_uri(
+            'GET', url,
+            text=f'<h1>Что нового в 3.{minor}</h1><dl>Автор {minor}</dl>',
+        )
+    session = CachedSession(backend='memory')
+    session.mount('https://', adapter)
+    return session
+
+
+@pytest.mark.parametrize('processes', [1, 3])
+def test_crawl_processes_match_sequential(articles, processes):
+    expected = list(crawlers.crawl(articles, URLS, page_title, workers=4))
+    assert expected[3] == ('Что нового в 3.3', 'Автор 3')
+    got = list(crawlers.crawl(
+        articles, URLS, page_title, workers=4, processes=processes,
+    ))
+    assert got == expected, (
+        'Разбор в пуле процессов должен давать те же результаты '
+        'в том же порядке, что и разбор в основном процессе'
+    )
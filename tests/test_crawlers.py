@@ -0,0 +1,109 @@
+from argparse import Namespace
+from urllib.parse import urljoin
+
+import pytest
+import requests
+
+try:
+    from src import crawlers, extractors
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `crawlers.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `crawlers.py`'
+
+from src.constants import STREAM_CHUNK
+from tests.conftest import MAIN_DOC_URL, PAGES_DIR
+
+PEP_URL = 'https://peps.python.org/'
+PEP_LINKS = sorted(
+    urljoin(PEP_URL, path.parent.name + '/')
+    for path in (PAGES_DIR / 'peps.python.org').glob('pep-*/index.html')
+)
+
+
+def test_batched():
+    assert list(crawlers.batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(crawlers.batched([], 3)) == []
+
+
+@pytest.mark.parametrize('processes, chunk_size', [(2, 1), (2, 5), (3, 64)])
+def test_crawl_processes(pages_session, processes, chunk_size):
+    failed_url = PEP_LINKS[3]
+    pages_session.mock_adapter.register_uri(
+        'GET', failed_url, exc=requests.exceptions.ConnectionError,
+    )
+    expected = list(crawlers.crawl(
+        pages_session, PEP_LINKS, extractors.pep_status, workers=4,
+    ))
+    got = list(crawlers.crawl(
+        pages_session, PEP_LINKS, extractors.pep_status, workers=4,
+        processes=processes, chunk_size=chunk_size,
+    ))
+    assert got == expected, (
+        'Разбор в пуле процессов должен давать те же результаты '
+        'в том же порядке'
+    )
+    assert got[3] is None and all(got[:3])
+
+
+def test_fetch_all_bounded(pages_session):
+    responses = crawlers.fetch_all(pages_session, PEP_LINKS, workers=2)
+    next(responses)
+    assert pages_session.mock_adapter.call_count <= 5, (
+        'Вперёд должно загружаться не больше 2 * workers страниц'
+    )
+    responses.close()
+
+
+def test_shared_fetches(pages_session):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from src.utils import get_response
+
+    slow_url = PEP_LINKS[0]
+    body = (PAGES_DIR / 'peps.python.org/pep-0001/index.html').read_bytes()
+
+    def slow_page(request, context):
+        time.sleep(0.2)
+        return body
+
+    pages_session.mock_adapter.register_uri('GET', slow_url, content=slow_page)
+    crawlers.SharedFetches(pages_session)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(executor.map(
+            lambda _: get_response(pages_session, slow_url), range(4)
+        ))
+    assert all(response.content == body for response in responses)
+    assert pages_session.mock_adapter.call_count == 1, (
+        'Одновременные одинаковые запросы должны объединяться в один'
+    )
+
+
+def test_stream_crawl(pages_session):
+    import tracing
+    from src import main
+
+    expected = list(main.whats_new(pages_session))
+    pages_session.cache.clear()
+    tracer = tracing.enable_tracing()
+    try:
+        got = list(main.whats_new(pages_session, Namespace(stream=True)))
+    finally:
+        tracing.disable_tracing()
+    assert got == expected, (
+        'Потоковый разбор должен давать те же результаты, что и обычный'
+    )
+    article = MAIN_DOC_URL + 'whatsnew/3.12.html'
+    event, = [
+        event for event in tracer.events
+        if event['stage'] == 'fetch' and event['url'] == article
+    ]
+    size = (PAGES_DIR / 'docs.python.org/3/whatsnew/3.12.html').stat().st_size
+    assert event['bytes'] <= STREAM_CHUNK < size, (
+        'Страница статьи должна дочитываться только до h1 и dl'
+    )
+    assert not pages_session.cache.contains(url=article), (
+        'Недочитанная страница не должна попадать в кеш'
+    )
+    assert list(main.whats_new(pages_session, Namespace(stream=True))) == got
@@ -0,0 +1,211 @@
+import requests
+import requests_mock
+import pytest
+try:
+    from src import downloads
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `downloads.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `downloads.py`'
+
+from src.constants import CHUNK_SIZE
+
+ARCHIVE_URL = 'https://docs.python.org/3/archives/python-docs-pdf-a4.zip'
+ARCHIVE = bytes(range(256)) * 1024
+ETAG = '"archive-v1"'
+
+
+@pytest.fixture
+def archive_server(tempfile_session):
+    calls = []
+
+    def body(request, context):
+        calls.append(request)
+        context.headers['ETag'] = ETAG
+        range_header = request.headers.get('Range')
+        if range_header and request.headers.get('If-Range') == ETAG:
+            start = int(range_header.split('=')[1].rstrip('-'))
+            context.status_code = 206
+            return ARCHIVE[start:]
+        return ARCHIVE
+
+    adapter = requests_mock.Adapter()
+    adapter.register_uri('GET', ARCHIVE_URL, content=body)
+    adapter.register_uri(
+        'HEAD', ARCHIVE_URL,
+        headers={'Content-Length': str(len(ARCHIVE)), 'ETag': ETAG},
+    )
+    tempfile_session.mount('https://', adapter)
+    tempfile_session.calls = calls
+    return tempfile_session
+
+
+def test_download_file(archive_server, tmp_path):
+    path = tmp_path / 'python-docs-pdf-a4.zip'
+    got = downloads.download_file(archive_server, ARCHIVE_URL, path)
+    assert got == len(ARCHIVE)
+    assert path.read_bytes() == ARCHIVE
+    assert not path.with_name(path.name + '.part').exists()
+    assert not archive_server.cache.contains(url=ARCHIVE_URL), (
+        'Архив не должен сохраняться в кеш requests_cache'
+    )
+
+
+def test_download_file_skips_existing(archive_server, tmp_path):
+    path = tmp_path / 'python-docs-pdf-a4.zip'
+    downloads.download_file(archive_server, ARCHIVE_URL, path)
+    got = downloads.download_file(archive_server, ARCHIVE_URL, path)
+    assert got == 0
+    assert len(archive_server.calls) == 1
+
+
+def test_download_file_resumes(archive_server, tmp_path):
+    path = tmp_path / 'python-docs-pdf-a4.zip'
+    path.with_name(path.name + '.part').write_bytes(ARCHIVE[:1000])
+    path.with_name(path.name + '.part.etag').write_text(ETAG)
+    got = downloads.download_file(archive_server, ARCHIVE_URL, path)
+    assert got == len(ARCHIVE) - 1000
+    assert archive_server.calls[0].headers['Range'] == 'bytes=1000-'
+    assert path.read_bytes() == ARCHIVE
+
+
+def test_download_file_restarts_on_new_etag(archive_server, tmp_path):
+    path = tmp_path / 'python-docs-pdf-a4.zip'
+    path.with_name(path.name + '.part').write_bytes(b'stale bytes')
+    path.with_name(path.name + '.part.etag').write_text('"archive-v0"')
+    downloads.download_file(archive_server, ARCHIVE_URL, path)
+    assert 'Range' not in archive_server.calls[0].headers
+    assert path.read_bytes() == ARCHIVE
+
+
+def test_download_all(archive_server, tmp_path):
+    urls = [ARCHIVE_URL, ARCHIVE_URL.replace('pdf-a4.zip', 'html.zip')]
+    adapter = archive_server.get_adapter(ARCHIVE_URL)
+    adapter.register_uri('GET', urls[1], content=ARCHIVE[:4096])
+    adapter.register_uri('HEAD', urls[1], status_code=405)
+    got = downloads.download_all(archive_server, urls, tmp_path, workers=2)
+    assert len(got) == 3
+    assert [row[0] for row in got[1:]] == [
+        'python-docs-pdf-a4.zip', 'python-docs-html.zip'
+    ]
+    assert got[1][1] == len(ARCHIVE)
+    assert got[2][1] == 4096
+
+
+class BrokenBody:
+    closed = False
+
+    def __init__(self, data):
+        self.data = data
+        self.sent = False
+
+    def read(self, size=-1):
+        if self.sent:
+            raise requests.exceptions.ConnectionError('Соединение оборвано')
+        self.sent = True
+        return self.data
+
+    def close(self):
+        self.closed = True
+
+
+def test_download_file_connection_error(archive_server, tmp_path, caplog):
+    adapter = archive_server.get_adapter(ARCHIVE_URL)
+    adapter.register_uri(
+        'HEAD', ARCHIVE_URL, exc=requests.exceptions.ConnectionError,
+    )
+    path = tmp_path / 'python-docs-pdf-a4.zip'
+    assert downloads.download_file(archive_server, ARCHIVE_URL, path) is None
+    assert ARCHIVE_URL in caplog.text, 'Ошибка загрузки должна попадать в лог'
+    assert not path.exists()
+
+
+def test_download_file_broken_stream_resumes(archive_server, tmp_path):
+    adapter = archive_server.get_adapter(ARCHIVE_URL)
+    adapter.register_uri(
+        'GET', ARCHIVE_URL, body=BrokenBody(ARCHIVE[:CHUNK_SIZE]),
+        headers={'ETag': ETAG},
+    )
+    path = tmp_path / 'python-docs-pdf-a4.zip'
+    part_path = path.with_name(path.name + '.part')
+    assert downloads.download_file(archive_server, ARCHIVE_URL, path) is None
+    assert part_path.read_bytes() == ARCHIVE[:CHUNK_SIZE], (
+        'Недокачанный файл .part должен оставаться для докачки'
+    )
+    calls = archive_server.calls
+    archive_server.mount('https://', requests_mock.Adapter())
+    server = archive_server.get_adapter(ARCHIVE_URL)
+    server.register_uri(
+        'HEAD', ARCHIVE_URL,
+        headers={'Content-Length': str(len(ARCHIVE)), 'ETag': ETAG},
+    )
+
+    def body(request, context):
+        calls.append(request)
+        context.status_code = 206
+        return ARCHIVE[CHUNK_SIZE:]
+
+    server.register_uri('GET', ARCHIVE_URL, content=body)
+    got = downloads.download_file(archive_server, ARCHIVE_URL, path)
+    assert got == len(ARCHIVE) - CHUNK_SIZE
+    assert calls[-1].headers['Range'] == f'bytes={CHUNK_SIZE}-'
+    assert path.read_bytes() == ARCHIVE
+
+
+def test_download_all_collects_failures(archive_server, tmp_path,
+                                        monkeypatch):
+    urls = [
+        ARCHIVE_URL,
+        ARCHIVE_URL.replace('pdf-a4.zip', 'html.zip'),
+        ARCHIVE_URL.replace('pdf-a4.zip', 'epub.zip'),
+    ]
+    adapter = archive_server.get_adapter(ARCHIVE_URL)
+    adapter.register_uri(
+        'HEAD', urls[1], exc=requests.exceptions.ConnectionError,
+    )
+    download_file = downloads.download_file
+
+    def failing_download(session, url, path, position=None):
+        if url == urls[2]:
+            raise OSError('Нет места на диске')
+        return download_file(session, url, path, position)
+
+    monkeypatch.setattr(downloads, 'download_file', failing_download)
+    got = downloads.download_all(archive_server, urls, tmp_path, workers=3)
+    assert [(row[0], row[-1]) for row in got[1:]] == [
+        ('python-docs-pdf-a4.zip', 'Загружен'),
+        ('python-docs-html.zip', 'Ошибка загрузки'),
+        ('python-docs-epub.zip', 'Ошибка: Нет места на диске'),
+    ], 'Сбой одного архива не должен терять итоги остальных'
+    assert got[1][1] == len(ARCHIVE)
+
+
+def test_download_file_failed_new_version(archive_server, tmp_path):
+    path = tmp_path / 'python-docs-pdf-a4.zip'
+    downloads.download_file(archive_server, ARCHIVE_URL, path)
+    assert path.with_name(path.name + '.etag').read_text() == ETAG
+    new_archive = ARCHIVE[::-1]
+    adapter = archive_server.get_adapter(ARCHIVE_URL)
+    adapter.register_uri(
+        'HEAD', ARCHIVE_URL,
+        headers={'Content-Length': str(len(new_archive)), 'ETag': '"v2"'},
+    )
+    adapter.register_uri('GET', ARCHIVE_URL, status_code=503)
+    assert downloads.download_file(archive_server, ARCHIVE_URL, path) is None
+    assert path.with_name(path.name + '.etag').read_text() == ETAG, (
+        'ETag готового файла меняется только после загрузки новой версии'
+    )
+
+    got = downloads.download_file(archive_server, ARCHIVE_URL, path)
+    assert got is None, (
+        'Старый файл не должен считаться загруженной новой версией'
+    )
+    adapter.register_uri(
+        'GET', ARCHIVE_URL, content=new_archive, headers={'ETag': '"v2"'},
+    )
+    assert downloads.download_file(
+        archive_server, ARCHIVE_URL, path
+    ) == len(new_archive)
+    assert path.read_bytes() == new_archive
+    assert path.with_name(path.name + '.etag').read_text() == '"v2"'
+    assert not path.with_name(path.name + '.part.etag').exists()
@@ -0,0 +1,132 @@
+from argparse import Namespace
+
+import pytest
+
+from conftest import PAGES_DIR
+try:
+    from src import extractors, lxml_extractors, main, stream_extractors
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `extractors.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `extractors.py`'
+
+WHATS_NEW_PAGES = sorted(
+    path.relative_to(PAGES_DIR).as_posix()
+    for path in (PAGES_DIR / 'docs.python.org/3/whatsnew').glob('*.html')
+    if path.name != 'index.html'
+)
+PEP_PAGES = sorted(
+    path.relative_to(PAGES_DIR).as_posix()
+    for path in (PAGES_DIR / 'peps.python.org').glob('pep-*/index.html')
+)
+EXTRACTOR_PAGES = [
+    ('whats_new_index', 'docs.python.org/3/whatsnew/index.html'),
+    ('latest_versions_links', 'docs.python.org/3/index.html'),
+    ('archive_links', 'docs.python.org/3/download.html'),
+    ('pep_index', 'peps.python.org/index.html'),
+    *[('whats_new_page', page) for page in WHATS_NEW_PAGES],
+    *[('pep_status', page) for page in PEP_PAGES],
+    *[('pep_card', page) for page in PEP_PAGES],
+]
+
+
+def test_engines_share_names():
+    names = {
+        name for name in dir(extractors)
+        if callable(getattr(extractors, name)) and not name.startswith('_')
+        and getattr(extractors, name).__module__ == extractors.__name__
+    }
+    missing = [name for name in names if not hasattr(lxml_extractors, name)]
+    assert not missing, (
+        f'В модуле `lxml_extractors.py` нет функций {missing}'
+    )
+
+
+@pytest.mark.parametrize('name, page', EXTRACTOR_PAGES)
+def test_engines_parity(fixture_page, name, page):
+    text = fixture_page(page)
+    expected = getattr(extractors, name)(text)
+    got = getattr(lxml_extractors, name)(text)
+    assert got == expected, (
+        f'Движок lxml для `{name}` на странице {page} '
+        'расходится с эталонным движком bs4'
+    )
+    assert [type(item) for item in expected or ()] == [
+        type(item) for item in got or ()
+    ]
+
+
+@pytest.mark.parametrize('chunk_size', [100, 8 * 1024])
+@pytest.mark.parametrize('name, page', [
+    (name, page) for name, page in EXTRACTOR_PAGES
+    if hasattr(stream_extractors, name)
+])
+def test_stream_parity(name, page, chunk_size):
+    content = (PAGES_DIR / page).read_bytes()
+    chunks = (
+        content[start:start + chunk_size]
+        for start in range(0, len(content), chunk_size)
+    )
+    assert getattr(stream_extractors, name)(chunks) == (
+        getattr(lxml_extractors, name)(content)
+    ), (
+        f'Потоковая `{name}` на странице {page} расходится с движком lxml'
+    )
+
+
+def test_stream_stops_early():
+    content = (PAGES_DIR / WHATS_NEW_PAGES[-1]).read_bytes()
+    chunks = iter([content[:8 * 1024], content[8 * 1024:]])
+    stream_extractors.whats_new_page(chunks)
+    assert next(chunks, None) is not None, (
+        'Разбор должен останавливаться, как только найдены h1 и dl'
+    )
+
+
+def test_stream_missing_tag():
+    chunks = iter([b'<html><body><p>You are breathtaken</p></body></html>'])
+    with pytest.raises(BaseException) as excinfo:
+        stream_extractors.whats_new_page(chunks)
+    assert excinfo.typename == 'ParserFindTagException'
+
+
+@pytest.mark.parametrize('name', [
+    'whats_new_index', 'whats_new_page', 'archive_links',
+    'pep_index', 'pep_status', 'pep_card',
+])
+def test_engines_parity_missing_tag(name):
+    text = '<html><body><p>You are breathtaken</p></body></html>'
+    for engine in (extractors, lxml_extractors):
+        with pytest.raises(BaseException) as excinfo:
+            getattr(engine, name)(text)
+        assert excinfo.typename == 'ParserFindTagException'
+
+
+@pytest.mark.parametrize(
+    'mode', ['whats-new', 'latest-versions', 'pep', 'pep-details']
+)
+def test_engines_parity_results(pages_session, mode):
+    results = [
+        list(main.MODES[mode](
+            pages_session, Namespace(
+                mode=mode, engine=engine, workers=4, pep_source='html'
+            )
+        ))
+        for engine in ('bs4', 'lxml')
+    ]
+    assert len(results[0]) > 1
+    assert repr(results[0]) == repr(results[1]), (
+        f'Таблицы результатов режима {mode} для движков bs4 и lxml '
+        'должны совпадать'
+    )
+
+
+@pytest.mark.parametrize('name, page', EXTRACTOR_PAGES)
+def test_extractors_accept_bytes(name, page):
+    content = (PAGES_DIR / page).read_bytes()
+    for engine in (extractors, lxml_extractors):
+        extract = getattr(engine, name)
+        assert extract(content) == extract(content.decode('utf-8')), (
+            f'`{name}` должна давать одинаковый результат '
+            'для байтов и текста страницы'
+        )
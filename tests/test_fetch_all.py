@@ -0,0 +1,75 @@
+import time
+from threading import Lock
+
+import pytest
+import requests
+from requests_cache import CachedSession
+from requests_mock import Adapter
+
+try:
+    from src import crawlers
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `crawlers.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `crawlers.py`'
+
+URLS = [f'https://peps.python.org/pep-{number:04}/' for number in range(12)]
+
+
+class SlowPages:
+
+    def __init__(self):
+        self.lock = Lock()
+        self.in_flight = self.max_in_flight = 0
+
+    def __call__(self, request, context):
+        number = URLS.index(request.url)
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.002 * (len(URLS) - number))
+        with self.lock:
+            self.in_flight -= 1
+        return f'<h1>PEP {number}</h1>'
+
+
+@pytest.fixture
+def slow_pages():
+    pages = SlowPages()
+    adapter = Adapter()
+    for url in URLS:
+        adapter.register_uri('GET', url, text=pages)
+    session = CachedSession(backend='memory')
+    session.mount('https://', adapter)
+    session.slow_pages = pages
+    session.mock_adapter = adapter
+    return session
+
+
+def test_fetch_all_order(slow_pages):
+    responses = list(crawlers.fetch_all(slow_pages, URLS, workers=4))
+    assert [response.text for response in responses] == [
+        f'<h1>PEP {number}</h1>' for number in range(len(URLS))
+    ], 'Ответы должны идти в порядке ссылок, а не в порядке загрузки'
+
+
+def test_fetch_all_workers(slow_pages):
+    list(crawlers.fetch_all(slow_pages, URLS, workers=3))
+    assert 1 < slow_pages.slow_pages.max_in_flight <= 3, (
+        'Одновременно должно выполняться не больше workers запросов'
+    )
+
+
+def test_fetch_all_failed_page(slow_pages, caplog):
+    slow_pages.mock_adapter.register_uri(
+        'GET', URLS[5], exc=requests.exceptions.ConnectionError,
+    )
+    responses = list(crawlers.fetch_all(slow_pages, URLS, workers=4))
+    assert responses[5] is None, (
+        'Вместо страницы, которую не удалось загрузить, отдаётся None'
+    )
+    assert all(
+        response is not None
+        for number, response in enumerate(responses) if number != 5
+    ), 'Ошибка одной загрузки не должна прерывать остальные'
+    assert URLS[5] in caplog.text, 'Ошибка загрузки должна попадать в лог'
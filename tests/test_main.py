@@ -1,4 +1,6 @@
+import sys
 import pytest
+from argparse import Namespace
 from pathlib import Path
 try:
     from src import main
@@ -31,7 +33,7 @@ def test_main_file():
 
 
 def test_whats_new(mock_session):
-    got = main.whats_new(mock_session)
+    got = list(main.whats_new(mock_session))
     header = ('Ссылка на статью', 'Заголовок', 'Редактор, Автор')
     assert isinstance(got, list), (
         'Функция `whats_new` должна возвращать объект типа `list`'
@@ -53,7 +55,7 @@ def test_whats_new(mock_session):
 
 @pytest.mark.skip()
 def test_latest_versions(mock_session):
-    got = main.latest_versions(mock_session)
+    got = list(main.latest_versions(mock_session))
     assert isinstance(got, list), (
         'Функция `latest_versions` должна возвращать объект типа `list`'
     )
@@ -140,3 +142,94 @@ def test_mode_to_function():
             'В модуле `main.py` в объекте `MODE_TO_FUNCTION` '
             f'нет значения {func}'
         )
+
+
+def test_whats_new_skips_failed_pages(pages_session):
+    import requests
+    failed_url = 'https://docs.python.org/3/whatsnew/3.11.html'
+    expected = [
+        row for row in main.whats_new(pages_session) if row[0] != failed_url
+    ]
+    pages_session.cache.clear()
+    pages_session.mock_adapter.register_uri(
+        'GET', failed_url, exc=requests.exceptions.ConnectTimeout,
+    )
+    assert list(main.whats_new(pages_session)) == expected, (
+        'Статья, которую не удалось загрузить, должна пропускаться, '
+        'а обход — продолжаться'
+    )
+
+
+def test_pep_details(pages_session):
+    from src.pep_records import PEP_DETAILS_HEADER, PepRecord
+    summary = list(main.pep(pages_session, Namespace(pep_source='html')))
+    requests_before = pages_session.mock_adapter.call_count
+    rows = list(main.pep_details(pages_session))
+    assert pages_session.mock_adapter.call_count == requests_before, (
+        'Режим pep-details должен брать страницы PEP из кеша режима pep'
+    )
+    assert rows[0] == PEP_DETAILS_HEADER
+    pep_8 = next(row for row in rows[1:] if row[0] == 8)
+    record = dict(zip(PEP_DETAILS_HEADER, pep_8))
+    assert record['Author'] == 'Guido van Rossum, Barry Warsaw, Alyssa Coghlan'
+    assert record['Status'] == 'Active'
+    assert record['Post-History'] == '05-Jul-2001, 01-Aug-2013'
+    assert record['Python-Version'] is None
+    total = dict(summary)['Total']
+    assert len(rows) - 1 == total, (
+        'В таблице pep-details должна быть строка для каждого PEP'
+    )
+    assert not hasattr(PepRecord(8, ''), '__dict__'), (
+        'PepRecord должен хранить поля в __slots__'
+    )
+
+
+def test_pep_sources(pages_session):
+    html = list(main.pep(pages_session, Namespace(pep_source='html')))
+    pages_session.mock_adapter.reset()
+    json = list(main.pep(pages_session, Namespace(pep_source='json')))
+    assert json == html, (
+        'Таблица статусов из api/peps.json должна совпадать с таблицей '
+        'по страницам PEP'
+    )
+    assert [
+        request.url for request in pages_session.mock_adapter.request_history
+    ] == ['https://peps.python.org/api/peps.json'], (
+        'Источник json должен получать все статусы одним запросом'
+    )
+    assert list(main.pep(pages_session)) == json, (
+        'По умолчанию статусы должны браться из api/peps.json'
+    )
+
+
+def test_load_json_fallback(monkeypatch):
+    from src import utils
+    content = '{"8": {"status": "Active", "title": "Стиль"}}'.encode()
+    expected = {'8': {'status': 'Active', 'title': 'Стиль'}}
+    assert utils.load_json(content) == expected
+    monkeypatch.setitem(sys.modules, 'orjson', None)
+    assert utils.load_json(content) == expected, (
+        'Без orjson документ должен разбирать модуль json'
+    )
+
+
+def test_expand_modes():
+    assert main.expand_modes(['all', 'pep']) == list(main.MODES), (
+        'Режим all должен разворачиваться во все режимы без повторов'
+    )
+    assert main.expand_modes(['pep', 'whats-new']) == ['pep', 'whats-new']
+
+
+def test_run_modes_shares_fetches(monkeypatch, tmp_path, capsys,
+                                  pages_session):
+    monkeypatch.setattr(main, 'BASE_DIR', tmp_path)
+    modes = ['whats-new', 'latest-versions', 'pep', 'pep-details']
+    cli_args = Namespace(output=None, workers=4)
+    main.run_modes(pages_session, modes, cli_args)
+    out = capsys.readouterr().out
+    for mode in modes:
+        header = ' '.join(next(iter(main.MODES[mode](pages_session))))
+        assert header in out, f'Нет результатов режима {mode}'
+    assert out.index('Ссылка на статью') < out.index('Cтатус'), (
+        'Результаты режимов выводятся в порядке командной строки'
+    )
@@ -0,0 +1,200 @@
+import inspect
+import sqlite3
+from argparse import Namespace
+from importlib import import_module
+
+import pytest
+
+try:
+    import memo
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `memo.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `memo.py`'
+
+import extractors
+from src import crawlers, main
+from tests.conftest import PAGES_DIR
+from tests.test_crawlers import PEP_LINKS
+
+CALLS = []
+
+
+def counted_status(content):
+    CALLS.append(content)
+    return extractors.pep_status(content)
+
+
+@pytest.fixture
+def memo_path(tmp_path):
+    path = tmp_path / 'memo.sqlite3'
+    yield path
+    memo.disable_memo()
+    memo.extractor_version.cache_clear()
+
+
+def test_memo_skips_parsing(memo_path, pages_session):
+    memo.enable_memo(memo_path, 2 ** 20)
+    CALLS.clear()
+    first = list(crawlers.crawl(
+        pages_session, PEP_LINKS, counted_status, workers=4,
+    ))
+    assert len(CALLS) == len(PEP_LINKS)
+    memo.disable_memo()
+
+    memo.enable_memo(memo_path, 2 ** 20)
+    CALLS.clear()
+    second = list(crawlers.crawl(
+        pages_session, PEP_LINKS, counted_status, workers=4,
+    ))
+    assert second == first
+    assert not CALLS, (
+        'Неизменившиеся страницы не должны разбираться повторно'
+    )
+    assert memo.memo.hits == len(PEP_LINKS)
+
+
+def test_memo_modes(memo_path, pages_session):
+    cli_args = Namespace(pep_source='html', workers=4)
+    expected = {
+        mode: list(main.MODES[mode](pages_session, cli_args))
+        for mode in ('whats-new', 'latest-versions', 'pep', 'pep-details')
+    }
+    for _ in range(2):
+        memo.enable_memo(memo_path, 2 ** 20)
+        for mode, rows in expected.items():
+            assert list(main.MODES[mode](pages_session, cli_args)) == rows
+        memo.disable_memo()
+
+
+def test_memo_processes(memo_path, pages_session):
+    memo.enable_memo(memo_path, 2 ** 20)
+    expected = list(crawlers.crawl(
+        pages_session, PEP_LINKS, extractors.pep_card, workers=4,
+    ))
+    got = list(crawlers.crawl(
+        pages_session, PEP_LINKS, extractors.pep_card, workers=4,
+        processes=2, chunk_size=5,
+    ))
+    assert got == expected, (
+        'Результаты из памятки и пула процессов должны идти по порядку'
+    )
+    assert memo.memo.hits == len(PEP_LINKS)
+
+
+def test_memo_extractor_version(memo_path, monkeypatch):
+    page = (PAGES_DIR / 'peps.python.org/pep-0008/index.html').read_bytes()
+    store = memo.enable_memo(memo_path, 2 ** 20)
+    url = 'https://peps.python.org/pep-0008/'
+    for extract in (extractors.pep_status, extractors.pep_card):
+        memo.memo_extract(url, page, extract)
+    version = memo.extractor_version
+    monkeypatch.setattr(
+        memo, 'extractor_version',
+        lambda extract: (
+            'changed' if extract is extractors.pep_card else version(extract)
+        ),
+    )
+    assert store.get(store.key(url, page, extractors.pep_status)) == 'Active'
+    assert store.get(store.key(url, page, extractors.pep_card)) is memo.MISS, (
+        'Изменение функции должно сбрасывать только её записи'
+    )
+    assert store.get(store.key(url, b'changed', extractors.pep_status)) is (
+        memo.MISS
+    ), 'Изменившаяся страница должна разбираться заново'
+
+
+@pytest.mark.parametrize('changed, expected_miss', [
+    ('make_soup', True),
+    ('find_tag', True),
+    ('load_json', False),
+    ('find_node', False),
+])
+def test_memo_helper_change(memo_path, monkeypatch, changed, expected_miss):
+    page = (PAGES_DIR / 'peps.python.org/pep-0008/index.html').read_bytes()
+    store = memo.enable_memo(memo_path, 2 ** 20)
+    url = 'https://peps.python.org/pep-0008/'
+    memo.memo_extract(url, page, extractors.pep_status)
+    getsource = inspect.getsource
+
+    def changed_source(obj):
+        source = getsource(obj)
+        if getattr(obj, '__name__', None) == changed:
+            return source + '\n# Изменённый помощник.\n'
+        return source
+
+    monkeypatch.setattr(inspect, 'getsource', changed_source)
+    memo.extractor_version.cache_clear()
+    got = store.get(store.key(url, page, extractors.pep_status))
+    assert (got is memo.MISS) == expected_miss, (
+        'Памятку должна сбрасывать правка только вызываемых помощников'
+    )
+
+
+@pytest.mark.parametrize('target, expected_miss', [
+    ('pep-page', True),
+    ('download', False),
+])
+def test_memo_parse_target_change(memo_path, monkeypatch, target,
+                                  expected_miss):
+    page = (PAGES_DIR / 'peps.python.org/pep-0008/index.html').read_bytes()
+    store = memo.enable_memo(memo_path, 2 ** 20)
+    url = 'https://peps.python.org/pep-0008/'
+    memo.memo_extract(url, page, extractors.pep_status)
+    monkeypatch.setitem(memo.PARSE_TARGETS, target, ('div', {}))
+    memo.extractor_version.cache_clear()
+    got = store.get(store.key(url, page, extractors.pep_status))
+    assert (got is memo.MISS) == expected_miss, (
+        'Памятку должна сбрасывать правка только своей записи PARSE_TARGETS'
+    )
+
+
+def test_memo_dependencies_exist():
+    for engine in ('extractors', 'lxml_extractors'):
+        module = import_module(engine)
+        for name, function in vars(module).items():
+            if name.startswith('_') or not inspect.isfunction(function):
+                continue
+            if function.__module__ != engine or name == 'parse_document':
+                continue
+            target, helpers = memo.MEMO_DEPENDENCIES[f'{engine}.{name}']
+            assert target is None or target in memo.PARSE_TARGETS
+            for helper in helpers:
+                module_name, helper_name = helper.rsplit('.', 1)
+                assert callable(
+                    getattr(import_module(module_name), helper_name)
+                )
+
+
+def test_memo_version(memo_path, monkeypatch):
+    version = memo.extractor_version(extractors.pep_status)
+    monkeypatch.setattr(memo, 'MEMO_VERSION', memo.MEMO_VERSION + 1)
+    memo.extractor_version.cache_clear()
+    assert memo.extractor_version(extractors.pep_status) != version, (
+        'Увеличение MEMO_VERSION должно сбрасывать всю памятку'
+    )
+
+
+def test_memo_none_result(memo_path):
+    store = memo.enable_memo(memo_path, 2 ** 20)
+    content = b'<dl class="rfc2822 field-list simple"></dl>'
+    assert memo.memo_extract('url', content, extractors.pep_status) is None
+    key = store.key('url', content, extractors.pep_status)
+    assert store.get(key) is None
+
+
+def test_memo_eviction(memo_path):
+    store = memo.enable_memo(memo_path, 2 ** 20)
+    for number in range(20):
+        key = store.key(f'url-{number}', b'page', extractors.pep_status)
+        store.put(key, 'x' * 100)
+    store.max_size = 1000
+    memo.disable_memo()
+    with sqlite3.connect(memo_path) as connection:
+        urls = [
+            url for url, in connection.execute('SELECT url FROM results')
+        ]
+    assert 0 < len(urls) < 20, 'Памятка должна ужиматься до лимита'
+    assert 'url-19' in urls and 'url-0' not in urls, (
+        'Удаляться должны давно использованные записи'
+    )
@@ -1,3 +1,5 @@
+import gzip
+import json
 from datetime import datetime
 from typing import Optional
 from pathlib import Path
@@ -90,3 +92,83 @@ def test_output_file():
     assert hasattr(outputs, 'file_output'), (
         'Напишите функцию `file_output` в модуле `output.py`'
     )
+
+
+def test_control_output_streams(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    seen = []
+
+    def rows():
+        yield ('Cтатус', 'Количество')
+        yield ('Active', '1')
+        seen.append(capsys.readouterr().out)
+        for path in Path(tmp_path).glob('results/*.csv'):
+            seen.append(path.read_text(encoding='utf-8'))
+        yield ('Total', '1')
+
+    outputs.control_output(rows(), cli_args('pep', None))
+    assert seen[0] == 'Cтатус Количество\nActive 1\n', (
+        'Построчный вывод должен печатать строки по мере поступления'
+    )
+    seen.clear()
+    outputs.control_output(rows(), cli_args('pep', 'file'))
+    assert seen[1] == (
+        '"Cтатус","Количество"\n"Active","1"\n'
+    ), 'Запись в файл должна сохранять строки по мере поступления'
+
+
+PEP_ROWS = [('Cтатус', 'Количество'), ('Active', '3'), ('Total', 4)]
+
+
+@pytest.mark.parametrize('compression, opener', [
+    (None, open),
+    ('gzip', gzip.open),
+])
+def test_file_output_jsonl(monkeypatch, tmp_path, compression, opener):
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    cli_arg = Namespace(
+        mode='pep', output='file', file_format='jsonl',
+        file_compression=compression,
+    )
+    outputs.control_output(iter(PEP_ROWS), cli_arg)
+    output_file, = Path(tmp_path).glob('results/*')
+    suffix = '.jsonl.gz' if compression else '.jsonl'
+    assert output_file.name.endswith(suffix), (
+        'Расширение файла должно соответствовать формату и сжатию'
+    )
+    with opener(output_file, 'rt', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert records == [
+        {'Cтатус': 'Active', 'Количество': 3},
+        {'Cтатус': 'Total', 'Количество': 4},
+    ], 'Числовые столбцы в JSON Lines должны записываться числами'
+
+
+@pytest.mark.parametrize('file_format, compression', [
+    ('parquet', None),
+    ('parquet', 'gzip'),
+    ('arrow', None),
+])
+def test_file_output_columnar(monkeypatch, tmp_path, file_format,
+                              compression):
+    pyarrow = pytest.importorskip('pyarrow')
+    from pyarrow import parquet
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    monkeypatch.setattr(outputs, 'FILE_BATCH', 1)
+    cli_arg = Namespace(
+        mode='pep', output='file', file_format=file_format,
+        file_compression=compression,
+    )
+    outputs.control_output(iter(PEP_ROWS), cli_arg)
+    output_file, = Path(tmp_path).glob(f'results/*.{file_format}')
+    if file_format == 'parquet':
+        table = parquet.read_table(output_file)
+    else:
+        table = pyarrow.ipc.open_file(output_file).read_all()
+    assert table.schema.types == [pyarrow.string(), pyarrow.int64()], (
+        'Столбец количества должен иметь целочисленный тип'
+    )
+    assert table.to_pydict() == {
+        'Cтатус': ['Active', 'Total'], 'Количество': [3, 4],
+    }
+
@@ -0,0 +1,46 @@
+from argparse import Namespace
+from pathlib import Path
+
+try:
+    from src import main
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `main.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `main.py`'
+
+
+def pep_requests(session):
+    return [
+        request for request in session.mock_adapter.request_history
+        if '/pep-' in request.url
+    ]
+
+
+def test_pep_incremental(monkeypatch, tmp_path, pages_session):
+    monkeypatch.setattr(main, 'BASE_DIR', Path(tmp_path))
+    cli_args = Namespace(mode='pep', incremental=True, workers=4)
+    expected = list(
+        main.pep(pages_session, Namespace(mode='pep', workers=4))
+    )
+    pages_session.mock_adapter.reset()
+
+    first = list(main.pep(pages_session, cli_args))
+    assert first == expected, (
+        'Инкрементальный обход должен давать ту же таблицу, что и полный'
+    )
+    assert (tmp_path / 'pep_state.sqlite3').exists()
+    assert all(
+        'If-None-Match' not in request.headers
+        for request in pep_requests(pages_session)
+    )
+    pages_session.mock_adapter.reset()
+
+    second = list(main.pep(pages_session, cli_args))
+    assert second == expected
+    requests = pep_requests(pages_session)
+    assert requests and all(
+        'If-None-Match' in request.headers for request in requests
+    ), 'Повторный обход должен отправлять условные запросы'
+    assert {
+        request.headers.get('Cache-Control') for request in requests
+    } == {'no-store'}
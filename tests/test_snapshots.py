@@ -0,0 +1,70 @@
+import zipfile
+from argparse import Namespace
+
+import pytest
+
+try:
+    from src import configs, main, snapshots
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `snapshots.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `snapshots.py`'
+
+from src.utils import get_response
+from tests.conftest import MAIN_DOC_URL
+
+
+def run_modes(session):
+    results = {}
+    for mode, mode_function in main.MODES.items():
+        rows = mode_function(session, Namespace(mode=mode, workers=4))
+        results[mode] = None if rows is None else list(rows)
+    return results
+
+
+@pytest.fixture
+def snapshot(monkeypatch, tmp_path, pages_session):
+    monkeypatch.setattr(main, 'BASE_DIR', tmp_path)
+    archive = tmp_path / 'snapshot.zip'
+    writer = snapshots.SnapshotWriter(archive)
+    pages_session.hooks['response'].append(writer.record)
+    expected = run_modes(pages_session)
+    writer.close()
+    return archive, expected
+
+
+def test_snapshot_replay(snapshot, monkeypatch, tmp_path):
+    archive, expected = snapshot
+    monkeypatch.chdir(tmp_path)
+    session = configs.configure_session(Namespace(replay=str(archive)))
+    assert run_modes(session) == expected, (
+        'Режимы на снимке должны давать те же результаты, что и при обходе'
+    )
+    assert session.cache.responses is not None
+    assert not list(tmp_path.glob('http_cache*')), (
+        'При воспроизведении снимка кеш не должен писаться на диск'
+    )
+
+
+def test_snapshot_archive(snapshot):
+    archive, _ = snapshot
+    with zipfile.ZipFile(archive) as zip_file:
+        names = zip_file.namelist()
+    assert names.count('index.json') == 1
+    assert len(names) == len(set(names)), (
+        'Одинаковые тела страниц должны храниться в снимке один раз'
+    )
+    replay = snapshots.SnapshotArchive(archive)
+    entry, body = replay.get('GET', MAIN_DOC_URL)
+    assert entry['status'] == 200 and b'sphinxsidebarwrapper' in body
+    assert replay.get('GET', MAIN_DOC_URL + 'missing.html') is None
+    replay.close()
+
+
+def test_replay_missing_page(snapshot, monkeypatch, tmp_path):
+    archive, _ = snapshot
+    monkeypatch.chdir(tmp_path)
+    session = configs.configure_session(Namespace(replay=str(archive)))
+    assert get_response(session, MAIN_DOC_URL + 'missing.html') is None, (
+        'Страницы, которой нет в снимке, должна давать ошибку соединения'
+    )
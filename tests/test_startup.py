@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+from tests.conftest import SRC_DIR
+
+# Бюджет импорта main.py для --help, микросекунды. До отложенных
+# импортов запуск занимал около 200 мс, после — около 50 мс.
+HELP_IMPORT_BUDGET = 120_000
+HEAVY_MODULES = (
+    'bs4', 'lxml', 'requests', 'requests_cache', 'tqdm', 'prettytable',
+    'urllib3', 'pyarrow', 'aiohttp',
+)
+HELP = (
+    'import main; '
+    'main.configure_argument_parser([*main.MODES, main.ALL_MODES])'
+    '.parse_args(["--help"])'
+)
+
+
+def import_times():
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', HELP],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True,
+    )
+    assert 'usage:' in completed.stdout
+    times = {}
+    for line in completed.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_help_skips_heavy_imports():
+    imported = import_times()
+    heavy = [
+        name for name in imported if name.split('.')[0] in HEAVY_MODULES
+    ]
+    assert not heavy, (
+        f'Запуск с --help не должен импортировать {sorted(heavy)}'
+    )
+
+
+def test_help_import_budget():
+    cumulative = min(import_times()['main'] for _ in range(3))
+    assert cumulative < HELP_IMPORT_BUDGET, (
+        f'Импорт main.py занимает {cumulative / 1000:.0f} мс, '
+        f'бюджет {HELP_IMPORT_BUDGET / 1000:.0f} мс'
+    )
+
+
+def test_do_not_cache_matches_requests_cache():
+    import requests_cache
+
+    from src import constants
+    assert constants.DO_NOT_CACHE == requests_cache.DO_NOT_CACHE, (
+        'DO_NOT_CACHE в constants.py должна совпадать с requests_cache'
+    )
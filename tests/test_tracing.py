@@ -0,0 +1,86 @@
+import json
+import pstats
+from argparse import Namespace
+
+import pytest
+
+try:
+    from src import main
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `main.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `main.py`'
+
+import tracing
+
+
+@pytest.fixture
+def tracer():
+    yield tracing.enable_tracing()
+    tracing.disable_tracing()
+
+
+@pytest.mark.parametrize('engine', ['bs4', 'lxml'])
+def test_tracing_stages(tracer, pages_session, engine):
+    list(main.pep(
+        pages_session, Namespace(
+            mode='pep', engine=engine, workers=4, pep_source='html'
+        )
+    ))
+    fetches = [event for event in tracer.events if event['stage'] == 'fetch']
+    requested = sorted(
+        request.url for request in pages_session.mock_adapter.request_history
+    )
+    assert sorted(event['url'] for event in fetches) == requested, (
+        'Каждая загрузка страницы должна быть записана'
+    )
+    assert all(
+        event['bytes'] > 0 and event['from_cache'] is False
+        for event in fetches
+    )
+    parsed = {
+        event['url'] for event in tracer.events if event['stage'] == 'parse'
+    }
+    assert parsed == {event['url'] for event in fetches}, (
+        'Разбор страницы должен быть привязан к её адресу'
+    )
+    summary = tracer.summary()
+    assert set(summary['stages']) == {'fetch', 'parse', 'find'}
+    stage = summary['stages']['fetch']
+    assert stage['count'] == len(requested)
+    assert stage['p50'] <= stage['p95'] <= stage['max']
+    assert len(summary['slowest']) == 10
+
+
+def test_tracing_cache_hits(tracer, pages_session):
+    list(main.latest_versions(pages_session))
+    list(main.latest_versions(pages_session))
+    fetch = tracer.summary()['fetch']
+    assert (fetch['hits'], fetch['misses']) == (1, 1)
+
+
+def test_tracing_dump(tracer, pages_session, tmp_path):
+    list(main.latest_versions(pages_session))
+    trace_file = tmp_path / 'trace.json'
+    tracer.dump(trace_file)
+    trace = json.loads(trace_file.read_text(encoding='utf-8'))
+    assert trace['events'] and trace['summary']['fetch']['misses'] == 1
+
+
+def test_tracing_disabled(pages_session):
+    assert tracing.tracer is None
+    with tracing.span('fetch') as fields:
+        fields['bytes'] = 1
+    list(main.latest_versions(pages_session))
+
+
+def test_run_profiled(pages_session, tmp_path):
+    profile_file = tmp_path / 'mode.prof'
+    results = tracing.run_profiled(
+        profile_file, main.latest_versions, pages_session, None
+    )
+    assert results == list(main.latest_versions(pages_session))
+    stats = pstats.Stats(str(profile_file))
+    assert any(
+        name == 'latest_versions' for _, _, name in stats.stats
+    ), 'В профиле должен быть вызов функции режима'
@@ -0,0 +1,156 @@
+import time
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+try:
+    import work_queues
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `work_queues.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `work_queues.py`'
+
+import extractors
+from src import crawlers, main
+from tests.test_crawlers import PEP_LINKS
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / 'queue.sqlite3')
+
+
+def test_queue_crawl_with_workers(queue_path, pages_session):
+    expected = list(crawlers.crawl(
+        pages_session, PEP_LINKS, extractors.pep_card, workers=4,
+    ))
+    pages_session.cache.clear()
+    worker_args = Namespace(queue=queue_path, workers=4, worker_idle=0.5)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        workers = [
+            executor.submit(
+                work_queues.run_worker, pages_session,
+                [work_queues.WORKER_MODE], worker_args,
+            )
+            for _ in range(2)
+        ]
+        got = list(crawlers.crawl_pages(
+            pages_session, PEP_LINKS, extractors.pep_card,
+            Namespace(queue=queue_path, workers=2),
+        ))
+        for worker in workers:
+            worker.result()
+    assert got == expected, (
+        'Результаты из очереди должны совпадать с обычным обходом'
+    )
+    queue = work_queues.SqliteQueue(queue_path)
+    assert not queue.lease(100, 60), (
+        'После обхода задания запуска должны удаляться из очереди'
+    )
+
+
+def test_expired_lease_redelivered(queue_path, pages_session):
+    queue = work_queues.SqliteQueue(queue_path)
+    name = work_queues.extractor_name(extractors.pep_status)
+    queue.put([
+        ('run', 0, PEP_LINKS[0], name), ('run', 1, PEP_LINKS[1], name),
+    ])
+    assert len(queue.lease(10, 0.05)) == 2
+    assert not queue.lease(10, 60), 'Арендованное задание не выдаётся снова'
+    time.sleep(0.1)
+    cli_args = Namespace(workers=4)
+    assert work_queues.work_batch(queue, pages_session, cli_args) == 2, (
+        'Задание упавшего воркера должно выдаваться снова после аренды'
+    )
+    assert queue.finished('run', 0) == dict(enumerate(crawlers.crawl(
+        pages_session, PEP_LINKS[:2], extractors.pep_status, workers=4,
+    )))
+
+
+def test_failed_job_isolated(queue_path, pages_session):
+    queue = work_queues.SqliteQueue(queue_path)
+    links = [link for link in PEP_LINKS if 'pep-00' in link][:5]
+    broken_url = 'https://peps.python.org/pep-0012/'
+    assert broken_url in links
+    expected = [
+        None if url == broken_url else status
+        for url, status in zip(links, crawlers.crawl(
+            pages_session, links, extractors.pep_status, workers=4,
+        ))
+    ]
+    pages_session.cache.clear()
+    pages_session.mock_adapter.register_uri(
+        'GET', broken_url, content=b'<html><body></body></html>',
+    )
+    name = work_queues.extractor_name(extractors.pep_status)
+    queue.put([('run', position, url, name)
+               for position, url in enumerate(links)])
+    work_queues.work_batch(queue, pages_session, Namespace(workers=8))
+    assert queue.finished('run', 0) == dict(enumerate(expected)), (
+        'Ошибка разбора одной страницы не должна обнулять остальную пачку'
+    )
+
+
+@pytest.mark.parametrize('name', [
+    'os:system',
+    'extractors:make_soup',
+    'extractors:_missing',
+    'lxml_extractors:_single_string',
+    'tests.test_work_queues:test_failed_job_isolated',
+    'extractors:pep_status.__globals__',
+])
+def test_resolve_extractor_rejects(name):
+    with pytest.raises(ValueError):
+        work_queues.resolve_extractor(name)
+
+
+def test_unknown_extractor_skipped(queue_path, pages_session, monkeypatch):
+    calls = []
+    monkeypatch.setattr('os.system', calls.append)
+    queue = work_queues.SqliteQueue(queue_path)
+    queue.put([
+        ('run', 0, PEP_LINKS[0], 'os:system'),
+        ('run', 1, PEP_LINKS[1],
+         work_queues.extractor_name(extractors.pep_status)),
+    ])
+    assert work_queues.work_batch(
+        queue, pages_session, Namespace(workers=4)
+    ) == 2
+    assert not calls, 'Функции не из модулей извлечения не выполняются'
+    assert queue.finished('run', 0) == {
+        0: None, 1: extractors.pep_status(pages_session.get(
+            PEP_LINKS[1]
+        ).content),
+    }
+
+
+def test_finished_window(queue_path):
+    queue = work_queues.SqliteQueue(queue_path)
+    jobs = [('run', position, f'url-{position}', 'extractors:pep_status')
+            for position in range(6)]
+    queue.put(jobs)
+    for job in jobs:
+        if job[1] != 3:
+            queue.complete(job, [job[2], 'Active'])
+    assert queue.finished('run', 1, 3) == {
+        1: ('url-1', 'Active'), 2: ('url-2', 'Active'),
+    }, 'Опрос должен читать только очередные номера заданий'
+
+
+def test_modes_through_queue(queue_path, pages_session):
+    cli_args = Namespace(pep_source='html', workers=4)
+    queue_args = Namespace(pep_source='html', workers=4, queue=queue_path)
+    for mode in ('whats-new', 'pep', 'pep-details'):
+        assert list(main.MODES[mode](pages_session, queue_args)) == list(
+            main.MODES[mode](pages_session, cli_args)
+        )
+
+
+def test_worker_needs_queue(pages_session):
+    with pytest.raises(ValueError):
+        main.run_modes(pages_session, ['worker'], Namespace(queue=None))
+    with pytest.raises(ValueError):
+        main.run_modes(
+            pages_session, ['worker', 'pep'], Namespace(queue='queue.db')
+        )